@@ -0,0 +1,75 @@
+"""Compare the dissection of the DNS dump records by the composition of
+the line-based dissectors with the single-pass DNS dump dissector, with
+and without the projection of the fields read by the statistics.
+
+Usage: python benchmarks/bench_dissect.py [COUNT]"""
+import sys
+import time
+
+from nssift.grind.cluster import streams
+from nssift.grind.dissect.dig import Dig
+from nssift.grind.dissect.dissector import Dissector
+from nssift.grind.dissect.dnsdump import DnsDump
+from nssift.grind.dissect.proto import Proto
+
+
+# Define a record of the DNS dump as it is produced by the splitter.
+RECORD = """\
+response_ip: 37.9.72.211
+id: 61168
+qname: rosfirm.ru.
+qtype: A (1)
+response: [53 octets]
+;; ->>HEADER<<- opcode: QUERY, rcode: NOERROR, id: 61168
+;; flags: qr aa; QUERY: 1, ANSWER: 1, AUTHORITY: 2, ADDITIONAL: 0
+;; QUESTION SECTION:
+;rosfirm.ru. IN A
+;; ANSWER SECTION:
+rosfirm.ru. 86400 IN A 212.23.90.34
+;; AUTHORITY SECTION:
+rosfirm.ru. 86400 IN NS ns1.rosfirm.ru.
+rosfirm.ru. 86400 IN NS ns2.rosfirm.ru.
+;; ADDITIONAL SECTION:"""
+
+
+def dissect_partial(texts):
+    """Dissections of the records by the line-based dissectors."""
+    dnsdump = DnsDump()
+    for text in texts:
+        splitindex = text.find(";;")
+        meta, packet = Dissector.partial(Proto, Dig)(
+            text[:splitindex], text[splitindex:])
+        meta = dnsdump.fetch_octets(meta, "query")
+        meta = dnsdump.fetch_octets(meta, "response")
+        yield dnsdump.populate(meta, packet)
+
+
+def dissect_single(texts):
+    """Dissections of the records by the single-pass dissector."""
+    dnsdump = DnsDump()
+    for text in texts:
+        yield dnsdump.dissect(text)
+
+
+def dissect_projected(texts):
+    """Dissections of the records projected to the statistics fields."""
+    dnsdump = DnsDump(streams()[1].projection())
+    for text in texts:
+        yield dnsdump.dissect(text)
+
+
+def main(count):
+    texts = [RECORD] * count
+    for func in (dissect_partial, dissect_single, dissect_projected):
+        started = time.perf_counter()
+        dissections = sum(1 for _ in func(texts))
+        elapsed = time.perf_counter() - started
+        print("%(name)s: %(count)d records in %(elapsed).3fs, "
+              "%(rate).0f records/s" % {"name": func.__name__,
+                                        "count": dissections,
+                                        "elapsed": elapsed,
+                                        "rate": dissections / elapsed})
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
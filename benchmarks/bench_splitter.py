@@ -0,0 +1,97 @@
+"""Compare the line-based splitting of the DNS dumps with the splitting
+of the decompressed blocks of bytes.
+
+Usage: python benchmarks/bench_splitter.py [ARCHIVE ...]
+
+Without archives a synthetic dump is generated and benchmarked both
+compressed and uncompressed, the latter shows the cost of splitting
+alone."""
+import bz2
+import functools
+import io
+import os
+import sys
+import tempfile
+import time
+
+from nssift.grind.fileutil import compression
+from nssift.grind.fileutil.loader import Loader
+from nssift.grind.fileutil.splitter import Splitter
+
+
+# Define a record of the DNS dump used to generate the synthetic data.
+RECORD = """\
+query_ip: 37.9.72.211
+id: 19254
+qname: 221.160.5.15.in-addr.arpa.
+qtype: PTR (12)
+query: [43 octets]
+;; ->>HEADER<<- opcode: QUERY, rcode: NOERROR, id: 19254
+;; flags:; QUERY: 1, ANSWER: 0, AUTHORITY: 0, ADDITIONAL: 0
+
+;; QUESTION SECTION:
+;221.160.5.15.in-addr.arpa. IN PTR
+
+;; ANSWER SECTION:
+
+;; AUTHORITY SECTION:
+
+;; ADDITIONAL SECTION:
+---
+"""
+
+
+def isplit_lines(filename, symbol):
+    """Chunks of the archive split by the lines."""
+    codec = compression.detect(filename)
+    with codec.open(filename) as archive:
+        textfile = io.TextIOWrapper(archive, errors="replace")
+        yield from Loader(filename).isplit(textfile, symbol)
+
+
+def isplit_bytes(filename, symbol):
+    """Chunks of the archive split by the blocks of bytes."""
+    codec = compression.detect(filename)
+    with codec.open(filename) as archive:
+        read = functools.partial(archive.read, Loader.blocksize)
+        yield from Splitter(symbol).isplit(iter(read, b""))
+
+
+def measure(func, filename):
+    """Count of the chunks and the time spent to produce them."""
+    started = time.perf_counter()
+    count = sum(1 for _ in func(filename, "---"))
+    return count, time.perf_counter() - started
+
+
+def synthesize(suffix, compress, count=200000):
+    """Path to the archive of the synthetic DNS dump."""
+    archive = tempfile.NamedTemporaryFile(suffix=suffix, delete=False)
+    with archive:
+        archive.write(compress((RECORD * count).encode()))
+    return archive.name
+
+
+def main(filenames):
+    temporary = []
+    if not filenames:
+        temporary = [synthesize(".pres.bz2", bz2.compress),
+                     synthesize(".pres", bytes)]
+        filenames = temporary
+
+    try:
+        for filename in filenames:
+            for func in (isplit_lines, isplit_bytes):
+                count, elapsed = measure(func, filename)
+                print("%(filename)s %(name)s: %(count)d chunks "
+                      "in %(elapsed).3fs, %(rate).0f chunks/s" %
+                      {"filename": os.path.basename(filename),
+                       "name": func.__name__, "count": count,
+                       "elapsed": elapsed, "rate": count / elapsed})
+    finally:
+        for filename in temporary:
+            os.unlink(filename)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -1,9 +1,12 @@
 import logging
 
+from nssift.grind.dissect.wire import DnsWire
 from nssift.grind.pipeline import dissect
 from nssift.grind.pipeline import statistics
 from nssift.grind.pipeline import clustering
 from nssift.grind.netstats import gauge
+from nssift.grind.netstats import spec
+from nssift.grind.netstats.bundler import ArrayBundler
 from nssift.grind.netstats.factory import BundlerFactory
 
 
@@ -28,40 +31,91 @@ class Cluster(object):
         for stream in self.streams:
             rdd = stream.launch(sc, rdd, params)
 
+        # The accumulated results are known only after the data is
+        # processed by the last stream.
+        for stream in self.streams:
+            stream.finish(sc, params)
+
         return rdd
 
 
-def factory():
+def factory(windows=None):
     """Define a helper to create a new Bundler factory with a predefined set of
-    the counters to collect statistics from the DNS dumps files."""
+    the counters to collect statistics from the DNS dumps files.
+
+    windows: A pair of the width of the time windows in seconds and the
+             count of the latest windows, by default the statistics are
+             collected over the whole data only."""
     return BundlerFactory(
         # The first counter calculates the Shannon entropy of the
         # DNS requested hostnames, since the most of the DNS tunnels
         # are encoding the arbitrary data into the domain names, which
-        # lead to the growth of the entropy value.
-        [(gauge.ShannonEntropyGauge, ["meta", "qname"]),
+        # lead to the growth of the entropy value. The request-side
+        # counters read the requests only, since the fields are absent
+        # in the responses of the DNS dumps.
+        [(gauge.ShannonEntropyGauge, ["meta", "qname"], {"type": "REQUEST"}),
 
         # This counter calculates the number of the different DNS records
         # types requested from the single IP address, so it could be used
-        # as and evidence of the established tunnels.
-         (gauge.SetGauge, ["meta", "qtype"]),
+        # as and evidence of the established tunnels. The known types
+        # are counted in a bitmap.
+         (gauge.SetGauge, ["meta", "qtype"],
+          {"type": "REQUEST",
+           "domain": ["%s (%d)" % (name, qtype)
+                      for qtype, name in sorted(DnsWire.qtypes.items())]}),
 
         # This counter calculates the average packet DNS requests from
         # the single host. So based on the host activity we could identify
         # the DNS anomalies.
-         (gauge.NumberGauge, ["meta", "query"])])
+         (gauge.NumberGauge, ["meta", "query"], {"type": "REQUEST"}),
+
+        # These counters estimate the quantiles of the sizes of the
+        # requests and responses, the lengths and the label counts of
+        # the requested hostnames, since the tunnels produce bimodal
+        # distributions, which are hidden by the averages.
+         (gauge.QuantileGauge, ["meta", "query"], {"type": "REQUEST"}),
+         (gauge.QuantileGauge, ["meta", "response"], {"type": "RESPONSE"}),
+         (gauge.QuantileGauge, ["meta", "qname"],
+          {"type": "REQUEST", "measure": "length"}),
+         (gauge.QuantileGauge, ["meta", "qname"],
+          {"type": "REQUEST", "measure": "labels"}),
 
+        # This counter finds the most queried domain names of the host,
+        # they are reported along with the statistics of the host.
+         (gauge.HeavyHitterGauge, ["meta", "qname"], {"type": "REQUEST"})],
 
-def streams():
+        # The numeric counters of the hosts are merged as arrays.
+        bundler=ArrayBundler,
+        windows=windows)
+
+
+def streams(windows=None, gauges=None, dimensions=None):
     """Define a helper to create a new list of the Streams to process the DNS
-    data."""
+    data.
+
+    windows:    A pair of the width of the time windows in seconds and
+                the count of the latest windows to collect statistics of.
+    gauges:     A name of the file with the specification of the gauges,
+                by default the predefined gauges are used.
+    dimensions: A list of the dimensions to aggregate the statistics by,
+                like "host", "subnet" and "domain", the hosts are
+                clustered, when they are listed first."""
+    bundler_factory = factory(windows)
+    if gauges:
+        bundler_factory = spec.build(spec.load(gauges), windows)
+
+    statistics_stream = statistics.StatisticsStream(
+        bundler_factory, dimensions=dimensions)
+
     return [
         # The first stream performs the BZip2 archives loading and
-        # files processing, so later we could collect statistics.
-        dissect.DissectionStream(),
+        # files processing, so later we could collect statistics. Only
+        # the fields read by the statistics are dissected.
+        dissect.DissectionStream(
+            projection=statistics_stream.projection()),
 
         # One the second step we will perform the statistic collection.
-        statistics.StatisticsStream(factory()),
+        statistics_stream,
 
         # Perform the statistics clustering of the aggregated data.
         clustering.ClusteringStream(),
@@ -1,11 +1,8 @@
 import itertools
-import logging
 import re
 
 from nssift.grind.dissect.dissector import Dissector
-
-
-LOG = logging.getLogger(__name__)
+from nssift.grind.dissect.failures import Failures
 
 
 class Dig(Dissector):
@@ -96,24 +93,21 @@ class Dig(Dissector):
         # Note, that additional section could be omitted, since expect
         # that at leas five will be presented.
         if len(sections) < 5:
-            LOG.debug("Failed to dissect the text file due to "
-                      "wrong sections count: '%(text)s'" % {"text": text})
+            self.failures.fail(Failures.SECTIONS, text)
             return None
 
         # Set the next steps of the text parsing, since it looks
         # like the header does not have correct format.
         header = self.fetch_header(sections[0])
         if not header:
-            LOG.debug("Failed to dissect the header section: '%(header)s'"
-                      % {"header": sections[0]})
+            self.failures.fail(Failures.HEADER, text)
             return None
 
         # The same with flags, probably the provided text is
         # not valid.
         flags = self.fetch_flags(sections[1])
         if not flags:
-            LOG.debug("Failed to dissect the flags section: '%(flags)s'"
-                      % {"flags": sections[1]})
+            self.failures.fail(Failures.FLAGS, text)
             return None
 
         # All other items will be treated as regular sections.
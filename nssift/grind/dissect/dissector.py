@@ -1,12 +1,22 @@
 import abc
+import functools
 import itertools
 import operator
 import six
 
+from nssift.grind.dissect.failures import Failures
+
 
 class Dissector(metaclass=abc.ABCMeta):
     """Define basic dissector interface."""
 
+    def __init__(self, failures=None):
+        """Create a new instance of the dissector.
+
+        failures: A tally of the dissection failures."""
+        super().__init__()
+        self.failures = Failures() if failures is None else failures
+
     @abc.abstractmethod
     def dissect(self, text):
         """Dissect the specified string into the dictionary
@@ -17,6 +27,18 @@ class Dissector(metaclass=abc.ABCMeta):
         text: A string that should be dissected.
         """
 
+    def dissect_many(self, chunks):
+        """Dissect the specified strings. Return an iterator of the
+        dissections, the chunks failed to be dissected are omitted.
+
+        The chunks are mapped and filtered without the per-chunk calls
+        of the Python code other than the dissection itself.
+
+        chunks: An iterable of strings that should be dissected.
+        """
+        dissections = map(self.dissect, chunks)
+        return filter(functools.partial(operator.is_not, None), dissections)
+
     def stripall(self, lst):
         """Strip the each element of the list of strings.
 
@@ -1,21 +1,80 @@
 import re
+import sys
 
 from nssift.grind.dissect.dig import Dig
-from nssift.grind.dissect.proto import Proto
-
 from nssift.grind.dissect.dissector import Dissector
+from nssift.grind.dissect.failures import Failures
+from nssift.grind.dissect.projection import Projection
+from nssift.grind.dissect.record import Interner
+from nssift.grind.dissect.record import Payload
+from nssift.grind.dissect.record import Record
+from nssift.grind.dissect.record import ResourceRecord
 
 
 class DnsDump(Dissector):
     """Define a helper to parse the chunk of the DNS dump
-    that will be ready to be consumed by statistics bundler."""
+    that will be ready to be consumed by statistics bundler.
+
+    The chunk is divided into the pieces only once, and the pieces
+    are parsed in place with the precompiled expressions, so the
+    instance could be reused for any count of the chunks.
+
+    Only the projected fields are kept in the dissection, the others
+    are skipped without parsing when possible. The sections of the
+    resource records are parsed into the lists of the records only when
+    these lists are projected explicitly. The names of the fields
+    and the values of few distinct values are interned, so the equal
+    strings share the memory and they are pickled once per batch."""
 
     # Define a dissector for response and query parameters.
     octets_dissector = re.compile(r"\[(\d+) octets\]")
 
-    def populate(self, meta_params, packet_params):
+    # Define a dissector for the key-value lines of the metadata.
+    meta_dissector = re.compile(r"^([^:\n]*):([^\n]*)", re.MULTILINE)
+
+    # Reuse the dissectors of the dig-utility response.
+    header_dissector = Dig.header_dissector
+    flags_dissector = Dig.flags_dissector
+
+    # Define the metadata fields used to identify the packet type.
+    type_fields = {"query", "response"}
+
+    # Define the fields with the small count of distinct values.
+    interned_fields = {"qtype", "type", "proto", "opcode", "rcode",
+                       "status", "QUERY", "ANSWER", "AUTHORITY",
+                       "ADDITIONAL", "ZONE", "PREREQ", "UPDATE"}
+
+    # Define the names of the parsed resource records of the sections.
+    record_sections = {"answer_section": "answer_records",
+                       "authority_section": "authority_records",
+                       "additional_section": "additional_records"}
+
+    def __init__(self, projection=None, failures=None, interner=None):
+        """Create a new instance of the DNS dump dissector.
+
+        projection: A projection of the dissected fields, by default
+                    all fields are dissected.
+        failures:   A tally of the dissection failures.
+        interner:   An interner of the domain names and record data."""
+        super().__init__(failures)
+        projection = projection or Projection()
+        self.interner = Interner() if interner is None else interner
+
+        self.meta_fields = projection.names(["meta"])
+        if self.meta_fields is not None:
+            self.meta_fields |= self.type_fields
+
+        self.packet_fields = projection.names(["packet"])
+        self.flags_fields = projection.names(["packet", "flags"])
+
+        self.record_fields = set(self.record_sections.values())
+        self.record_fields &= self.packet_fields or set()
+
+    def populate(self, meta_params, packet_params, chunk=None):
         """Package with the type and identifier if the specified
-        dictionaries contain valid data."""
+        dictionaries contain valid data.
+
+        chunk: A dissected chunk to quarantine on the failure."""
         packet_id = packet_params.get("header", {}).get("id")
         packet_type = None
 
@@ -25,19 +84,21 @@ class DnsDump(Dissector):
             packet_type = "RESPONSE"
 
         # Not a valid data, just throw it away.
-        if packet_type is None or packet_id is None:
+        if packet_type is None:
+            self.failures.fail(Failures.TYPE, chunk)
+            return None
+        if packet_id is None:
+            self.failures.fail(Failures.ID, chunk)
             return None
 
         # Define a DNS exchange message payload and data.
-        payload = {"type": packet_type,
-                   "meta": meta_params,
-                   "packet": packet_params}
+        payload = Payload(packet_type, meta_params, packet_params)
 
         # Return the transaction identifiers as like as a list of
         # payloads. We will return a list, so it will be easier
         # later to aggregate the requests and responses by the same
         # identifier value.
-        return {"id": packet_id, "transaction": [payload]}
+        return Record(packet_id, [payload])
 
     def fetch_octets(self, params, attribute):
         """Fetch the value of octets of the specified attribute."""
@@ -60,24 +121,135 @@ class DnsDump(Dissector):
         params[attribute] = int(octets)
         return params
 
+    def fetch_pairs(self, text):
+        """Dictionary of the comma-separated key-value pairs.
+
+        text: A string like "opcode: QUERY, rcode: NOERROR"."""
+        pairs = {}
+        for pair in text.split(","):
+            key, sep, value = pair.partition(":")
+            if sep:
+                key, value = key.strip(), value.strip()
+                if key in self.interned_fields:
+                    value = sys.intern(value)
+                pairs[sys.intern(key)] = value
+        return pairs
+
+    def fetch_meta(self, text):
+        """Dissect the metadata lines preceding the dig-utility output.
+
+        text: A string with the "key: value" lines."""
+        meta = {}
+        for key, value in self.meta_dissector.findall(text):
+            key = key.strip()
+            if self.meta_fields is None or key in self.meta_fields:
+                value = value.strip()
+                if key in self.interned_fields:
+                    value = sys.intern(value)
+                meta[sys.intern(key)] = value
+        return meta
+
+    def fetch_packet(self, sections, chunk=None):
+        """Dissect the sections of the dig-utility output.
+
+        sections: A list of the strings between the ";;" delimiters.
+        chunk:    A dissected chunk to quarantine on the failure."""
+        # The response have a regular structure, therefore if something
+        # is missing, we should skip them. The header, the flags and at
+        # least three sections are expected, since the additional section
+        # could be omitted.
+        if len(sections) < 5:
+            self.failures.fail(Failures.SECTIONS, chunk)
+            return None
+
+        match = self.header_dissector.search(sections[0])
+        header = match and self.fetch_pairs(match.group(1))
+        if not header:
+            self.failures.fail(Failures.HEADER, chunk)
+            return None
+
+        match = self.flags_dissector.search(sections[1])
+        flags = match and self.fetch_pairs(match.group(2))
+        if not flags:
+            self.failures.fail(Failures.FLAGS, chunk)
+            return None
+
+        flags["flags"] = sys.intern(match.group(1).strip())
+
+        if self.flags_fields is not None:
+            flags = {key: flags[key] for key in self.flags_fields
+                     if key in flags}
+
+        # All other items will be treated as regular sections. Modify
+        # the section name. Example: ANSWER SECTION -> answer_section.
+        packet = {}
+        for section in sections[2:]:
+            index = section.find(":")
+            if index == -1:
+                continue
+
+            key = section[:index].strip().replace(" ", "_").lower()
+            key = sys.intern(key)
+
+            records = self.record_sections.get(key)
+            if records not in self.record_fields:
+                records = None
+
+            # Skip the content of the sections, that are not projected.
+            if self.packet_fields is None or key in self.packet_fields:
+                packet[key] = section[index + 1:].strip()
+            if records is not None:
+                packet[records] = self.fetch_records(section[index + 1:])
+
+        # The header is always kept to identify the transaction.
+        packet["header"] = header
+        if self.packet_fields is None or "flags" in self.packet_fields:
+            packet["flags"] = flags
+        return packet
+
+    def fetch_records(self, text):
+        """Dissect the resource records of the section. The lines, that
+        are not the resource records are skipped.
+
+        text: A string with the resource records, one per line, like
+              "ya.ru. 600 IN A 87.250.250.242"."""
+        records = []
+        for line in text.split("\n"):
+            fields = line.split(None, 4)
+            if len(fields) < 4 or fields[0].startswith(";"):
+                continue
+
+            name, ttl, rrclass, rrtype = fields[:4]
+            if not ttl.isdigit():
+                continue
+
+            rdata = fields[4] if len(fields) > 4 else ""
+            records.append(ResourceRecord(
+                self.interner(name), int(ttl), sys.intern(rrclass),
+                sys.intern(rrtype), self.interner(rdata)))
+        return records
+
     def dissect(self, text):
         """Parse the specified text either as a DNS request, or as
         a DNS response."""
-        # Split the specified text into two pieces.
-        splitindex = text.find(";;")
+        # Split the specified text into the metadata, which precedes
+        # the first ";;" delimiter, and the sections of the packet.
+        sections = text.split(";;")
 
-        # If count of pieces is not equal to two, that means
-        # that the specified text chunk is probably broken, and
-        # the further processing is useless.
-        if splitindex == -1:
+        # If there is no delimiter, that means that the specified text
+        # chunk is probably broken, and the further processing is useless.
+        if len(sections) < 2:
+            self.failures.fail(Failures.DELIMITER, text)
             return None
 
-        dissect_functor = self.partial(Proto, Dig)
-        meta, packet = dissect_functor(
-            text[:splitindex], text[splitindex:])
-
         # Both dissections should be valid.
-        if not (meta and packet):
+        packet = self.fetch_packet(sections[1:], text)
+        if not packet:
+            return None
+
+        meta = self.fetch_meta(sections[0])
+        if not meta:
+            self.failures.fail(Failures.META, text)
             return None
 
         # Pre-process the "query" and "response" parameters
@@ -86,4 +258,4 @@ class DnsDump(Dissector):
         meta = self.fetch_octets(meta, "response")
 
         # Generate a new dissected data package.
-        return self.populate(meta, packet)
+        return self.populate(meta, packet, text)
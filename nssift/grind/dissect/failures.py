@@ -0,0 +1,144 @@
+import base64
+import collections
+import heapq
+import json
+import logging
+import random
+
+
+LOG = logging.getLogger(__name__)
+
+
+class Reservoir:
+    """Define a uniform random sample of the fixed size.
+
+    Each item is assigned a random key and the items with the smallest
+    keys are kept, so the samples of the different partitions could be
+    merged into the uniform sample of the whole data."""
+
+    def __init__(self, size=0):
+        """Create a new instance of the reservoir.
+
+        size: A maximum count of the sampled items."""
+        super().__init__()
+        self.size = size
+        self.seen = 0
+
+        # The heap of the items with the negated keys, so the item
+        # with the largest key is replaced first.
+        self.heap = []
+
+    def add(self, item):
+        """Offer the item to the sample."""
+        self.seen += 1
+        if not self.size:
+            return
+
+        entry = (-random.random(), self.seen, item)
+        if len(self.heap) < self.size:
+            heapq.heappush(self.heap, entry)
+        elif entry[0] > self.heap[0][0]:
+            heapq.heapreplace(self.heap, entry)
+
+    def merge(self, other):
+        """Merge the sample of the other reservoir into this one."""
+        self.size = max(self.size, other.size)
+        self.seen += other.seen
+
+        # The sequence numbers are used only to break the ties.
+        entries = self.heap + [(key, self.seen + seq, item)
+                               for key, seq, item in other.heap]
+        self.heap = heapq.nlargest(self.size, entries)
+        heapq.heapify(self.heap)
+        return self
+
+    def items(self):
+        """List of the sampled items."""
+        return [item for _, _, item in sorted(self.heap, reverse=True)]
+
+
+class Failures:
+    """Define a tally of the dissection failures by the reason.
+
+    Failures are counted instead of being logged one by one, and only
+    a bounded sample of the failed chunks is kept for the diagnostics,
+    so the dirty data does not slow down the processing."""
+
+    # Define the reasons of the dissection failures.
+    DELIMITER = "delimiter"
+    SECTIONS = "sections"
+    HEADER = "header"
+    FLAGS = "flags"
+    META = "meta"
+    TYPE = "type"
+    ID = "id"
+    MESSAGE = "message"
+    RECORDS = "records"
+    KEYPATH = "keypath"
+    OVERSIZE = "oversize"
+
+    def __init__(self, quarantine=0):
+        """Create a new instance of the failures tally.
+
+        quarantine: A count of the failed chunks to sample."""
+        super().__init__()
+        self.counts = collections.Counter()
+        self.quarantine = Reservoir(quarantine)
+
+    def __bool__(self):
+        return bool(self.counts)
+
+    def fail(self, reason, chunk=None, count=1):
+        """Account the failure.
+
+        reason: A reason of the failure.
+        chunk:  A chunk failed to be dissected, it is sampled into
+                the quarantine.
+        count:  A count of the failures."""
+        self.counts[reason] += count
+        if chunk is not None:
+            self.quarantine.add((reason, chunk))
+
+    def merge(self, other):
+        """Merge the other tally into this one."""
+        self.counts.update(other.counts)
+        self.quarantine.merge(other.quarantine)
+        return self
+
+    def report(self, logger=LOG):
+        """Log the counts of the failures by the reason."""
+        for reason, count in sorted(self.counts.items()):
+            logger.warning("Failed %(count)d times due to the reason: "
+                           "%(reason)s" % {"count": count, "reason": reason})
+
+    def dump(self, filename):
+        """Write the quarantined chunks into the file as JSON lines."""
+        with open(filename, "w") as textfile:
+            for reason, chunk in self.quarantine.items():
+                # The captured messages are written as the dictionaries
+                # with the data encoded in Base64.
+                if hasattr(chunk, "_asdict"):
+                    chunk = chunk._asdict()
+                    chunk["data"] = base64.b64encode(chunk["data"]).decode()
+
+                json.dump({"reason": reason, "chunk": chunk}, textfile)
+                textfile.write("\n")
+
+
+class FailuresParam:
+    """Define a parameter of the Spark accumulator of the failures."""
+
+    def __init__(self, quarantine=0):
+        """Create a new instance of the accumulator parameter.
+
+        quarantine: A count of the failed chunks to sample."""
+        super().__init__()
+        self.quarantine = quarantine
+
+    def zero(self, value):
+        """Empty tally of the failures."""
+        return Failures(self.quarantine)
+
+    def addInPlace(self, value1, value2):
+        """Merge the tallies of the failures."""
+        return value1.merge(value2)
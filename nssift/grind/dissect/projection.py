@@ -0,0 +1,53 @@
+class Projection:
+    """Define a projection of the dissected fields.
+
+    Projection is made of the nested key paths of the fields read by
+    the statistics gauges, so the dissector could skip the parsing of
+    the other fields and they are not shuffled between the workers."""
+
+    def __init__(self, paths=None):
+        """Create a new instance of the projection.
+
+        paths: A list of the nested key paths, like ["meta", "qname"].
+               None means that all fields are projected."""
+        super().__init__()
+        self.fields = None if paths is None else {}
+
+        for path in paths or []:
+            self.add(path)
+
+    def add(self, path):
+        """Project the field at the nested key path with all its
+        nested fields.
+
+        path: A list of the nested keys."""
+        if self.fields is None:
+            return
+
+        if not path:
+            self.fields = None
+            return
+
+        node = self.fields
+        for key in path[:-1]:
+            # The whole field is already projected.
+            if key in node and node[key] is None:
+                return
+            node = node.setdefault(key, {})
+
+        node[path[-1]] = None
+
+    def names(self, path):
+        """Set of the projected names of the nested fields at the key
+        path. None, if all nested fields are projected.
+
+        path: A list of the nested keys."""
+        node = self.fields
+        for key in path:
+            if node is None:
+                return None
+            if key not in node:
+                return set()
+            node = node[key]
+
+        return None if node is None else set(node)
@@ -0,0 +1,116 @@
+import collections.abc
+
+
+class Struct(collections.abc.Mapping):
+    """Define a compact record with the fixed set of fields.
+
+    The fields are stored in the slots instead of the per-instance
+    dictionary, and the record is pickled as a tuple of the values
+    without the names of the fields. The record is read-only mapping
+    of the field names to the values, so it is read the same way as
+    the dictionary."""
+
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self):
+        return iter(self.__slots__)
+
+    def __len__(self):
+        return len(self.__slots__)
+
+    def __reduce__(self):
+        return self.__class__, tuple(map(self.__getitem__, self.__slots__))
+
+    def __repr__(self):
+        return "%(klass)s(%(fields)s)" % {
+            "klass": self.__class__.__name__,
+            "fields": ", ".join("%s=%r" % item for item in self.items())}
+
+
+class Payload(Struct):
+    """Define a DNS exchange message payload."""
+
+    __slots__ = ("type", "meta", "packet")
+
+    def __init__(self, type, meta, packet):
+        """Create a new instance of the payload.
+
+        type:   A type of the message, either REQUEST or RESPONSE.
+        meta:   A dictionary of the message metadata.
+        packet: A dictionary of the dissected DNS packet."""
+        self.type = type
+        self.meta = meta
+        self.packet = packet
+
+
+class Record(Struct):
+    """Define a transaction of the DNS exchange messages."""
+
+    __slots__ = ("id", "transaction")
+
+    def __init__(self, id, transaction):
+        """Create a new instance of the transaction record.
+
+        id:          An identifier of the transaction.
+        transaction: A list of the message payloads."""
+        self.id = id
+        self.transaction = transaction
+
+
+class ResourceRecord(Struct):
+    """Define a resource record of the DNS message."""
+
+    __slots__ = ("name", "ttl", "rrclass", "rrtype", "rdata")
+
+    def __init__(self, name, ttl, rrclass, rrtype, rdata):
+        """Create a new instance of the resource record.
+
+        name:    A domain name of the record.
+        ttl:     A time to live of the record in seconds.
+        rrclass: A class of the record, like IN.
+        rrtype:  A type of the record, like A.
+        rdata:   A text of the record data."""
+        self.name = name
+        self.ttl = ttl
+        self.rrclass = rrclass
+        self.rrtype = rrtype
+        self.rdata = rdata
+
+
+class Interner:
+    """Define an interner of the strings with many distinct values.
+
+    Unlike the strings interned by the interpreter, the strings are
+    released with the interner, so the interner is created for each
+    partition of the data. The count of the interned strings is bounded
+    to keep the memory usage flat."""
+
+    # Define a maximum count of the interned strings.
+    maxsize = 65536
+
+    def __init__(self, maxsize=None):
+        """Create a new instance of the interner.
+
+        maxsize: A maximum count of the interned strings."""
+        super().__init__()
+        self.strings = {}
+        if maxsize is not None:
+            self.maxsize = maxsize
+
+    def __call__(self, string):
+        """The interned string equal to the specified one."""
+        interned = self.strings.get(string)
+        if interned is not None:
+            return interned
+
+        # Start over, when the strings do not repeat enough.
+        if len(self.strings) >= self.maxsize:
+            self.strings.clear()
+
+        self.strings[string] = string
+        return string
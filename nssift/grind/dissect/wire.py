@@ -0,0 +1,286 @@
+import re
+import socket
+import struct
+import sys
+
+from nssift.grind.dissect.dnsdump import DnsDump
+from nssift.grind.dissect.failures import Failures
+from nssift.grind.dissect.record import ResourceRecord
+
+
+class DnsWire(DnsDump):
+    """Define a dissector of the DNS messages in the wire format.
+
+    The messages captured from the network are dissected into the
+    records of the same shape as the records of the DNS dump, so the
+    statistics are collected the same way for both sources. The sections
+    are rendered like in the dig-utility output only when projected."""
+
+    # Define a header of the DNS message.
+    header = struct.Struct("!HHHHHH")
+
+    # Define the fixed fields of the question and the resource record.
+    question = struct.Struct("!HH")
+    resource = struct.Struct("!HHIH")
+
+    # Define the names of the opcodes, the response codes, the classes
+    # and the types of the resource records.
+    opcodes = {0: "QUERY", 1: "IQUERY", 2: "STATUS", 4: "NOTIFY",
+               5: "UPDATE"}
+
+    rcodes = {0: "NOERROR", 1: "FORMERR", 2: "SERVFAIL", 3: "NXDOMAIN",
+              4: "NOTIMP", 5: "REFUSED", 6: "YXDOMAIN", 7: "YXRRSET",
+              8: "NXRRSET", 9: "NOTAUTH", 10: "NOTZONE"}
+
+    classes = {1: "IN", 3: "CH", 4: "HS", 254: "NONE", 255: "ANY"}
+
+    qtypes = {1: "A", 2: "NS", 5: "CNAME", 6: "SOA", 12: "PTR", 13: "HINFO",
+              15: "MX", 16: "TXT", 17: "RP", 18: "AFSDB", 24: "SIG",
+              25: "KEY", 28: "AAAA", 29: "LOC", 33: "SRV", 35: "NAPTR",
+              39: "DNAME", 41: "OPT", 43: "DS", 44: "SSHFP", 46: "RRSIG",
+              47: "NSEC", 48: "DNSKEY", 50: "NSEC3", 51: "NSEC3PARAM",
+              52: "TLSA", 64: "SVCB", 65: "HTTPS", 99: "SPF", 250: "TSIG",
+              251: "IXFR", 252: "AXFR", 255: "ANY", 256: "URI", 257: "CAA"}
+
+    # Define the names of the flags in the order of the dig-utility.
+    flagbits = (("qr", 15), ("aa", 10), ("tc", 9), ("rd", 8), ("ra", 7),
+                ("ad", 5), ("cd", 4))
+
+    # Define the names of the counters of the sections.
+    counters = ("QUERY", "ANSWER", "AUTHORITY", "ADDITIONAL")
+
+    # Define the names of the sections of the resource records.
+    sections = ("answer_section", "authority_section", "additional_section")
+
+    # Define a type of the pseudo resource record with the EDNS options,
+    # it is not rendered in the additional section.
+    opt_type = 41
+
+    # A regular expression for the labels, that are not escaped.
+    label_dissector = re.compile(rb"[A-Za-z0-9_-]*\Z")
+
+    # Define a maximum count of the compression pointers in a name.
+    max_pointers = 64
+
+    def dissect(self, message):
+        """Parse the captured message either as a DNS request, or as
+        a DNS response.
+
+        message: A DNS message captured from the network."""
+        data = message.data
+
+        try:
+            msgid, bits, *counts = self.header.unpack_from(data)
+
+            qname, offset = self.fetch_name(data, self.header.size)
+            qtype, qclass = self.question.unpack_from(data, offset)
+            offset += self.question.size
+        except (struct.error, IndexError, ValueError):
+            self.failures.fail(Failures.MESSAGE, message)
+            return None
+
+        response = bool(bits & 0x8000)
+        client, server = message.src, message.dst
+        port = message.sport
+        if response:
+            client, server = server, client
+            port = message.dport
+
+        meta = {"proto": message.transport,
+                "query_ip": client,
+                "query_port": port,
+                "response_ip": server,
+                "id": str(msgid),
+                "qname": qname,
+                "qtype": "%s (%d)" % (self.typename(qtype), qtype),
+                ("response" if response else "query"): len(data)}
+
+        if message.timestamp is not None:
+            meta["timestamp"] = message.timestamp
+
+        if self.meta_fields is not None:
+            meta = {key: meta[key] for key in self.meta_fields if key in meta}
+        for key in meta.keys() & self.interned_fields:
+            meta[key] = sys.intern(meta[key])
+
+        header = {"opcode": self.opcodes.get((bits >> 11) & 0x0f, "RESERVED"),
+                  "rcode": self.rcodes.get(bits & 0x0f, "RESERVED"),
+                  "id": str(msgid)}
+
+        packet = {"header": header}
+
+        if self.projected("flags"):
+            flags = dict(zip(self.counters, map(str, counts)))
+            flags["flags"] = " ".join(
+                name for name, bit in self.flagbits if bits & (1 << bit))
+
+            if self.flags_fields is not None:
+                flags = {key: flags[key] for key in self.flags_fields
+                         if key in flags}
+            packet["flags"] = flags
+
+        if self.projected("question_section"):
+            packet["question_section"] = ";%s %s %s" % (
+                qname, self.classname(qclass), self.typename(qtype))
+
+        # The resource records are parsed only when they are projected.
+        projected = list(map(self.projected, self.sections))
+        records = [self.record_sections[name] in self.record_fields
+                   for name in self.sections]
+        if any(projected) or any(records):
+            try:
+                sections = self.fetch_sections(data, offset, counts[1:])
+            except (struct.error, IndexError, ValueError):
+                self.failures.fail(Failures.RECORDS, message)
+                return None
+
+            for name, keep, keep_records, section in zip(
+                    self.sections, projected, records, sections):
+                if keep:
+                    packet[name] = "\n".join(map(self.render, section))
+                if keep_records:
+                    packet[self.record_sections[name]] = section
+
+        return self.populate(meta, packet, message)
+
+    def projected(self, name):
+        """True if the field of the packet is projected."""
+        return self.packet_fields is None or name in self.packet_fields
+
+    def typename(self, rrtype):
+        """Name of the resource record type."""
+        return self.qtypes.get(rrtype) or "TYPE%d" % rrtype
+
+    def classname(self, rrclass):
+        """Name of the resource record class."""
+        return self.classes.get(rrclass) or "CLASS%d" % rrclass
+
+    def fetch_name(self, data, offset):
+        """Pair of the domain name and the offset right after the name
+        in the message. The compressed names are expanded.
+
+        data:   A DNS message.
+        offset: An offset of the name in the message."""
+        labels, end, pointers = [], None, 0
+
+        while True:
+            length = data[offset]
+
+            if length & 0xc0 == 0xc0:
+                pointers += 1
+                if pointers > self.max_pointers:
+                    raise ValueError("Too many compression pointers")
+
+                if end is None:
+                    end = offset + 2
+                offset = ((length & 0x3f) << 8) | data[offset + 1]
+                continue
+
+            if length & 0xc0:
+                raise ValueError("Unknown label type: %d" % length)
+
+            offset += 1
+            if not length:
+                break
+
+            label = data[offset:offset + length]
+            if len(label) != length:
+                raise ValueError("Truncated label")
+
+            labels.append(self.escape(label))
+            offset += length
+
+        name = ".".join(labels) + "."
+        return name, offset if end is None else end
+
+    def escape(self, label):
+        """Text of the label, the special and non-printable characters
+        are escaped like in the dig-utility output."""
+        if self.label_dissector.match(label):
+            return label.decode("ascii")
+
+        escaped = []
+        for byte in label:
+            if byte in b".;\\()\"$@":
+                escaped.append("\\" + chr(byte))
+            elif 0x21 <= byte <= 0x7e:
+                escaped.append(chr(byte))
+            else:
+                escaped.append("\\%03d" % byte)
+        return "".join(escaped)
+
+    def render(self, record):
+        """Text of the resource record like in the dig-utility output."""
+        return "%s %d %s %s %s" % (record.name, record.ttl, record.rrclass,
+                                   record.rrtype, record.rdata)
+
+    def fetch_sections(self, data, offset, counts):
+        """List of the answer, authority and additional sections, each
+        section is a list of the resource records.
+
+        data:   A DNS message.
+        offset: An offset of the first resource record.
+        counts: The counts of the resource records in the sections."""
+        sections = []
+
+        for count in counts:
+            records = []
+            for _ in range(count):
+                name, offset = self.fetch_name(data, offset)
+                rrtype, rrclass, ttl, length = self.resource.unpack_from(
+                    data, offset)
+                offset += self.resource.size
+
+                rdata = data[offset:offset + length]
+                if len(rdata) != length:
+                    raise ValueError("Truncated resource record")
+
+                if rrtype != self.opt_type:
+                    records.append(ResourceRecord(
+                        self.interner(name), ttl,
+                        sys.intern(self.classname(rrclass)),
+                        sys.intern(self.typename(rrtype)),
+                        self.interner(self.fetch_rdata(
+                            data, offset, rrtype, rdata))))
+                offset += length
+
+            sections.append(records)
+
+        return sections
+
+    def fetch_rdata(self, data, offset, rrtype, rdata):
+        """Text of the resource record data.
+
+        data:   A DNS message.
+        offset: An offset of the resource record data in the message.
+        rrtype: A type of the resource record.
+        rdata:  A resource record data."""
+        if rrtype == 1 and len(rdata) == 4:
+            return socket.inet_ntop(socket.AF_INET, rdata)
+        if rrtype == 28 and len(rdata) == 16:
+            return socket.inet_ntop(socket.AF_INET6, rdata)
+        if rrtype in (2, 5, 12, 39):
+            return self.fetch_name(data, offset)[0]
+        if rrtype == 15:
+            return "%d %s" % (struct.unpack_from("!H", data, offset)[0],
+                              self.fetch_name(data, offset + 2)[0])
+        if rrtype == 33:
+            priority, weight, port = struct.unpack_from("!HHH", data, offset)
+            return "%d %d %d %s" % (priority, weight, port,
+                                    self.fetch_name(data, offset + 6)[0])
+        if rrtype == 6:
+            mname, position = self.fetch_name(data, offset)
+            rname, position = self.fetch_name(data, position)
+            timers = struct.unpack_from("!IIIII", data, position)
+            return "%s %s %d %d %d %d %d" % ((mname, rname) + timers)
+        if rrtype in (16, 99):
+            strings, position = [], 0
+            while position < len(rdata):
+                length = rdata[position]
+                text = rdata[position + 1:position + 1 + length]
+                strings.append('"%s"' % text.decode("ascii", "replace"))
+                position += 1 + length
+            return " ".join(strings)
+
+        # Unknown types are rendered in the generic format of RFC 3597.
+        return "\\# %d %s" % (len(rdata), rdata.hex().upper())
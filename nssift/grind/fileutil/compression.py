@@ -0,0 +1,254 @@
+import abc
+import bz2
+import gzip
+import lzma
+import re
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.frame
+except ImportError:
+    lz4 = None
+
+
+class Codec(metaclass=abc.ABCMeta):
+    """Define an interface of the compression codec."""
+
+    # Define a name of the codec.
+    name = None
+
+    # Define a leading sequence of bytes of the compressed files.
+    magic = None
+
+    # Define a list of file extensions used by the codec.
+    extensions = ()
+
+    # Define an exception raised on the corrupted data.
+    error = OSError
+
+    def require(self):
+        """Ensure the codec could be used in this environment.
+
+        This method could be overridden in the derived classes."""
+
+    @abc.abstractmethod
+    def open(self, filename):
+        """Binary file object of the decompressed content.
+
+        This method should be overridden in the derived classes.
+
+        filename: A path to the compressed file."""
+
+    @abc.abstractmethod
+    def decompressor(self):
+        """New instance of the incremental decompressor.
+
+        The decompressor should provide the decompress method and
+        the eof and unused_data attributes, like bz2.BZ2Decompressor.
+
+        This method should be overridden in the derived classes."""
+
+    def index(self, filename, blocksize):
+        """List of offsets of the independently compressed streams of
+        the specified file. None, if the file could not be split.
+
+        This method could be overridden in the derived classes.
+
+        filename:  A path to the compressed file.
+        blocksize: A size of the blocks to read from the file."""
+        return None
+
+
+class Bz2Codec(Codec):
+    """BZip2 compression codec."""
+
+    name = "bz2"
+    magic = b"BZh"
+    extensions = ("*.bz2",)
+
+    # A regular expression for the beginning of the bzip2 stream: the
+    # stream header followed by the magic of the first compressed block.
+    #
+    # Parallel compressors (pbzip2, lbzip2) write the archives as a
+    # sequence of the concatenated streams, each stream could be
+    # decompressed independently.
+    stream_dissector = re.compile(rb"BZh[1-9]1AY&SY")
+
+    def open(self, filename):
+        """Open the bzip2 file for reading."""
+        return bz2.open(filename, "rb")
+
+    def decompressor(self):
+        """New instance of the bzip2 decompressor."""
+        return bz2.BZ2Decompressor()
+
+    def index(self, filename, blocksize):
+        """List of offsets of the bzip2 streams in the specified file."""
+        offsets = []
+
+        # The stream header could be split between two blocks, so
+        # keep the tail of the previous block to search in.
+        overlap = len(b"BZh91AY&SY") - 1
+        position, tail = 0, b""
+
+        with open(filename, "rb") as archive:
+            for block in iter(lambda: archive.read(blocksize), b""):
+                data = tail + block
+                base = position - len(tail)
+
+                for match in self.stream_dissector.finditer(data):
+                    offset = base + match.start()
+                    if not offsets or offsets[-1] != offset:
+                        offsets.append(offset)
+
+                position += len(block)
+                tail = data[-overlap:]
+
+        return offsets
+
+
+class GzipCodec(Codec):
+    """GZip compression codec."""
+
+    name = "gzip"
+    magic = b"\x1f\x8b"
+    extensions = ("*.gz",)
+    error = zlib.error
+
+    def open(self, filename):
+        """Open the gzip file for reading."""
+        return gzip.open(filename, "rb")
+
+    def decompressor(self):
+        """New instance of the gzip decompressor."""
+        # Accept only the gzip header and trailer.
+        return zlib.decompressobj(zlib.MAX_WBITS | 16)
+
+
+class XzCodec(Codec):
+    """XZ (LZMA2) compression codec."""
+
+    name = "xz"
+    magic = b"\xfd7zXZ\x00"
+    extensions = ("*.xz",)
+    error = lzma.LZMAError
+
+    def open(self, filename):
+        """Open the xz file for reading."""
+        return lzma.open(filename, "rb")
+
+    def decompressor(self):
+        """New instance of the xz decompressor."""
+        return lzma.LZMADecompressor()
+
+
+class ZstdCodec(Codec):
+    """Zstandard compression codec.
+
+    The codec requires the zstandard package to be installed."""
+
+    name = "zstd"
+    magic = b"\x28\xb5\x2f\xfd"
+    extensions = ("*.zst", "*.zstd")
+    error = getattr(zstandard, "ZstdError", OSError)
+
+    def require(self):
+        """Ensure the zstandard package is installed."""
+        if zstandard is None:
+            raise ImportError("The zstandard package is required "
+                              "to decompress the zstd files.")
+
+    def open(self, filename):
+        """Open the zstd file for reading."""
+        self.require()
+        return zstandard.open(filename, "rb")
+
+    def decompressor(self):
+        """New instance of the zstd decompressor."""
+        self.require()
+        return zstandard.ZstdDecompressor().decompressobj()
+
+
+class Lz4Codec(Codec):
+    """LZ4 frame compression codec.
+
+    The codec requires the lz4 package to be installed."""
+
+    name = "lz4"
+    magic = b"\x04\x22\x4d\x18"
+    extensions = ("*.lz4",)
+    error = RuntimeError
+
+    def require(self):
+        """Ensure the lz4 package is installed."""
+        if lz4 is None:
+            raise ImportError("The lz4 package is required "
+                              "to decompress the lz4 files.")
+
+    def open(self, filename):
+        """Open the lz4 file for reading."""
+        self.require()
+        return lz4.frame.open(filename, "rb")
+
+    def decompressor(self):
+        """New instance of the lz4 decompressor."""
+        self.require()
+        return lz4.frame.LZ4FrameDecompressor()
+
+
+class PlainDecompressor:
+    """Decompressor of the uncompressed data."""
+
+    eof = False
+    unused_data = b""
+
+    def decompress(self, data):
+        """Return the data as is."""
+        return data
+
+
+class PlainCodec(Codec):
+    """Codec of the uncompressed files."""
+
+    name = "plain"
+    extensions = ("*.pres", "*.txt")
+
+    def open(self, filename):
+        """Open the plain file for reading."""
+        return open(filename, "rb")
+
+    def decompressor(self):
+        """New instance of the pass-through decompressor."""
+        return PlainDecompressor()
+
+
+# Define a list of the codecs to detect by the magic bytes.
+CODECS = [Bz2Codec(), GzipCodec(), XzCodec(), ZstdCodec(), Lz4Codec()]
+
+# Define a codec used for the files without a known magic.
+PLAIN = PlainCodec()
+
+
+def extensions():
+    """List of file extensions of all known codecs."""
+    return [ext for c in CODECS + [PLAIN] for ext in c.extensions]
+
+
+def detect(filename):
+    """Codec of the specified file picked by the leading bytes.
+
+    filename: A path to the file."""
+    with open(filename, "rb") as textfile:
+        magic = textfile.read(max(len(c.magic) for c in CODECS))
+
+    for codec in CODECS:
+        if magic.startswith(codec.magic):
+            codec.require()
+            return codec
+
+    return PLAIN
@@ -0,0 +1,176 @@
+import datetime
+import json
+import logging
+import os
+import re
+
+from nssift.grind.fileutil import compression
+from nssift.grind.fileutil.loader import Loader
+from nssift.grind.fileutil.splitter import Splitter
+
+
+LOG = logging.getLogger(__name__)
+
+
+class Index:
+    """Define a sidecar index of the archive.
+
+    Index keeps the offsets of the compressed streams of the archive
+    with the count of the records in each stream, and the summary of
+    the archive, so the archive could be planned and filtered without
+    decompressing it again."""
+
+    # Define a version of the index format.
+    version = 1
+
+    # Define an extension of the sidecar index files.
+    extension = ".nsidx"
+
+    # A regular expression for the time stamp of the record, the time
+    # stamp is expected to be a count of seconds since the epoch.
+    timestamp_dissector = re.compile(rb"timestamp:[ \t]*(\d+(?:\.\d*)?)")
+
+    def __init__(self, filename, size, mtime, streams, timerange=None):
+        """Create a new instance of the archive index.
+
+        filename:  A path to the indexed archive.
+        size:      A size of the archive in bytes.
+        mtime:     A modification time of the archive.
+        streams:   A list of pairs of the stream offset and the count of
+                   the records in that stream.
+        timerange: A pair of datetime of the first and the last record,
+                   None, when the time stamps are unknown."""
+        super().__init__()
+        self.filename = filename
+        self.size = size
+        self.mtime = mtime
+        self.streams = streams
+        self.timerange = timerange
+
+    @property
+    def records(self):
+        """Count of the records in the archive."""
+        return sum(records for _, records in self.streams)
+
+    @property
+    def offsets(self):
+        """List of offsets of the compressed streams."""
+        return [offset for offset, _ in self.streams]
+
+    @classmethod
+    def sidecar(cls, filename):
+        """Path to the sidecar index of the archive.
+
+        filename: A path to the archive."""
+        return filename + cls.extension
+
+    @classmethod
+    def build(cls, filename, symbol):
+        """Scan the archive and create the index of it.
+
+        filename: A path to the archive.
+        symbol:   A symbol used to split the chunks."""
+        stat = os.stat(filename)
+        loader = Loader(filename, codec=compression.detect(filename))
+        splitter = Splitter(symbol)
+
+        streams, first, last = [], None, None
+
+        # The separator line could cross the boundary of the blocks,
+        # therefore only complete lines are searched. The preceding
+        # newline is kept, since it is a part of the separator pattern.
+        tail, content = b"\n", False
+
+        with open(filename, "rb") as archive:
+            for offset, data in loader.idecompress(archive):
+                if not streams or streams[-1][0] != offset:
+                    streams.append([offset, 0])
+
+                buffer = tail + data
+                end = buffer.rfind(b"\n") + 1
+
+                start = 0
+                for match in splitter.separator_dissector.finditer(
+                        buffer, 0, end):
+                    streams[-1][1] += 1
+                    start = match.end()
+
+                # Track the data after the last separator to count
+                # the trailing record without the separator.
+                if start:
+                    content = bool(buffer[start:].strip())
+                else:
+                    content = content or bool(data.strip())
+
+                # Only the range of the time stamps is kept, so the
+                # memory does not grow with the count of the records.
+                timestamps = list(map(float, (
+                    cls.timestamp_dissector.findall(buffer, 0, end))))
+                if timestamps:
+                    low, high = min(timestamps), max(timestamps)
+                    first = low if first is None else min(first, low)
+                    last = high if last is None else max(last, high)
+
+                tail = buffer[end - 1:]
+
+        # The trailing record is attributed to the last stream.
+        if content:
+            streams[-1][1] += 1
+
+        timerange = None
+        if first is not None:
+            timerange = tuple(map(cls.fromtimestamp, (first, last)))
+
+        return cls(filename, stat.st_size, stat.st_mtime,
+                   streams or [[0, 0]], timerange)
+
+    @staticmethod
+    def fromtimestamp(timestamp):
+        """Naive UTC datetime of the time stamp."""
+        dt = datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc)
+        return dt.replace(tzinfo=None)
+
+    def dump(self):
+        """Write the index into the sidecar file."""
+        timerange = None
+        if self.timerange:
+            timerange = [dt.isoformat() for dt in self.timerange]
+
+        index = {"version": self.version,
+                 "size": self.size,
+                 "mtime": self.mtime,
+                 "records": self.records,
+                 "timerange": timerange,
+                 "streams": self.streams}
+
+        with open(self.sidecar(self.filename), "w") as textfile:
+            json.dump(index, textfile, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, filename):
+        """Read the sidecar index of the archive. Return None, if the
+        index does not exist or it is outdated.
+
+        filename: A path to the archive."""
+        try:
+            with open(cls.sidecar(filename)) as textfile:
+                index = json.load(textfile)
+            stat = os.stat(filename)
+        except (OSError, ValueError):
+            return None
+
+        # The archive was modified after the indexing.
+        if (index.get("version") != cls.version or
+                index.get("size") != stat.st_size or
+                index.get("mtime") != stat.st_mtime):
+            LOG.debug("Ignoring the outdated index of the archive: "
+                      "'%(filename)s'" % {"filename": filename})
+            return None
+
+        timerange = index.get("timerange")
+        if timerange:
+            timerange = tuple(map(
+                datetime.datetime.fromisoformat, timerange))
+
+        return cls(filename, index["size"], index["mtime"],
+                   index["streams"], timerange)
@@ -0,0 +1,351 @@
+import collections
+import functools
+import glob
+import itertools
+import logging
+import os
+
+from nssift.grind.fileutil import compression
+from nssift.grind.fileutil.pcap import PcapReader
+from nssift.grind.fileutil.prefetch import Prefetcher
+from nssift.grind.fileutil.splitter import Splitter
+
+
+LOG = logging.getLogger(__name__)
+
+
+# Define a byte range of the archive, that could be processed
+# independently from the other ranges of the same archive.
+Split = collections.namedtuple("Split", ("filename", "start", "end"))
+
+
+class Loader:
+    """Compressed archives loader.
+
+    The compression codec is picked by the leading bytes of the
+    file, so the archives compressed by different codecs could be
+    processed together. The archives of the network captures are
+    recognized by the leading bytes of the decompressed content."""
+
+    # Define a list of file extensions that we should search
+    # for in the provided directory.
+    file_extensions = compression.extensions() + list(PcapReader.extensions)
+
+    # Define a codec of the archives, None means the codec is
+    # detected for each file.
+    codec = None
+
+    # Define an encoding of the text stored in the archives.
+    encoding = "utf-8"
+
+    # Define a size of the blocks read from the compressed file.
+    blocksize = 1024 * 1024
+
+    # Define a count of the blocks decompressed ahead in the background,
+    # zero means the blocks are decompressed on demand.
+    prefetch = 4
+
+    def __init__(self, filename, maxsize=None, start=0, end=None,
+                 codec=None, prefetch=None):
+        """Create a new instance of the archive loader.
+
+        filename: A path to the file to read.
+        maxsize:  An upper bound of the chunk size in bytes, chunks
+                  exceeding this bound are dropped. None means
+                  unbounded chunks.
+        start:    An offset of the compressed stream to start reading.
+        end:      An offset of the compressed stream, where the next
+                  split starts. None means the end of the file.
+        codec:    A compression codec of the file.
+        prefetch: A count of the blocks decompressed ahead."""
+        super().__init__()
+        self.filename = filename
+        self.maxsize = maxsize
+        self.start = start
+        self.end = end
+
+        if codec is not None:
+            self.codec = codec
+        if prefetch is not None:
+            self.prefetch = prefetch
+
+    @classmethod
+    def isearch(cls, path):
+        """Search the archives in the specified directory. Return
+        a generator of the file names.
+
+        path: A path to search for archives."""
+        patterns = [os.path.join(path, ext) for ext in cls.file_extensions]
+        return itertools.chain(*map(glob.iglob, patterns))
+
+    @classmethod
+    def index(cls, filename):
+        """List of offsets of the compressed streams in the specified
+        file. None, if the file could not be split.
+
+        filename: A path to the archive."""
+        codec = cls.codec or compression.detect(filename)
+        return codec.index(filename, cls.blocksize)
+
+    @classmethod
+    def isplits(cls, filename, splitsize, offsets=None):
+        """List of the splits of the specified archive. Each split
+        covers one or more compressed streams of the total size of
+        at least splitsize bytes.
+
+        Without the known offsets of the streams only the multi-stream
+        bzip2 archives could be split, the other archives are processed
+        as a single split.
+
+        filename:  A path to the archive.
+        splitsize: A minimum size of the split in bytes.
+        offsets:   A list of offsets of the compressed streams, when
+                   omitted, the archive is scanned for the streams."""
+        # There is no need to scan the small archives. The captures
+        # could not be split, since the packets are not aligned to the
+        # compressed streams.
+        if os.path.getsize(filename) <= splitsize:
+            return [Split(filename, 0, None)]
+        if cls(filename).iscapture():
+            return [Split(filename, 0, None)]
+
+        if offsets is None:
+            offsets = cls.index(filename) or [0]
+
+        splits, start = [], 0
+
+        for offset in offsets[1:]:
+            if offset - start >= splitsize:
+                splits.append(Split(filename, start, offset))
+                start = offset
+
+        splits.append(Split(filename, start, None))
+        return splits
+
+    def isplit(self, textfile, symbol):
+        """Split the specified file into the chunks splitted
+        by the specified split string."""
+        chunklines = []
+        chunksize = 0
+
+        # The implementation is pretty dumb, but we cross the
+        # fingers it will work faster then using the regular
+        # expressions.
+        for line in textfile:
+            line = line.strip()
+
+            # Skip the empty lines from processing.
+            if not line:
+                continue
+
+            if line == symbol:
+                # Return the chunk of the file, that is splitted by
+                # the specified string. The oversized chunks are
+                # already emptied, so there is nothing to return.
+                if chunksize is not None:
+                    yield "\n".join(chunklines)
+
+                # Clear the chunk array and continue
+                # processing the file.
+                chunklines = []
+                chunksize = 0
+                continue
+
+            # The chunk is already known to be oversized, so skip
+            # the lines until the next separator.
+            if chunksize is None:
+                continue
+
+            chunksize += len(line) + 1
+
+            # Drop the lines collected so far, when the chunk crosses
+            # the bound, so the memory usage stays limited even for
+            # the corrupted archives without separators.
+            if self.maxsize is not None and chunksize > self.maxsize:
+                LOG.warning("Dropping the chunk of the %(filename)s "
+                            "exceeding %(maxsize)d bytes." %
+                            {"filename": self.filename,
+                             "maxsize": self.maxsize})
+                chunklines = []
+                chunksize = None
+                continue
+
+            # Seems like it is working a bit faster than an
+            # append call.
+            chunklines.extend((line,))
+
+        if chunklines:
+            yield "\n".join(chunklines)
+
+    def idecompress(self, archive):
+        """Generator of the pairs of the stream offset and a piece
+        of the data decompressed from that stream.
+
+        archive: A binary file object of the compressed file."""
+        offset = self.start
+        archive.seek(offset)
+
+        decompressor = self.codec.decompressor()
+        position = offset
+
+        for block in iter(lambda: archive.read(self.blocksize), b""):
+            position += len(block)
+
+            while block:
+                try:
+                    data = decompressor.decompress(block)
+                except self.codec.error as error:
+                    # The garbage after the last stream, there is
+                    # nothing more to decompress.
+                    LOG.warning("Failed to decompress the %(filename)s "
+                                "at %(offset)d: %(error)s" %
+                                {"filename": self.filename,
+                                 "offset": offset, "error": error})
+                    return
+
+                if data:
+                    yield offset, data
+
+                if not decompressor.eof:
+                    break
+
+                # The stream is over, so the remaining data is the
+                # beginning of the next stream.
+                block = decompressor.unused_data
+                offset = position - len(block)
+                decompressor = self.codec.decompressor()
+
+    def iblocks(self, pieces, splitter):
+        """Generator of the decompressed blocks of the archive split.
+
+        The split owns the chunks, that start after the first separator
+        line beginning after the start offset, and up to the first
+        separator line beginning after the end offset. So the adjacent
+        splits resynchronize on the same separator line, and no chunk is
+        lost or duplicated.
+
+        pieces:   An iterable of pairs of the stream offset and the
+                  data decompressed from that stream.
+        splitter: A splitter used to search the separator lines."""
+        buffer = b""
+
+        # Define an absolute position of the buffer in the decompressed
+        # data, the position of the data decompressed from the stream at
+        # the end offset, and the position of the first line beginning
+        # after the end offset.
+        base, boundary, limit = 0, None, None
+
+        # The first line of the split could be a tail of the line
+        # started in the previous split, so we could not rely on it.
+        skipping = self.start > 0
+
+        for offset, data in pieces:
+            if boundary is None and self.end is not None:
+                if offset >= self.end:
+                    boundary = base + len(buffer)
+
+            buffer = buffer + data if buffer else data
+
+            if boundary is not None and limit is None:
+                newline = buffer.find(b"\n", boundary - base)
+                if newline != -1:
+                    limit = base + newline + 1
+
+            if skipping:
+                # Start the processing right after the separator line
+                # only if it belongs to this split.
+                newline = buffer.find(b"\n")
+                if newline == -1:
+                    continue
+
+                found = splitter.find(buffer, newline + 1)
+                if found is None:
+                    continue
+
+                linestart, lineend = found
+                if limit is not None and base + linestart >= limit:
+                    return
+
+                base, buffer = base + lineend, buffer[lineend:]
+                skipping = False
+
+            # Keep the data after the end offset, until its first
+            # line is complete.
+            if limit is None:
+                keep = len(buffer) if boundary is None else boundary - base
+            else:
+                found = splitter.find(buffer, max(limit - base, 0))
+                if found is not None:
+                    yield buffer[:found[1]]
+                    return
+
+                # The last line could be the beginning of the separator.
+                keep = max(buffer.rfind(b"\n") + 1, limit - base)
+
+            if keep:
+                yield buffer[:keep]
+                base, buffer = base + keep, buffer[keep:]
+
+        if buffer and not skipping:
+            yield buffer
+
+    def iscapture(self):
+        """True if the archive contains the network capture."""
+        if self.codec is None:
+            self.codec = compression.detect(self.filename)
+
+        try:
+            with self.codec.open(self.filename) as archive:
+                return PcapReader.iscapture(archive.read(4))
+        except (OSError, EOFError, self.codec.error):
+            return False
+
+    def icapture(self):
+        """Generator of the DNS messages of the network capture.
+
+        The capture is decompressed lazily, so only a single packet
+        is kept in memory at once."""
+        if self.codec is None:
+            self.codec = compression.detect(self.filename)
+
+        with self.codec.open(self.filename) as archive:
+            yield from PcapReader(archive).imessages()
+
+    def load(self, symbol):
+        """List of the stripped chunks from the archive divided
+        by the specified string.
+
+        The whole archive is kept in memory, use iload method
+        to process the large archives.
+
+        symbol: A symbol to split the chunks."""
+        return list(self.iload(symbol))
+
+    def iload(self, symbol):
+        """Generator of the stripped chunks from the archive
+        divided by the specified string.
+
+        The archive is decompressed lazily, so at most a single
+        chunk is kept in memory at once.
+
+        symbol: A symbol to split the chunks."""
+        if self.codec is None:
+            self.codec = compression.detect(self.filename)
+
+        splitter = Splitter(symbol, self.maxsize, self.encoding)
+
+        # The whole archive is read, so there is no need to track
+        # the boundaries of the compressed streams.
+        if not self.start and self.end is None:
+            with self.codec.open(self.filename) as archive:
+                read = functools.partial(archive.read, self.blocksize)
+
+                with Prefetcher(iter(read, b""), self.prefetch) as blocks:
+                    yield from splitter.isplit(blocks)
+            return
+
+        with open(self.filename, "rb") as archive:
+            pieces = self.idecompress(archive)
+
+            with Prefetcher(pieces, self.prefetch) as pieces:
+                yield from splitter.isplit(self.iblocks(pieces, splitter))
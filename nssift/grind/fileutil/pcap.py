@@ -0,0 +1,317 @@
+import collections
+import logging
+import socket
+import struct
+
+
+LOG = logging.getLogger(__name__)
+
+
+# Define a DNS message captured from the network, the addresses and
+# ports are of the sender and the receiver of the message.
+Message = collections.namedtuple("Message", (
+    "timestamp", "transport", "src", "sport", "dst", "dport", "data"))
+
+
+class PcapReader:
+    """Define a reader of the network captures.
+
+    Reader supports the classic pcap files with the microsecond and
+    nanosecond time stamps of both byte orders and the pcapng files.
+    The link-layer frames are decoded down to the UDP and TCP payloads
+    of the DNS messages. The fragmented IP packets are skipped and the
+    TCP streams are not reassembled, so only the DNS messages that fit
+    into a single TCP segment are decoded."""
+
+    # Define a list of file extensions of the uncompressed captures.
+    extensions = ("*.pcap", "*.pcapng", "*.cap")
+
+    # Define the magic numbers of the pcap files with the byte order
+    # and the count of the time stamp fractions per second.
+    pcap_magics = {
+        b"\xd4\xc3\xb2\xa1": ("<", 10 ** 6),
+        b"\xa1\xb2\xc3\xd4": (">", 10 ** 6),
+        b"\x4d\x3c\xb2\xa1": ("<", 10 ** 9),
+        b"\xa1\xb2\x3c\x4d": (">", 10 ** 9),
+    }
+
+    # Define a type of the section header block of the pcapng files.
+    pcapng_magic = b"\x0a\x0d\x0d\x0a"
+
+    # Define a default list of the ports of the DNS servers.
+    ports = (53,)
+
+    # Define the ether types of the IP packets and the VLAN tags.
+    ethertype_ipv4 = 0x0800
+    ethertype_ipv6 = 0x86dd
+    ethertype_vlans = (0x8100, 0x88a8, 0x9100)
+
+    # Define the IPv6 extension headers preceding the transport header.
+    ipv6_extensions = (0, 43, 60)
+
+    def __init__(self, fileobj, ports=None):
+        """Create a new instance of the capture reader.
+
+        fileobj: A binary file object of the capture.
+        ports:   A list of the ports of the DNS servers."""
+        super().__init__()
+        self.fileobj = fileobj
+        if ports is not None:
+            self.ports = ports
+
+        # Define the decoders of the link-layer frames by the link type.
+        self.linktypes = {0: self.decode_null,
+                          1: self.decode_ethernet,
+                          101: self.decode_raw,
+                          113: self.decode_sll,
+                          228: self.decode_raw,
+                          229: self.decode_raw,
+                          276: self.decode_sll2}
+
+    @classmethod
+    def iscapture(cls, magic):
+        """True if the leading bytes belong to the network capture.
+
+        magic: A leading bytes of the file."""
+        magic = magic[:4]
+        return magic in cls.pcap_magics or magic == cls.pcapng_magic
+
+    def read(self, size):
+        """Read exactly the size of bytes from the capture. Return None,
+        if the capture is truncated."""
+        data = self.fileobj.read(size)
+        if len(data) != size:
+            return None
+        return data
+
+    def iframes(self):
+        """Generator of the tuples of the time stamp, the link type and
+        the captured link-layer frame."""
+        magic = self.read(4)
+        if magic is None:
+            return
+
+        if magic == self.pcapng_magic:
+            yield from self.iframes_pcapng(magic)
+        elif magic in self.pcap_magics:
+            yield from self.iframes_pcap(magic)
+        else:
+            LOG.warning("Unknown format of the capture: %(magic)r" %
+                        {"magic": magic})
+
+    def iframes_pcap(self, magic):
+        """Generator of the frames of the classic pcap file."""
+        order, resolution = self.pcap_magics[magic]
+
+        header = self.read(20)
+        if header is None:
+            return
+
+        linktype = struct.unpack(order + "I", header[16:])[0] & 0xffff
+        record = struct.Struct(order + "IIII")
+
+        while True:
+            header = self.read(record.size)
+            if header is None:
+                return
+
+            seconds, fraction, length, _ = record.unpack(header)
+            frame = self.read(length)
+            if frame is None:
+                return
+
+            yield seconds + fraction / resolution, linktype, frame
+
+    def iframes_pcapng(self, magic):
+        """Generator of the frames of the pcapng file."""
+        order, interfaces = "<", []
+
+        while magic is not None:
+            # The byte order is defined by the section header block,
+            # so the length is decoded after the byte order magic.
+            if magic == self.pcapng_magic:
+                header = self.read(8)
+                if header is None:
+                    return
+
+                order = "<" if header[4:] == b"\x4d\x3c\x2b\x1a" else ">"
+                interfaces, prefix = [], header[4:]
+            else:
+                header, prefix = self.read(4), b""
+                if header is None:
+                    return
+
+            blocktype = struct.unpack(order + "I", magic)[0]
+            length = struct.unpack(order + "I", header[:4])[0]
+
+            # The block length includes the type, the length and the
+            # trailing copy of the length.
+            if length < 12 + len(prefix):
+                return
+
+            rest = self.read(length - 8 - len(prefix))
+            if rest is None:
+                return
+
+            body = prefix + rest[:-4]
+
+            if blocktype == 1:
+                interfaces.append(self.interface(order, body))
+            elif blocktype == 6 and len(body) >= 20:
+                iface, high, low, caplen, _ = struct.unpack(
+                    order + "IIIII", body[:20])
+                if iface < len(interfaces):
+                    linktype, resolution = interfaces[iface]
+                    timestamp = ((high << 32) | low) / resolution
+                    yield timestamp, linktype, body[20:20 + caplen]
+            elif blocktype == 3 and len(body) >= 4 and interfaces:
+                linktype, _ = interfaces[0]
+                length = struct.unpack(order + "I", body[:4])[0]
+                yield None, linktype, body[4:4 + length]
+
+            magic = self.read(4)
+
+    def interface(self, order, body):
+        """Pair of the link type and the count of the time stamp
+        fractions per second of the interface description block."""
+        resolution = 10 ** 6
+
+        # The broken interface is kept, so the packets of the other
+        # interfaces are still attributed correctly.
+        if len(body) < 8:
+            return None, resolution
+
+        linktype = struct.unpack(order + "H", body[:2])[0]
+
+        # Search for the time stamp resolution option.
+        offset = 8
+        while offset + 4 <= len(body):
+            code, length = struct.unpack(order + "HH", body[offset:offset + 4])
+            if code == 0:
+                break
+
+            if code == 9 and length >= 1 and offset + 4 < len(body):
+                value = body[offset + 4]
+                if value & 0x80:
+                    resolution = 2 ** (value & 0x7f)
+                else:
+                    resolution = 10 ** value
+
+            # The options are padded to 32 bits.
+            offset += 4 + (length + 3) // 4 * 4
+
+        return linktype, resolution
+
+    def decode_raw(self, frame):
+        """IP packet of the raw IP frame."""
+        return frame
+
+    def decode_null(self, frame):
+        """IP packet of the BSD loopback frame."""
+        return frame[4:]
+
+    def decode_ethernet(self, frame):
+        """IP packet of the Ethernet frame."""
+        ethertype, offset = struct.unpack("!H", frame[12:14])[0], 14
+
+        while ethertype in self.ethertype_vlans:
+            ethertype = struct.unpack("!H", frame[offset + 2:offset + 4])[0]
+            offset += 4
+
+        if ethertype not in (self.ethertype_ipv4, self.ethertype_ipv6):
+            return None
+        return frame[offset:]
+
+    def decode_sll(self, frame):
+        """IP packet of the Linux cooked capture frame."""
+        return frame[16:]
+
+    def decode_sll2(self, frame):
+        """IP packet of the Linux cooked capture frame of version 2."""
+        return frame[20:]
+
+    def decode_ip(self, packet):
+        """Tuple of the protocol number, the source address, the
+        destination address and the payload of the IP packet."""
+        if not packet:
+            return None
+
+        version = packet[0] >> 4
+
+        if version == 4:
+            headerlen = (packet[0] & 0x0f) * 4
+            total, fragment = struct.unpack("!H2xH", packet[2:8])
+
+            # The fragmented packets could not be decoded.
+            if fragment & 0x3fff:
+                return None
+
+            return (packet[9],
+                    socket.inet_ntop(socket.AF_INET, packet[12:16]),
+                    socket.inet_ntop(socket.AF_INET, packet[16:20]),
+                    packet[headerlen:total or None])
+
+        if version == 6:
+            length, protocol = struct.unpack("!HB", packet[4:7])
+            payload = packet[40:40 + length]
+
+            while protocol in self.ipv6_extensions and len(payload) >= 2:
+                protocol, payload = payload[0], payload[(payload[1] + 1) * 8:]
+
+            return (protocol,
+                    socket.inet_ntop(socket.AF_INET6, packet[8:24]),
+                    socket.inet_ntop(socket.AF_INET6, packet[24:40]),
+                    payload)
+
+        return None
+
+    def decode_transport(self, protocol, segment):
+        """Tuple of the transport name, the source port, the destination
+        port and the list of the DNS messages of the segment."""
+        if protocol == 17 and len(segment) >= 8:
+            sport, dport = struct.unpack("!HH", segment[:4])
+            return "UDP", sport, dport, [segment[8:]]
+
+        if protocol == 6 and len(segment) >= 20:
+            sport, dport = struct.unpack("!HH", segment[:4])
+            payload = segment[(segment[12] >> 4) * 4:]
+
+            # The messages are prefixed with the two-byte length, only
+            # the complete messages are decoded.
+            messages, offset = [], 0
+            while offset + 2 <= len(payload):
+                length = struct.unpack("!H", payload[offset:offset + 2])[0]
+                if not length or offset + 2 + length > len(payload):
+                    break
+
+                messages.append(payload[offset + 2:offset + 2 + length])
+                offset += 2 + length
+
+            return "TCP", sport, dport, messages
+
+        return None
+
+    def imessages(self):
+        """Generator of the DNS messages of the capture."""
+        for timestamp, linktype, frame in self.iframes():
+            decode = self.linktypes.get(linktype)
+            if decode is None:
+                continue
+
+            try:
+                packet = decode(frame)
+                ip = packet and self.decode_ip(packet)
+                segment = ip and self.decode_transport(ip[0], ip[3])
+            except (struct.error, IndexError, ValueError):
+                continue
+
+            if not segment:
+                continue
+
+            transport, sport, dport, messages = segment
+            if sport not in self.ports and dport not in self.ports:
+                continue
+
+            for data in messages:
+                yield Message(timestamp, transport,
+                              ip[1], sport, ip[2], dport, data)
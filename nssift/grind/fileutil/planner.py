@@ -0,0 +1,147 @@
+import datetime
+import fnmatch
+import heapq
+import logging
+import os
+import re
+
+from nssift.grind.fileutil.index import Index
+from nssift.grind.fileutil.loader import Loader
+
+
+LOG = logging.getLogger(__name__)
+
+
+def parsetime(string):
+    """Parse the time stamp in the format of the DNS dump file names,
+    either with or without the time part: 20160126_0705, 20160126.
+
+    string: A time stamp to parse."""
+    for timefmt in ("%Y%m%d_%H%M", "%Y%m%d"):
+        try:
+            return datetime.datetime.strptime(string, timefmt)
+        except ValueError:
+            continue
+
+    raise ValueError("Invalid time stamp: '%(string)s'" % {"string": string})
+
+
+class Planner:
+    """Define a planner of the archives processing.
+
+    Planner discovers the archives in the directory tree and
+    distributes them into the partitions of the equal size."""
+
+    # A regular expression for the time stamp in the file names,
+    # like DNS3-20160126_0705-P0001231.pres.bz2
+    timestamp_dissector = re.compile(r"(\d{8}_\d{4})")
+
+    def __init__(self, include=None, exclude=None, since=None, until=None):
+        """Create a new instance of the planner.
+
+        include: A list of file name patterns to process. By default
+                 the archives of all known codecs are processed.
+        exclude: A list of file name patterns to skip.
+        since:   A datetime of the first archive to process.
+        until:   A datetime of the first archive to skip."""
+        super().__init__()
+        self.include = include or Loader.file_extensions
+        self.exclude = exclude or []
+        self.since = since
+        self.until = until
+
+    def timestamp(self, filename):
+        """Time stamp of the archive parsed from the file name. None,
+        if the file name does not contain a time stamp.
+
+        filename: A path to the archive."""
+        match = self.timestamp_dissector.search(os.path.basename(filename))
+        if not match:
+            return None
+
+        try:
+            return parsetime(match.group(1))
+        except ValueError:
+            return None
+
+    def match(self, filename):
+        """True if the archive should be processed and False otherwise.
+
+        filename: A path to the archive."""
+        basename = os.path.basename(filename)
+
+        def _match_impl(patterns):
+            return any(fnmatch.fnmatch(basename, p) for p in patterns)
+
+        if not _match_impl(self.include) or _match_impl(self.exclude):
+            return False
+
+        if self.since is None and self.until is None:
+            return True
+
+        # Prefer the time range of the records from the sidecar index
+        # of the archive, otherwise rely on the time stamp in the name.
+        index = Index.load(filename)
+        if index and index.timerange:
+            first, last = index.timerange
+        else:
+            first = last = self.timestamp(filename)
+
+        # The archives without time stamp could not be filtered, so
+        # they are processed regardless of the time range.
+        if first is None:
+            LOG.debug("Failed to fetch the time stamp from the file "
+                      "name: '%(filename)s'" % {"filename": filename})
+            return True
+
+        if self.since is not None and last < self.since:
+            return False
+        if self.until is not None and first >= self.until:
+            return False
+        return True
+
+    def isearch(self, path):
+        """Recursively search the archives in the specified directory.
+        Return a generator of the file names.
+
+        path: A path to search for archives."""
+        for dirpath, dirnames, filenames in os.walk(path):
+            # Walk the date-partitioned directories in order.
+            dirnames.sort()
+
+            for filename in sorted(filenames):
+                filename = os.path.join(dirpath, filename)
+                if self.match(filename):
+                    yield filename
+
+    def weight(self, split):
+        """Size of the split in bytes.
+
+        split: A split of the archive."""
+        end = split.end
+        if end is None:
+            end = os.path.getsize(split.filename)
+        return end - split.start
+
+    def pack(self, splits, partitions):
+        """Distribute the splits into the specified count of the
+        partitions, so the total size of the splits in each partition
+        is nearly the same.
+
+        The largest splits are placed first, each into the least
+        loaded partition. Return a list of non-empty partitions.
+
+        splits:     A list of archive splits.
+        partitions: A count of the partitions."""
+        weighted = sorted(((self.weight(s), s) for s in splits),
+                          key=lambda ws: ws[0], reverse=True)
+
+        bins = [[] for _ in range(max(partitions, 1))]
+        loads = [(0, index) for index in range(len(bins))]
+
+        for weight, split in weighted:
+            load, index = heapq.heappop(loads)
+            bins[index].append(split)
+            heapq.heappush(loads, (load + weight, index))
+
+        return [b for b in bins if b]
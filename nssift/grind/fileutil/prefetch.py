@@ -0,0 +1,86 @@
+import queue
+import threading
+
+
+class Prefetcher:
+    """Define an iterator, that produces the items of the wrapped
+    iterable in the background thread.
+
+    The decompression of the archives releases the GIL, so the next
+    blocks of the data are decompressed while the current ones are
+    dissected. The count of the prefetched items is bounded, so the
+    memory usage stays flat."""
+
+    # Define a timeout in seconds to check if the consumer has gone.
+    timeout = 0.1
+
+    def __init__(self, iterable, depth):
+        """Create a new instance of the prefetcher.
+
+        iterable: An iterable to read in the background.
+        depth:    A maximum count of the prefetched items, zero means
+                  the iterable is read on demand."""
+        super().__init__()
+        self.iterable = iterable
+        self.queue = queue.Queue(maxsize=depth)
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.produce, daemon=True)
+
+    def put(self, item):
+        """Put the item into the queue. Return False if the consumer
+        has stopped the iteration."""
+        while not self.stopped.is_set():
+            try:
+                self.queue.put(item, timeout=self.timeout)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce(self):
+        """Read the wrapped iterable and put the items into the queue.
+        The exception raised by the iterable is passed to the consumer."""
+        try:
+            for item in self.iterable:
+                if not self.put((True, item)):
+                    return
+        except Exception as error:
+            self.put((False, error))
+            return
+
+        # Notify the consumer, that there are no more items.
+        self.put((False, None))
+
+    def close(self):
+        """Stop the background thread."""
+        self.stopped.set()
+        if self.thread.is_alive():
+            self.thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __iter__(self):
+        """Generator of the items produced in the background."""
+        if not self.queue.maxsize:
+            yield from self.iterable
+            return
+
+        self.thread.start()
+
+        try:
+            while True:
+                ok, item = self.queue.get()
+                if ok:
+                    yield item
+                elif item is None:
+                    return
+                else:
+                    raise item
+        finally:
+            # The consumer could stop the iteration before the end
+            # of the data, so release the background thread.
+            self.close()
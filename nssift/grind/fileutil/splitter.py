@@ -0,0 +1,137 @@
+import itertools
+import logging
+import re
+
+
+LOG = logging.getLogger(__name__)
+
+
+class Splitter:
+    """Define a splitter of the decompressed data into the chunks.
+
+    Splitter searches the separator lines directly in the large blocks
+    of bytes, so the data is decoded only once for each chunk instead of
+    being iterated, stripped and joined line by line."""
+
+    # Define the whitespace characters allowed around the separator.
+    whitespace = rb"[ \t\r\f\v]*"
+
+    def __init__(self, symbol, maxsize=None, encoding="utf-8"):
+        """Create a new instance of the splitter.
+
+        symbol:   A symbol to split the chunks.
+        maxsize:  An upper bound of the raw chunk size in bytes, chunks
+                  exceeding this bound are dropped. None means
+                  unbounded chunks.
+        encoding: An encoding of the text."""
+        super().__init__()
+        self.maxsize = maxsize
+        self.encoding = encoding
+        self.symbol = symbol.encode(encoding)
+
+        # The separator line is searched together with the preceding
+        # newline character, so the search is fast-forwarded to the
+        # newline characters. The trailing newline character should be
+        # present, otherwise the line could be continued in the next
+        # block of the data.
+        separator = (self.whitespace + re.escape(self.symbol) +
+                     self.whitespace + rb"(?=\n)")
+
+        self.separator_dissector = re.compile(rb"\n" + separator)
+        self.leading_dissector = re.compile(separator)
+
+    def find(self, buffer, start):
+        """Boundaries of the first separator line starting at or after
+        the start position. Return a tuple of the position where the
+        separator line starts and the position right after its newline
+        character, or None if the separator is not found.
+
+        buffer: A bytes-like object to search in.
+        start:  A position in the buffer to start search from. The
+                position is expected to be the beginning of the line."""
+        if not start:
+            match = self.leading_dissector.match(buffer)
+            if match:
+                return 0, match.end() + 1
+
+        match = self.separator_dissector.search(buffer, max(start - 1, 0))
+        if not match:
+            return None
+
+        return match.start() + 1, match.end() + 1
+
+    def decode(self, buffer, start, end):
+        """Decode the chunk of the buffer. The lines of the chunk are
+        stripped and the empty lines are omitted.
+
+        buffer: A bytes-like object with the chunk.
+        start:  A position of the chunk in the buffer.
+        end:    A position right after the end of the chunk."""
+        # Slicing of the memory view does not copy the data.
+        text = str(memoryview(buffer)[start:end], self.encoding, "replace")
+
+        lines = map(str.strip, text.split("\n"))
+        return "\n".join(filter(None, lines))
+
+    def isplit(self, blocks):
+        """Split the blocks of the decompressed data into the chunks
+        divided by the separator lines. Return a generator of the
+        chunks.
+
+        blocks: An iterable of bytes objects."""
+        # The leading newline makes the beginning of the data to be
+        # searched as any other line. The trailing newline completes
+        # the separator line at the end of the data.
+        blocks = itertools.chain((b"\n",), blocks, (b"\n",))
+
+        buffer = b""
+        overflow = False
+
+        for block in blocks:
+            buffer = buffer + block if buffer else block
+            start = 0
+
+            # Only the data up to the last newline could be divided,
+            # since the last line could be continued in the next block.
+            end = buffer.rfind(b"\n") + 1
+            matches = self.separator_dissector.finditer(buffer, 0, end)
+
+            for match in matches:
+                # The chunk is already known to be oversized.
+                if overflow:
+                    overflow = False
+                elif (self.maxsize is not None and
+                      match.start() - start > self.maxsize):
+                    self.warn()
+                else:
+                    yield self.decode(buffer, start, match.start())
+
+                # The trailing newline of the separator is kept, so the
+                # separator on the next line is preceded by the newline.
+                start = match.end()
+
+            buffer = buffer[start:]
+
+            # Drop the data collected so far, when the chunk crosses the
+            # bound, but keep the last line, since it could be the
+            # beginning of the separator line. The line longer than the
+            # bound is not a separator, so only its tail is kept.
+            if self.maxsize is not None and len(buffer) > self.maxsize:
+                if not overflow:
+                    self.warn()
+
+                overflow = True
+                newline = buffer.rfind(b"\n")
+                if newline == -1 or len(buffer) - newline > self.maxsize:
+                    newline = max(len(buffer) - len(self.symbol), 0)
+                buffer = buffer[newline:]
+
+        if buffer and not overflow:
+            chunk = self.decode(buffer, 0, len(buffer))
+            if chunk:
+                yield chunk
+
+    def warn(self):
+        """Report the dropped oversized chunk."""
+        LOG.warning("Dropping the chunk exceeding %(maxsize)d bytes." %
+                    {"maxsize": self.maxsize})
@@ -2,6 +2,8 @@ import itertools
 import operator
 import logging
 
+import numpy
+
 
 LOG = logging.getLogger(__name__)
 
@@ -19,6 +21,27 @@ class Bundler(object):
         super().__init__()
         self.gauges = gauges
 
+        # The fused update of the gauges, when the gauges are created
+        # by the factory.
+        self.updater = None
+
+    def __getstate__(self):
+        # The fused update is not serialized, the gauges of the restored
+        # bundler are updated one by one.
+        state = self.__dict__.copy()
+        state["updater"] = None
+        return state
+
+    @classmethod
+    def create(cls, factory):
+        """Create a new instance of the bundler with the counters
+        of the factory.
+
+        factory: A bundler factory."""
+        bundler = cls(factory.instantiate())
+        bundler.updater = factory.fuse(bundler.gauges)
+        return bundler
+
     def safexec(self, func, params):
         """Execute the specified function with paramers.
 
@@ -35,6 +58,9 @@ class Bundler(object):
         of the information.
 
         params: A statistic chunk."""
+        if self.updater is not None:
+            return self.updateall([params])
+
         for gauge in self.gauges:
             self.safexec(gauge.update, params)
 
@@ -43,6 +69,10 @@ class Bundler(object):
         of the information.
 
         params: A list of statistic chunks."""
+        # The fused update isolates the failures of the gauges.
+        if self.updater is not None:
+            return self.safexec(self.updater, params)
+
         for gauge in self.gauges:
             self.safexec(gauge.updateall, params)
 
@@ -59,10 +89,48 @@ class Bundler(object):
         # a generator.
         list(map(lambda ab: ab[0].join(ab[1]), pairs))
 
+        # The failed updates are accounted once for the joined bundler.
+        for gauge, other_gauge in zip(self.gauges, other.gauges):
+            gauge.missing += other_gauge.missing
+            other_gauge.missing = 0
+
         # It is important to return the referece to ourselves,
         # as it will be used as an accumulator in the reduce call.
         return self
 
+    def missing(self):
+        """Dictionary of the counts of the gauge updates failed due to
+        the missing nested keys. The counts are reset."""
+        missing = {}
+        for gauge in self.gauges:
+            if gauge.missing:
+                key = ".".join(map(str, gauge.keys))
+                missing[key] = missing.get(key, 0) + gauge.missing
+                gauge.missing = 0
+        return missing
+
+    def describe(self):
+        """Dictionary of the descriptions of the gauges by the nested
+        keys of the gauges, the gauges without description are omitted.
+        """
+        descriptions = {}
+        for gauge in self.gauges:
+            description = gauge.describe()
+            if description is not None:
+                descriptions[".".join(map(str, gauge.keys))] = description
+        return descriptions
+
+    def flatten(self, normalized):
+        """List of the normalized values, where the sequences of values
+        of the gauges are flattened."""
+        values = []
+        for value in normalized:
+            if isinstance(value, (list, tuple)):
+                values.extend(map(float, value))
+            else:
+                values.append(float(value))
+        return values
+
     def normalize(self):
         """Array of the normalized counter values."""
         normalized = map(
@@ -70,4 +138,298 @@ class Bundler(object):
 
         # Convert the result to the list of normalized
         # float values.
-        return list(map(float, normalized))
+        return self.flatten(normalized)
+
+
+class ArrayBundler(Bundler):
+    """Define a statistics collector with the numeric state.
+
+    The state of the gauges, which consists only of the processed count
+    and the accumulator, is kept in a single array. The gauges are still
+    used to process the updates, but their values are moved into the
+    array, before the bundlers are joined, normalized or serialized, so
+    these operations are performed on the whole array at once."""
+
+    def __init__(self, gauges, factory=None):
+        """Create a new instance of the array bundler.
+
+        gauges:  A list of the statistics collectors.
+        factory: A factory of the counters, it is used to restore the
+                 counters instead of serializing them."""
+        super().__init__(gauges)
+        self.factory = factory
+
+        self.arrayed = [index for index, gauge in enumerate(gauges)
+                        if gauge.normalization is not None]
+        self.others = [index for index, gauge in enumerate(gauges)
+                       if gauge.normalization is None]
+        self.means = numpy.array([gauges[index].normalization == "mean"
+                                  for index in self.arrayed], dtype=bool)
+
+        # The rows of the processed counts, the accumulators and the
+        # counts of the failed updates of the arrayed gauges.
+        self.state = numpy.zeros((3, len(self.arrayed)))
+
+    @classmethod
+    def create(cls, factory):
+        """Create a new instance of the bundler with the counters
+        of the factory."""
+        bundler = cls(factory.instantiate(), factory)
+        bundler.updater = factory.fuse(bundler.gauges)
+        return bundler
+
+    @classmethod
+    def restore(cls, factory, state, others):
+        """Create a bundler from the serialized state.
+
+        factory: A factory of the counters.
+        state:   A buffer of the state of the arrayed gauges.
+        others:  A list of the counters with the other state."""
+        bundler = cls.create(factory)
+        bundler.state = numpy.frombuffer(state).reshape(3, -1).copy()
+        for index, gauge in zip(bundler.others, others):
+            bundler.gauges[index] = gauge
+
+        bundler.updater = factory.fuse(bundler.gauges)
+        return bundler
+
+    def __reduce__(self):
+        # The counters without the factory are serialized as is.
+        if self.factory is None:
+            return super().__reduce__()
+
+        self.flush()
+        others = [self.gauges[index] for index in self.others]
+        return (self.restore, (self.factory, self.state.tobytes(), others))
+
+    def flush(self):
+        """Move the values of the arrayed gauges into the state."""
+        gauges = [self.gauges[index] for index in self.arrayed]
+        if not gauges:
+            return
+
+        self.state += [[gauge.processed for gauge in gauges],
+                       [gauge.accumulator for gauge in gauges],
+                       [gauge.missing for gauge in gauges]]
+
+        for gauge in gauges:
+            gauge.processed = gauge.accumulator = 0.0
+            gauge.missing = 0
+
+    def join(self, other):
+        """Join the respective results of the other bundler
+        counters.
+
+        other: An ArrayBundler instance to join."""
+        self.flush()
+        other.flush()
+        self.state += other.state
+
+        for index in self.others:
+            gauge, other_gauge = self.gauges[index], other.gauges[index]
+            gauge.join(other_gauge)
+            gauge.missing += other_gauge.missing
+            other_gauge.missing = 0
+
+        return self
+
+    def missing(self):
+        """Dictionary of the counts of the gauge updates failed due to
+        the missing nested keys. The counts are reset."""
+        self.flush()
+        for index, count in zip(self.arrayed, self.state[2]):
+            self.gauges[index].missing = int(count)
+
+        self.state[2] = 0.0
+        return super().missing()
+
+    def normalize(self):
+        """Array of the normalized counter values."""
+        self.flush()
+        processed, accumulator, _ = self.state
+
+        quotient = numpy.divide(accumulator, processed,
+                                out=numpy.zeros_like(accumulator),
+                                where=processed != 0)
+
+        normalized = [None] * len(self.gauges)
+        arrayed = numpy.where(self.means, quotient, accumulator).tolist()
+        for index, value in zip(self.arrayed, arrayed):
+            normalized[index] = value
+        for index in self.others:
+            normalized[index] = self.gauges[index].normalize()
+
+        return self.flatten(normalized)
+
+
+class WindowBundler(Bundler):
+    """Define a statistics collector with the time windows.
+
+    Besides the statistics of the whole data, the statistics are
+    collected in the tumbling time windows of the fixed width. The
+    windows are kept in a ring buffer, so only the latest windows are
+    kept: the window replaces the older window of the same slot, and
+    the updates of the replaced windows are skipped. Since the latest
+    window of each slot is kept, the join is associative."""
+
+    # Define a nested key of the time stamp of the packet.
+    timestamp_keys = ["meta", "timestamp"]
+
+    def __init__(self, factory, width=3600, size=24):
+        """Create a new instance of the window bundler.
+
+        factory: A bundler factory of the statistics of each window.
+        width:   A width of the window in seconds.
+        size:    A count of the latest windows to keep."""
+        self.total = factory.bundler.create(factory)
+        super().__init__(self.total.gauges)
+
+        self.factory = factory
+        self.width = width
+        self.size = size
+
+        # The indices of the windows in the slots, -1 for the empty
+        # slots, the counts of the updates and the statistics of the
+        # windows.
+        self.indices = numpy.full(size, -1, dtype=numpy.int64)
+        self.counts = numpy.zeros(size, dtype=numpy.int64)
+        self.windows = [None] * size
+
+    def timestamp(self, params):
+        """Time stamp of the packet, None, if it is unknown."""
+        for key in self.timestamp_keys:
+            try:
+                params = params[key]
+            except (KeyError, TypeError):
+                return None
+
+        try:
+            return float(params)
+        except (TypeError, ValueError):
+            return None
+
+    def evict(self):
+        """Empty the slots of the windows, that are not among the latest
+        windows anymore."""
+        stale = self.indices <= self.indices.max() - self.size
+        for slot in numpy.flatnonzero(stale & (self.indices >= 0)):
+            self.indices[slot] = -1
+            self.counts[slot] = 0
+            self.windows[slot] = None
+
+    def window(self, timestamp):
+        """Bundler of the window of the time stamp. None, if the window
+        is older than the latest windows or the window kept in the slot."""
+        if timestamp is None:
+            return None
+
+        index = int(timestamp // self.width)
+        slot = index % self.size
+
+        if index < self.indices[slot]:
+            return None
+        if index <= self.indices.max() - self.size:
+            return None
+        if index > self.indices[slot]:
+            self.indices[slot] = index
+            self.counts[slot] = 0
+            self.windows[slot] = self.factory.bundler.create(self.factory)
+            self.evict()
+
+        self.counts[slot] += 1
+        return self.windows[slot]
+
+    def update(self, params):
+        """Update the counters with the specified piece
+        of the information.
+
+        params: A statistic chunk."""
+        self.total.update(params)
+
+        window = self.window(self.timestamp(params))
+        if window is not None:
+            window.update(params)
+
+    def updateall(self, params):
+        """Update the counters with the specified list of the
+        information, the list is attributed to the window of the
+        first known time stamp.
+
+        params: A list of statistic chunks."""
+        self.total.updateall(params)
+
+        timestamps = (self.timestamp(p) for p in params)
+        timestamp = next((t for t in timestamps if t is not None), None)
+
+        window = self.window(timestamp)
+        if window is not None:
+            window.updateall(params)
+
+    def join(self, other):
+        """Join the respective results of the other bundler
+        counters.
+
+        other: A WindowBundler instance to join."""
+        self.total.join(other.total)
+
+        for slot in range(self.size):
+            index = other.indices[slot]
+            if index < 0 or index < self.indices[slot]:
+                continue
+
+            if index > self.indices[slot]:
+                self.indices[slot] = index
+                self.counts[slot] = other.counts[slot]
+                self.windows[slot] = other.windows[slot]
+            else:
+                self.counts[slot] += other.counts[slot]
+                self.windows[slot].join(other.windows[slot])
+
+        self.evict()
+        return self
+
+    def missing(self):
+        """Dictionary of the counts of the gauge updates failed due to
+        the missing nested keys. The counts are reset."""
+        # The updates of the windows repeat the updates of the total.
+        for window in self.windows:
+            if window is not None:
+                window.missing()
+        return self.total.missing()
+
+    def rates(self):
+        """Pair of the average count of the updates per second and the
+        burstiness of the updates in the range of the kept windows, the
+        range is at most the count of the latest windows."""
+        present = self.indices >= 0
+        if not present.any():
+            return 0.0, 0.0
+
+        # The windows without the updates are counted as empty.
+        first, last = self.indices[present].min(), self.indices[present].max()
+        counts = numpy.zeros(last - first + 1)
+        counts[self.indices[present] - first] = self.counts[present]
+
+        mean, deviation = counts.mean(), counts.std()
+        burstiness = (deviation - mean) / (deviation + mean)
+        return float(mean / self.width), float(burstiness)
+
+    def normalize(self):
+        """Array of the normalized counter values of the whole data
+        followed by the rate and the burstiness of the updates."""
+        return self.total.normalize() + list(self.rates())
+
+    def describe(self):
+        """Dictionary of the descriptions of the gauges and the list of
+        the normalized counter values of the windows."""
+        descriptions = self.total.describe()
+
+        slots = sorted((index, slot) for slot, index
+                       in enumerate(self.indices) if index >= 0)
+        descriptions["windows"] = [
+            {"start": int(index) * self.width,
+             "count": int(self.counts[slot]),
+             "point": self.windows[slot].normalize()}
+            for index, slot in slots]
+
+        return descriptions
@@ -0,0 +1,119 @@
+import collections
+import math
+
+import numpy
+
+
+def histogram_entropy(counts):
+    """A Shannon entropy of the distribution given by the array of the
+    counts of the symbols."""
+    counts = numpy.asarray(counts, dtype=numpy.float64)
+    counts = counts[counts > 0]
+
+    total = counts.sum()
+    if not total:
+        return 0.0
+    return float(math.log2(total) - (counts * numpy.log2(counts)).sum() / total)
+
+
+class Entropy:
+    """Define a computer of the Shannon entropy of the strings.
+
+    The entropies of the recently seen strings are memoized, since the
+    popular names are repeated in the traffic. The large batches of the
+    strings are computed at once from the histograms of the bytes."""
+
+    # Define a maximum count of the memoized entropies.
+    maxsize = 65536
+
+    # Define a minimum count of the strings computed as a batch.
+    batchsize = 64
+
+    def __init__(self, maxsize=None, batchsize=None):
+        """Create a new instance of the entropy computer.
+
+        maxsize:   A maximum count of the memoized entropies.
+        batchsize: A minimum count of the strings computed as a batch."""
+        super().__init__()
+        self.memo = collections.OrderedDict()
+
+        if maxsize is not None:
+            self.maxsize = maxsize
+        if batchsize is not None:
+            self.batchsize = batchsize
+
+    def compute(self, string):
+        """A Shannon entropy of the string."""
+        strlen = len(string)
+        if not strlen:
+            return 0.0
+
+        counts = collections.Counter(string).values()
+        return math.log2(strlen) - sum(
+            count * math.log2(count) for count in counts) / strlen
+
+    def compute_many(self, strings):
+        """List of the Shannon entropies of the ASCII strings."""
+        data = [string.encode("ascii") for string in strings]
+        lengths = numpy.fromiter(map(len, data), dtype=numpy.int64,
+                                 count=len(data))
+
+        # Count the bytes of all strings at once, each string is
+        # assigned its own range of 256 counters.
+        codes = numpy.frombuffer(b"".join(data), dtype=numpy.uint8)
+        rows = numpy.repeat(numpy.arange(len(data)) * 256, lengths)
+        counts = numpy.bincount(rows + codes, minlength=len(data) * 256)
+
+        # Sum the terms of the present bytes only by the strings.
+        present = numpy.flatnonzero(counts)
+        counts = counts[present].astype(numpy.float64)
+        terms = numpy.bincount(present // 256,
+                               weights=counts * numpy.log2(counts),
+                               minlength=len(data))
+
+        lengths = numpy.maximum(lengths, 1)
+        return (numpy.log2(lengths) - terms / lengths).tolist()
+
+    def remember(self, string, entropy):
+        """Memoize the entropy of the string."""
+        self.memo[string] = entropy
+        if len(self.memo) > self.maxsize:
+            self.memo.popitem(last=False)
+
+    def entropy(self, string):
+        """A Shannon entropy of the string."""
+        entropy = self.memo.get(string)
+        if entropy is not None:
+            self.memo.move_to_end(string)
+            return entropy
+
+        entropy = self.compute(string)
+        self.remember(string, entropy)
+        return entropy
+
+    def entropies(self, strings):
+        """List of the Shannon entropies of the strings."""
+        entropies = [self.memo.get(string) for string in strings]
+        missed = [string for string, entropy in zip(strings, entropies)
+                  if entropy is None]
+
+        if len(missed) < self.batchsize:
+            return list(map(self.entropy, strings))
+
+        for string, entropy in zip(strings, entropies):
+            if entropy is not None:
+                self.memo.move_to_end(string)
+
+        # The distinct strings are computed once, the strings of the
+        # other characters are computed one by one.
+        missed = list(dict.fromkeys(missed))
+        ascii = [string for string in missed if string.isascii()]
+        computed = dict(zip(ascii, self.compute_many(ascii)))
+        computed.update((string, self.compute(string))
+                        for string in missed if not string.isascii())
+
+        for string, entropy in computed.items():
+            self.remember(string, entropy)
+
+        return [computed[string] if entropy is None else entropy
+                for string, entropy in zip(strings, entropies)]
@@ -2,6 +2,8 @@ import abc
 import six
 
 from nssift.grind.netstats.bundler import Bundler
+from nssift.grind.netstats.bundler import WindowBundler
+from nssift.grind.netstats.fused import Fuser
 
 
 class BaseFactory(metaclass=abc.ABCMeta):
@@ -19,23 +21,59 @@ class BaseFactory(metaclass=abc.ABCMeta):
 class BundlerFactory(BaseFactory):
     """Define a regular bundler factory."""
 
-    def __init__(self, gauges):
+    def __init__(self, gauges, bundler=None, windows=None):
         """Create a new instance of the bundler factory
         with the specified set of counters.
 
-        gauges: A list of the tuples of gauge type and
-                type constructor arguments.
+        gauges: A list of the tuples of gauge type, nested keys and
+                optionally the keyword arguments of the constructor.
 
                 Example: [(NumberGauge, ["packet", "query"]),
-                          (SetGauge, ["packet", "qtype"])]"""
+                          (SetGauge, ["packet", "qtype"]),
+                          (RatioGauge, ["packet", "header", "rcode"],
+                           {"values": ["NXDOMAIN"], "type": "RESPONSE"})]
+
+        bundler: A type of the bundler, by default the Bundler.
+        windows: A pair of the width of the time windows in seconds and
+                 the count of the latest windows to collect the
+                 statistics of, by default the windows are not used."""
         super(BundlerFactory, self).__init__()
         self.gauges = gauges
+        self.bundler = bundler or Bundler
+        self.windows = windows
+
+        # The fused update of the gauges is compiled once.
+        self.fuser = None
+
+    def __getstate__(self):
+        # The compiled update is not serialized, it is compiled again
+        # by the executors building the bundlers.
+        state = self.__dict__.copy()
+        state["fuser"] = None
+        return state
+
+    def keys(self):
+        """List of the nested key paths read by the gauges."""
+        keys = [params for _, params, *_ in self.gauges]
+        if self.windows:
+            keys.append(WindowBundler.timestamp_keys)
+        return keys
+
+    def instantiate(self):
+        """Create a new list of the counters."""
+        return [klass(params, **(kwargs[0] if kwargs else {}))
+                for klass, params, *kwargs in self.gauges]
+
+    def fuse(self, gauges):
+        """Create a fused update of the gauges created by the factory."""
+        if self.fuser is None:
+            self.fuser = Fuser(gauges)
+        return self.fuser.bind(gauges)
 
     def build(self):
         """Create a new instance of the bundler."""
-        # Instantiate a set of the counters.
-        gauges = [klass(params) for klass, params in self.gauges]
-
         # Return a bundler of the gauges, so the could updated
         # simultaneously.
-        return Bundler(gauges)
+        if self.windows:
+            return WindowBundler(self, *self.windows)
+        return self.bundler.create(self)
@@ -0,0 +1,123 @@
+import collections
+import logging
+
+
+LOG = logging.getLogger(__name__)
+
+
+# Define a marker of the values missing at the nested keys.
+MISSING = object()
+
+
+def fail(error):
+    """Report the failed update of the gauge."""
+    LOG.error("Failed to update the gauge, because "
+              "of: %(error)s" % {"error": error})
+
+
+class Fuser:
+    """Define a compiler of the fused updates of the gauges.
+
+    The gauges of the bundler are updated by a single function compiled
+    from the nested keys and the payload types of the gauges. Each
+    distinct nested key is looked up once per record and shared by all
+    gauges reading it, the found values are passed to the gauges in
+    batches, when all records of the list are processed. The failed
+    update of the gauge does not interrupt the updates of the others."""
+
+    def __init__(self, gauges):
+        """Compile the fused update of the gauges.
+
+        gauges: A list of the gauges, the fused update is bound to the
+                gauges of the same nested keys and types."""
+        super().__init__()
+        self.source = self.generate(gauges)
+
+        namespace = {"MISSING": MISSING, "fail": fail}
+        exec(compile(self.source, "<fused>", "exec"), namespace)
+        self.bind = namespace["bind"]
+
+    def generate(self, gauges):
+        """Source code of the function binding the fused update to the
+        list of the gauges."""
+        # Group the gauges by the payload type and the nested keys.
+        reads = collections.OrderedDict()
+        for index, gauge in enumerate(gauges):
+            read = (gauge.type, tuple(gauge.keys))
+            reads.setdefault(read, []).append(index)
+
+        # Assign a variable to each prefix of the nested keys, so the
+        # nested dictionaries are looked up once.
+        nodes = collections.OrderedDict({(): "params"})
+        for _, keys in reads:
+            for end in range(1, len(keys) + 1):
+                nodes.setdefault(keys[:end], "node_%d" % len(nodes))
+
+        gauge_names = ["gauge_%d" % index for index in range(len(gauges))]
+
+        lines = ["def bind(gauges):",
+                 "    %s, = gauges" % ", ".join(gauge_names)
+                 if gauges else "    pass",
+                 "    def updateall(records):"]
+
+        body = []
+        for number in range(len(reads)):
+            body.append("values_%d = []" % number)
+            body.append("missing_%d = 0" % number)
+
+        body.append("for params in records:")
+        loop = []
+        if any(gauge_type is not None for gauge_type, _ in reads):
+            loop.append("payload_type = params.get('type')")
+
+        for keys, name in nodes.items():
+            if not keys:
+                continue
+
+            parent = nodes[keys[:-1]]
+            if parent == "params":
+                loop.extend([
+                    "try:",
+                    "    %s = params[%r]" % (name, keys[-1]),
+                    "except Exception:",
+                    "    %s = MISSING" % name])
+                continue
+
+            loop.extend([
+                "if %s is MISSING:" % parent,
+                "    %s = MISSING" % name,
+                "else:",
+                "    try:",
+                "        %s = %s[%r]" % (name, parent, keys[-1]),
+                "    except Exception:",
+                "        %s = MISSING" % name])
+
+        for number, (gauge_type, keys) in enumerate(reads):
+            read = ["values_%d.append(params)" % number]
+            if keys:
+                read = ["if %s is MISSING:" % nodes[keys],
+                        "    missing_%d += 1" % number,
+                        "elif %s is not None:" % nodes[keys],
+                        "    values_%d.append(%s)" % (number, nodes[keys])]
+            if gauge_type is not None:
+                read = (["if payload_type == %r:" % gauge_type] +
+                        ["    " + line for line in read])
+            loop.extend(read)
+
+        body.extend("    " + line for line in loop)
+
+        for number, indices in enumerate(reads.values()):
+            for index in indices:
+                body.append("if values_%d:" % number)
+                body.append("    try:")
+                body.append("        %s.putall(values_%d)" % (
+                    gauge_names[index], number))
+                body.append("    except Exception as error:")
+                body.append("        fail(error)")
+                body.append("if missing_%d:" % number)
+                body.append("    %s.missing += missing_%d" % (
+                    gauge_names[index], number))
+
+        lines.extend("        " + line for line in body)
+        lines.append("    return updateall")
+        return "\n".join(lines) + "\n"
@@ -1,8 +1,15 @@
 import abc
 import logging
 import math
+import numpy
 import six
 
+from nssift.grind.netstats.entropy import Entropy
+from nssift.grind.netstats.entropy import histogram_entropy
+from nssift.grind.netstats.sketch import HeavyHitters
+from nssift.grind.netstats.sketch import HyperLogLog
+from nssift.grind.netstats.sketch import QuantileSketch
+
 
 LOG = logging.getLogger(__name__)
 
@@ -10,28 +17,54 @@ LOG = logging.getLogger(__name__)
 class Gauge(metaclass=abc.ABCMeta):
     """Define an interface for the statistics counter.
 
-    Each derived class should implement an update method
-    to recalculate (or adjust) the value of the counter."""
+    Each derived class should implement a put method
+    to recalculate (or adjust) the value of the counter
+    with the value found at the nested keys."""
+
+    # Define how the gauge is normalized, when the whole state of the
+    # gauge is the processed count and the accumulator: either "mean"
+    # or "total". Such gauges could be merged as the numeric arrays.
+    normalization = None
 
-    def __init__(self, keys=None):
+    def __init__(self, keys=None, type=None):
         """Create a new instance of the gauge.
 
         keys: A list of nested keys to extract the required data.
+        type: A type of the payloads to update the gauge with, like
+              "REQUEST" or "RESPONSE", by default all payloads are used.
         """
         self.keys = keys or []
+        self.type = type
         self.processed = 0.0
         self.accumulator = 0.0
 
+        # Count of the updates without the value at the nested keys,
+        # the failures are counted instead of being logged.
+        self.missing = 0
+
     def updateall(self, params):
         """Adjust the gathered statistics with the provided
         list of parameters."""
         # Simply call the update for each element of the list.
         list(map(self.update, params))
 
-    @abc.abstractmethod
     def update(self, params):
         """Adjust the gathered statistics with the
-        provided parameters.
+        provided parameters."""
+        value = self.get(params, self.keys)
+        if value is None:
+            return
+        self.put(value)
+
+    def putall(self, values):
+        """Adjust the gathered statistics with the list
+        of the values found at the nested keys."""
+        list(map(self.put, values))
+
+    @abc.abstractmethod
+    def put(self, value):
+        """Adjust the gathered statistics with the value
+        found at the nested keys.
 
         This method should be implemented in the
         derived classes."""
@@ -44,6 +77,15 @@ class Gauge(metaclass=abc.ABCMeta):
         This method should be implemented in the derived
         classes."""
 
+    def describe(self):
+        """Description of the gathered statistics, that is reported
+        along with the normalized values. None, if the gauge has
+        nothing to report.
+
+        This method could be implemented in the derived
+        classes."""
+        return None
+
     def join(self, other):
         """Adjust the internal counters of the gauge by the
         other gauge of the same type.
@@ -62,18 +104,16 @@ class Gauge(metaclass=abc.ABCMeta):
     def get(self, params, keys):
         """Retrieve a value from the specified dictionary
         by the nested list of keys."""
+        # Skip the payloads of the other type.
+        if self.type is not None and params.get("type") != self.type:
+            return None
 
         # Iterate over a list of nested dictionaries.
         for key in keys:
             try:
                 params = params[key]
             except Exception:
-                LOG.debug(
-                    "Failed to adjust the %(klass)s, because "
-                    "the provided dictionary does no contain a "
-                    "nested key: %(key)s" % {
-                        "klass": self.__class__.__name__,
-                        "key": ".".join(self.keys)})
+                self.missing += 1
                 return None
         return params
 
@@ -90,30 +130,66 @@ class ShannonEntropyGauge(Gauge):
     the provided string (in our particular case such
     strings will represent a DNS host name)."""
 
-    def entropy(self, string):
-        """A Shannon entropy of the provided string."""
-        # Make a simple optimization to calculate the
-        # length of the string only once.
-        strlen = len(string)
+    normalization = "mean"
 
-        # Get the probability of characters in the provided string.
-        frequencies = (
-            float(string.count(c)) / strlen
-            for c in set(string))
+    # Define the entropy computer shared by the gauges of the process,
+    # so the entropies of the popular names are computed once.
+    engine = Entropy()
 
-        # Calculate the entropy.
-        return -sum((
-            probability * math.log(probability, 2.0)
-            for probability in frequencies))
+    # Define a count of the names buffered before their entropies are
+    # computed. The host is updated by the short transactions, so the
+    # names of many transactions are computed as a batch.
+    buffersize = 1024
 
-    def update(self, params):
-        """Update the entropy gauge of the DNS requests."""
-        string = self.get(params, self.keys)
-        if string is None:
-            return
+    def __init__(self, keys=None, type=None):
+        """Create a new instance of the entropy gauge."""
+        self.pending = []
+        super().__init__(keys, type)
+
+    def __getstate__(self):
+        self.flush()
+        return self.__dict__
+
+    @property
+    def accumulator(self):
+        """Sum of the entropies of the processed names."""
+        self.flush()
+        return self.entropies
+
+    @accumulator.setter
+    def accumulator(self, value):
+        self.entropies = value
+
+    def flush(self):
+        """Compute the entropies of the buffered names."""
+        if self.pending:
+            pending, self.pending = self.pending, []
+            self.entropies += sum(self.engine.entropies(pending))
 
+    def entropy(self, string):
+        """A Shannon entropy of the provided string."""
+        return self.engine.entropy(string)
+
+    def updateall(self, params):
+        """Update the entropy gauge with the list of the DNS
+        requests, the entropies are computed as a batch."""
+        self.putall([string for string in (
+            self.get(p, self.keys) for p in params) if string is not None])
+
+    def putall(self, strings):
+        """Update the entropy gauge with the list of the
+        requested host names."""
+        self.processed += len(strings)
+        self.pending.extend(strings)
+        if len(self.pending) >= self.buffersize:
+            self.flush()
+
+    def put(self, string):
+        """Update the entropy gauge of the DNS requests."""
         self.processed += 1.0
-        self.accumulator += self.entropy(string)
+        self.pending.append(string)
+        if len(self.pending) >= self.buffersize:
+            self.flush()
 
     def normalize(self):
         """Normalize the final entropy value by dividing it
@@ -121,19 +197,106 @@ class ShannonEntropyGauge(Gauge):
         return self.quotient(self.accumulator, self.processed)
 
 
+class HistogramGauge(Gauge):
+    """Histogram gauge used to accumulate the distribution of the
+    characters of the domain names.
+
+    The state of the gauge is a fixed array of the counts of the bytes,
+    so it does not grow with the traffic of the host. The features of
+    the names, like the entropy of the characters, are calculated from
+    the aggregated histogram only on the normalization."""
+
+    # Define the features calculated from the histogram.
+    features = ("entropy", "digits", "labels", "label_length")
+
+    # Define a count of the names buffered before they are counted.
+    buffersize = 1024
+
+    def __init__(self, keys=None, feature="entropy", type=None):
+        """Create a new instance of the histogram gauge.
+
+        feature: A feature of the names to calculate, one of: entropy,
+                 digits (a ratio of the digits), labels (an average
+                 count of the labels) or label_length (an average length
+                 of the labels)."""
+        super(HistogramGauge, self).__init__(keys, type)
+        if feature not in self.features:
+            raise ValueError("Unknown feature of the histogram: "
+                             "%(feature)s" % {"feature": feature})
+
+        self.feature = feature
+        self.accumulator = numpy.zeros(256, dtype=numpy.int64)
+        self.labels = 0.0
+        self.pending = []
+
+    def __getstate__(self):
+        self.flush()
+        return self.__dict__
+
+    def flush(self):
+        """Count the bytes of the buffered names."""
+        if not self.pending:
+            return
+
+        data = "".join(self.pending).encode("utf-8", "surrogatepass")
+        self.accumulator += numpy.bincount(
+            numpy.frombuffer(data, dtype=numpy.uint8), minlength=256)
+        self.pending = []
+
+    def put(self, name):
+        """Update the histogram with the characters of the name."""
+        self.processed += 1.0
+
+        name = name.strip(".")
+        if name:
+            self.labels += name.count(".") + 1
+
+        self.pending.append(name)
+        if len(self.pending) >= self.buffersize:
+            self.flush()
+
+    def normalize(self):
+        """The feature of the names calculated from the histogram."""
+        self.flush()
+
+        # The label separators are not the characters of the names.
+        counts = self.accumulator.copy()
+        counts[ord(".")] = 0
+        chars = float(counts.sum())
+
+        if self.feature == "entropy":
+            return histogram_entropy(counts)
+        if self.feature == "digits":
+            return self.quotient(float(counts[ord("0"):ord("9") + 1].sum()),
+                                 chars)
+        if self.feature == "labels":
+            return self.quotient(self.labels, self.processed)
+        return self.quotient(chars, self.labels)
+
+    def join(self, other):
+        """Update the internal counters with the histogram
+        of the other gauge."""
+        self.flush()
+        other.flush()
+
+        self.processed += other.processed
+        self.accumulator += other.accumulator
+        self.labels += other.labels
+        return self
+
+
 class NumberGauge(Gauge):
     """Integer gauge used to accumulate number-aware
     statistics."""
 
-    def update(self, params):
+    normalization = "mean"
+
+    def put(self, value):
         """Adjust the counters of the gauge by processing
         a specified value."""
-        value = self.get(params, self.keys)
-        if value is None:
-            return
-
-        self.processed += 1.0
+        # The invalid value fails before it is counted.
         self.accumulator += value
+        self.processed += 1.0
 
     def normalize(self):
         """Normalize the gauge result by dividing the
@@ -141,34 +304,172 @@ class NumberGauge(Gauge):
         return self.quotient(self.accumulator, self.processed)
 
 
+class QuantileGauge(Gauge):
+    """Quantile gauge used to estimate the distribution of the
+    values, like the sizes of the packets, with a bounded memory.
+
+    The gauge is normalized into the list of the quantiles."""
+
+    # Define the measures of the values.
+    measures = {"length": len,
+                "labels": lambda name: len(name.strip(".").split("."))}
+
+    def __init__(self, keys=None, quantiles=(0.5, 0.9, 0.99), measure=None,
+                 k=200, type=None):
+        """Create a new instance of the quantile gauge.
+
+        quantiles: A list of the fractions of the estimated quantiles.
+        measure:   A measure of the values, either "length" or "labels"
+                   of the domain names, by default the values are used.
+        k:         An accuracy of the sketch of the quantiles."""
+        super(QuantileGauge, self).__init__(keys, type)
+        if measure is not None and measure not in self.measures:
+            raise ValueError("Unknown measure of the values: "
+                             "%(measure)s" % {"measure": measure})
+
+        self.quantiles = list(quantiles)
+        self.measure = measure
+        self.accumulator = QuantileSketch(k)
+
+    def put(self, value):
+        """Update the sketch with the measure of the value."""
+        if self.measure is not None:
+            value = self.measures[self.measure](value)
+
+        self.processed += 1.0
+        self.accumulator.add(value)
+
+    def normalize(self):
+        """The list of the estimated quantiles."""
+        return self.accumulator.quantiles(self.quantiles)
+
+    def join(self, other):
+        """Update the internal counters with the sketch
+        of the other gauge."""
+        self.processed += other.processed
+        self.accumulator.merge(other.accumulator)
+        return self
+
+
+class HeavyHitterGauge(Gauge):
+    """Heavy hitter gauge used to find the most frequent values,
+    like the most queried domain names of the host.
+
+    The gauge is normalized into the fraction of the values taken
+    by the most frequent ones, the values themselves are reported
+    by the description of the gauge."""
+
+    def __init__(self, keys=None, size=10, width=256, depth=4, type=None):
+        """Create a new instance of the heavy hitter gauge.
+
+        size:  A count of the most frequent values to report.
+        width: A width of the Count-Min sketch of the counts.
+        depth: A depth of the Count-Min sketch of the counts."""
+        super(HeavyHitterGauge, self).__init__(keys, type)
+        self.accumulator = HeavyHitters(size, width, depth)
+
+    def put(self, value):
+        """Count the value in the summary of the values."""
+        self.processed += 1.0
+        self.accumulator.add(value)
+
+    def normalize(self):
+        """The fraction of the most frequent values."""
+        top = sum(count for _, count in self.accumulator.items())
+        return self.quotient(min(top, self.processed), self.processed)
+
+    def describe(self):
+        """List of pairs of the most frequent values and their counts."""
+        return self.accumulator.items()
+
+    def join(self, other):
+        """Update the internal counters with the summary
+        of the other gauge."""
+        self.processed += other.processed
+        self.accumulator.merge(other.accumulator)
+        return self
+
+
 class SetGauge(Gauge):
-    """Set gauge used to accumulate distinct values."""
+    """Set gauge used to accumulate distinct values.
+
+    The values of the known domain, like the query types, are kept
+    in a bitmap. Other values are kept in a set, until the count of
+    them exceeds the threshold, then they are estimated with the
+    HyperLogLog sketch of the specified relative error."""
+
+    # Define a maximum count of the distinct values kept exactly.
+    threshold = 1024
+
+    # Define a relative error of the estimated count of the values.
+    error = 0.02
+
+    def __init__(self, keys=None, type=None, domain=None, threshold=None,
+                 error=None):
+        """Create a new instance of the set gauge.
 
-    def __init__(self, keys=None):
-        """Create a new instance of the """
-        super(SetGauge, self).__init__(keys)
+        domain:    A list of the known values kept in a bitmap.
+        threshold: A maximum count of the distinct values kept exactly.
+        error:     A relative error of the estimated count of the values.
+        """
+        super(SetGauge, self).__init__(keys, type)
         self.accumulator = set()
 
-    def update(self, params):
+        self.domain = {value: bit for bit, value in enumerate(domain or [])}
+        self.bitmap = 0
+        self.sketch = None
+
+        if threshold is not None:
+            self.threshold = threshold
+        if error is not None:
+            self.error = error
+
+    def put(self, value):
         """Update the set gauge by adding the value to
         the set of elements."""
-        value = self.get(params, self.keys)
-        if value is None:
-            return
-
         self.processed += 1.0
-        self.accumulator.add(value)
+
+        bit = self.domain.get(value)
+        if bit is not None:
+            self.bitmap |= 1 << bit
+        elif self.sketch is not None:
+            self.sketch.add(value)
+        else:
+            self.accumulator.add(value)
+            if len(self.accumulator) > self.threshold:
+                self.estimate()
+
+    def estimate(self):
+        """Move the distinct values into the sketch."""
+        if self.sketch is None:
+            self.sketch = HyperLogLog.fromerror(self.error)
+
+        self.sketch.update(self.accumulator)
+        self.accumulator = set()
 
     def normalize(self):
         """Normalize the set gauge. This method will simply
         return the count of distinct processed values."""
-        return len(self.accumulator)
+        count = bin(self.bitmap).count("1")
+        if self.sketch is not None:
+            return count + self.sketch.count()
+        return count + len(self.accumulator)
 
     def join(self, other):
         """Update the internal counters with the values
         of the other set gauge."""
         self.processed += other.processed
-        self.accumulator.union(other.accumulator)
+        self.bitmap |= other.bitmap
+
+        if self.sketch is None and other.sketch is None:
+            self.accumulator.update(other.accumulator)
+            if len(self.accumulator) > self.threshold:
+                self.estimate()
+        else:
+            self.estimate()
+            self.sketch.update(other.accumulator)
+            if other.sketch is not None:
+                self.sketch.merge(other.sketch)
 
         # Return the reference to the self, so the join
         # operations could be nested.
@@ -179,11 +480,89 @@ class IncrementGauge(Gauge):
     """Incremental gauge used to calculate the count of
     processed elements."""
 
-    def update(self, params):
-        """Adjust the counter by one on each call
-        of the update method."""
+    normalization = "total"
+
+    def put(self, value):
+        """Adjust the counter by one on each value."""
         self.accumulator += 1.0
 
     def normalize(self):
         """The count of processed events."""
         return self.accumulator
+
+
+class LengthGauge(Gauge):
+    """Length gauge used to calculate the average count
+    of the elements, like the count of the answer records."""
+
+    normalization = "mean"
+
+    def put(self, value):
+        """Adjust the counters of the gauge by the length
+        of the specified sequence."""
+        self.processed += 1.0
+        self.accumulator += len(value)
+
+    def normalize(self):
+        """The average length of the processed sequences."""
+        return self.quotient(self.accumulator, self.processed)
+
+
+class RatioGauge(Gauge):
+    """Ratio gauge used to calculate the fraction of the
+    specified values, like the ratio of NXDOMAIN responses."""
+
+    normalization = "mean"
+
+    def __init__(self, keys=None, values=None, type=None):
+        """Create a new instance of the ratio gauge.
+
+        values: A list of the values to count."""
+        super(RatioGauge, self).__init__(keys, type)
+        self.values = frozenset(values or [])
+
+    def put(self, value):
+        """Adjust the counters of the gauge, when the value
+        is one of the counted values."""
+        self.processed += 1.0
+        if value in self.values:
+            self.accumulator += 1.0
+
+    def normalize(self):
+        """The fraction of the counted values."""
+        return self.quotient(self.accumulator, self.processed)
+
+
+class SpreadGauge(Gauge):
+    """Spread gauge used to calculate the standard deviation
+    of the field of the records, like the TTL of the answers."""
+
+    def __init__(self, keys=None, field=None, type=None):
+        """Create a new instance of the spread gauge.
+
+        field: A field of the records to calculate the spread of."""
+        super(SpreadGauge, self).__init__(keys, type)
+        self.field = field
+        self.squares = 0.0
+
+    def put(self, records):
+        """Adjust the counters of the gauge by the field values
+        of the specified list of the records."""
+        for record in records:
+            value = record[self.field]
+            self.processed += 1.0
+            self.accumulator += value
+            self.squares += value * value
+
+    def normalize(self):
+        """The standard deviation of the processed values."""
+        mean = self.quotient(self.accumulator, self.processed)
+        variance = self.quotient(self.squares, self.processed) - mean * mean
+        return math.sqrt(max(variance, 0.0))
+
+    def join(self, other):
+        """Update the internal counters with the values
+        of the other spread gauge."""
+        super(SpreadGauge, self).join(other)
+        self.squares += other.squares
+        return self
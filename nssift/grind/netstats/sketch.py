@@ -0,0 +1,350 @@
+import collections
+import hashlib
+import heapq
+import math
+import random
+
+import numpy
+
+
+def fingerprint(value):
+    """A 64-bit hash of the value, that is the same in all processes
+    unlike the built-in hash of the strings."""
+    if not isinstance(value, bytes):
+        value = str(value).encode("utf-8", "surrogatepass")
+
+    digest = hashlib.blake2b(value, digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+class HyperLogLog:
+    """Define a HyperLogLog sketch of the count of distinct values.
+
+    The sketch takes a fixed amount of memory regardless of the count
+    of the values, the sketches are merged without the loss of the
+    accuracy. The relative standard error is about 1.04 / sqrt(2^p),
+    where p is a precision of the sketch."""
+
+    def __init__(self, precision=12):
+        """Create a new instance of the sketch.
+
+        precision: A count of the hash bits used to select a register,
+                   the sketch has 2^precision registers."""
+        super().__init__()
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    @classmethod
+    def fromerror(cls, error):
+        """Create the sketch with the specified relative standard error.
+
+        error: A relative standard error, like 0.01."""
+        precision = math.ceil(math.log2((1.04 / error) ** 2))
+        return cls(min(max(precision, 4), 18))
+
+    def add(self, value):
+        """Add the value to the sketch."""
+        digest = fingerprint(value)
+        bits = 64 - self.precision
+
+        index = digest >> bits
+        rank = bits - (digest & ((1 << bits) - 1)).bit_length() + 1
+
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def update(self, values):
+        """Add the values to the sketch."""
+        for value in values:
+            self.add(value)
+
+    def merge(self, other):
+        """Merge the other sketch of the same precision into this one."""
+        if other.precision != self.precision:
+            raise ValueError("Precisions of the sketches differ: "
+                             "%d and %d" % (self.precision, other.precision))
+
+        registers = numpy.maximum(
+            numpy.frombuffer(self.registers, dtype=numpy.uint8),
+            numpy.frombuffer(other.registers, dtype=numpy.uint8))
+        self.registers = bytearray(registers.tobytes())
+        return self
+
+    def count(self):
+        """Estimated count of the distinct values."""
+        registers = numpy.frombuffer(self.registers, dtype=numpy.uint8)
+        size = len(registers)
+
+        alpha = 0.7213 / (1.0 + 1.079 / size)
+        estimate = alpha * size * size / numpy.ldexp(
+            1.0, -registers.astype(numpy.int32)).sum()
+
+        # The small counts are estimated by the count of empty registers.
+        zeros = size - numpy.count_nonzero(registers)
+        if estimate <= 2.5 * size and zeros:
+            estimate = size * math.log(size / zeros)
+
+        return float(estimate)
+
+
+class QuantileSketch:
+    """Define a KLL sketch of the quantiles of the numeric values.
+
+    The values are kept in a hierarchy of the compactors, the values of
+    the compactor on the level h represent 2^h values each. When the
+    compactor is full, it is sorted and every other value is promoted
+    to the next level, so the memory is bounded by about 3k values. The
+    sketches are merged by merging the compactors of the same level."""
+
+    # Define a ratio of the capacities of the adjacent compactors.
+    ratio = 2.0 / 3.0
+
+    def __init__(self, k=200):
+        """Create a new instance of the sketch.
+
+        k: A capacity of the top compactor, the rank error of the
+           quantiles is about 1.7 / k."""
+        super().__init__()
+        self.k = k
+        self.count = 0
+        self.compactors = [[]]
+
+    def capacity(self, level):
+        """Capacity of the compactor of the specified level."""
+        depth = len(self.compactors) - level - 1
+        return max(int(math.ceil(self.k * self.ratio ** depth)), 2)
+
+    def add(self, value):
+        """Add the value to the sketch."""
+        compactor = self.compactors[0]
+        compactor.append(value)
+        self.count += 1
+
+        if len(compactor) >= self.capacity(0):
+            self.compress()
+
+    def update(self, values):
+        """Add the values to the sketch."""
+        for value in values:
+            self.add(value)
+
+    def compress(self):
+        """Compact the full compactors into the upper levels."""
+        for level, compactor in enumerate(self.compactors):
+            if len(compactor) < self.capacity(level):
+                continue
+
+            if level + 1 == len(self.compactors):
+                self.compactors.append([])
+
+            # The odd value is left in the compactor, so the weight of
+            # the sketch is preserved.
+            compactor.sort()
+            odd = [compactor.pop()] if len(compactor) % 2 else []
+
+            offset = random.getrandbits(1)
+            self.compactors[level + 1].extend(compactor[offset::2])
+            compactor[:] = odd
+
+    def merge(self, other):
+        """Merge the other sketch into this one."""
+        while len(self.compactors) < len(other.compactors):
+            self.compactors.append([])
+
+        for compactor, values in zip(self.compactors, other.compactors):
+            compactor.extend(values)
+
+        self.count += other.count
+        self.compress()
+        return self
+
+    def quantiles(self, fractions):
+        """List of the estimated quantiles of the specified fractions,
+        zeros, when the sketch is empty.
+
+        fractions: A list of the fractions, like [0.5, 0.99]."""
+        weighted = sorted((value, 1 << level)
+                          for level, compactor in enumerate(self.compactors)
+                          for value in compactor)
+        if not weighted:
+            return [0.0] * len(fractions)
+
+        values = numpy.array([value for value, _ in weighted], dtype=float)
+        ranks = numpy.cumsum([weight for _, weight in weighted])
+
+        positions = numpy.searchsorted(
+            ranks, numpy.asarray(fractions) * ranks[-1], side="left")
+        positions = numpy.minimum(positions, len(values) - 1)
+        return values[positions].tolist()
+
+
+class CountMin:
+    """Define a Count-Min sketch of the counts of the values.
+
+    The estimated count is never less than the true count, the excess
+    is bounded by the total count divided by the width of the sketch.
+    The sketches of the same shape are merged by adding the tables."""
+
+    def __init__(self, width=256, depth=4):
+        """Create a new instance of the sketch.
+
+        width: A count of the counters in each row.
+        depth: A count of the rows with the independent hashes."""
+        super().__init__()
+        self.width = width
+        self.depth = depth
+        self.table = numpy.zeros((depth, width), dtype=numpy.int64)
+
+    def columns(self, value):
+        """List of the columns of the value in each row, the hashes of
+        the rows are derived from the single fingerprint."""
+        digest = fingerprint(value)
+        first, second = digest >> 32, digest & 0xffffffff
+        return [(first + row * second) % self.width
+                for row in range(self.depth)]
+
+    def update(self, counts):
+        """Add the counts of the values to the sketch.
+
+        counts: A dictionary of the values and their counts."""
+        if not counts:
+            return
+
+        columns = numpy.array([self.columns(value) for value in counts])
+        weights = numpy.fromiter(counts.values(), dtype=numpy.int64,
+                                 count=len(counts))
+
+        for row in range(self.depth):
+            self.table[row] += numpy.bincount(
+                columns[:, row], weights=weights,
+                minlength=self.width).astype(numpy.int64)
+
+    def estimate(self, value):
+        """Estimated count of the value."""
+        return int(min(self.table[row, column] for row, column
+                       in enumerate(self.columns(value))))
+
+    def merge(self, other):
+        """Merge the other sketch of the same shape into this one."""
+        if self.table.shape != other.table.shape:
+            raise ValueError("Shapes of the sketches differ: %s and %s" %
+                             (self.table.shape, other.table.shape))
+
+        self.table += other.table
+        return self
+
+
+class HeavyHitters:
+    """Define a summary of the most frequent values.
+
+    While the count of the distinct values fits into the buffer, the
+    values are counted exactly. Then the counts of all values are kept
+    in the Count-Min sketch and the candidates of the most frequent
+    values are tracked with the Space-Saving algorithm, so the
+    candidates of the merged summaries are ranked by the counts of the
+    merged sketch. The reported counts are bounded by both."""
+
+    # Define a count of the distinct values counted exactly, before
+    # they are added to the Count-Min sketch.
+    buffersize = 1024
+
+    def __init__(self, size=10, width=256, depth=4):
+        """Create a new instance of the summary.
+
+        size:  A count of the most frequent values to report, twice as
+               many candidates are tracked.
+        width: A width of the Count-Min sketch.
+        depth: A depth of the Count-Min sketch."""
+        super().__init__()
+        self.size = size
+        self.capacity = size * 2
+        self.width = width
+        self.depth = depth
+
+        self.candidates = {}
+        self.sketch = None
+        self.counts = collections.Counter()
+
+    def flush(self):
+        """Add the buffered counts to the Count-Min sketch."""
+        if self.sketch is not None and self.counts:
+            self.sketch.update(self.counts)
+            self.counts.clear()
+
+    def overflow(self):
+        """Start counting the values in the Count-Min sketch, when the
+        distinct values do not fit into the buffer."""
+        self.candidates = dict(heapq.nlargest(
+            self.capacity, self.counts.items(), key=lambda vc: (vc[1], vc[0])))
+        self.sketch = CountMin(self.width, self.depth)
+        self.flush()
+
+    def estimate(self, value):
+        """Estimated count of the value, it is never less than the true
+        count, and it is exact until the summary overflows."""
+        count = self.counts.get(value, 0)
+        if self.sketch is not None:
+            count += self.sketch.estimate(value)
+        return count
+
+    def add(self, value):
+        """Count the value."""
+        counts = self.counts
+        counts[value] += 1
+
+        if self.sketch is None:
+            if len(counts) > self.buffersize:
+                self.overflow()
+            return
+
+        if len(counts) >= self.buffersize:
+            self.flush()
+
+        candidates = self.candidates
+        if value in candidates:
+            candidates[value] += 1
+        elif len(candidates) < self.capacity:
+            candidates[value] = 1
+        else:
+            # The least frequent candidate is replaced, the count of
+            # the new candidate is overestimated.
+            minimum = min(candidates, key=candidates.get)
+            candidates[value] = candidates.pop(minimum) + 1
+
+    def merge(self, other):
+        """Merge the other summary into this one."""
+        self.counts.update(other.counts)
+
+        if self.sketch is None and other.sketch is None:
+            if len(self.counts) > self.buffersize:
+                self.overflow()
+            return self
+
+        if self.sketch is None:
+            self.overflow()
+        if other.sketch is not None:
+            self.sketch.merge(other.sketch)
+        if len(self.counts) >= self.buffersize:
+            self.flush()
+
+        # Rank the candidates of the both summaries by the merged counts.
+        candidates = set(self.candidates) | set(
+            other.candidates if other.sketch is not None else other.counts)
+        counts = {value: self.estimate(value) for value in candidates}
+        self.candidates = dict(heapq.nlargest(
+            self.capacity, counts.items(), key=lambda vc: (vc[1], vc[0])))
+        return self
+
+    def items(self):
+        """List of pairs of the most frequent values and their counts
+        in the descending order of the counts."""
+        if self.sketch is None:
+            counts = self.counts
+        else:
+            # The counts of the candidates inherit the counts of the
+            # replaced candidates, so they are bounded by the sketch.
+            counts = {value: min(count, self.estimate(value))
+                      for value, count in self.candidates.items()}
+
+        return sorted(counts.items(),
+                      key=lambda vc: (-vc[1], vc[0]))[:self.size]
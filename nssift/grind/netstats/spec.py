@@ -0,0 +1,68 @@
+import json
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+from nssift.grind.netstats import gauge
+from nssift.grind.netstats.bundler import ArrayBundler
+from nssift.grind.netstats.bundler import Bundler
+from nssift.grind.netstats.factory import BundlerFactory
+
+
+# Define the names of the bundlers used in the specifications.
+bundlers = {"plain": Bundler, "array": ArrayBundler}
+
+
+def load(filename):
+    """Load the specification of the gauges from the JSON file, or from
+    the YAML file, when the name ends with .yaml or .yml.
+
+    filename: A name of the specification file."""
+    with open(filename) as textfile:
+        if not filename.endswith((".yaml", ".yml")):
+            return json.load(textfile)
+
+        if yaml is None:
+            raise ImportError("The PyYAML package is required "
+                              "to load the YAML specifications.")
+        return yaml.safe_load(textfile)
+
+
+def build(spec, windows=None):
+    """Create a new bundler factory of the gauges of the specification.
+
+    spec:    A dictionary of the specification.
+
+             Example: {"bundler": "array",
+                       "windows": [60, 24],
+                       "gauges": [{"gauge": "NumberGauge",
+                                   "keys": ["meta", "query"]},
+                                  {"gauge": "SetGauge",
+                                   "keys": ["meta", "qtype"],
+                                   "type": "REQUEST"}]}
+
+    windows: A pair of the width of the time windows in seconds and the
+             count of the latest windows, it overrides the windows of
+             the specification."""
+    gauges = []
+    for params in spec.get("gauges", []):
+        kwargs = dict(params)
+        name = kwargs.pop("gauge", None)
+        keys = kwargs.pop("keys", [])
+
+        klass = getattr(gauge, str(name), None)
+        if not (isinstance(klass, type) and issubclass(klass, gauge.Gauge)
+                and klass is not gauge.Gauge):
+            raise ValueError("Unknown gauge: %s" % name)
+
+        gauges.append((klass, list(keys), kwargs))
+
+    name = spec.get("bundler", "plain")
+    if name not in bundlers:
+        raise ValueError("Unknown bundler: %s" % name)
+
+    windows = windows or spec.get("windows")
+    return BundlerFactory(gauges, bundler=bundlers[name],
+                          windows=tuple(windows) if windows else None)
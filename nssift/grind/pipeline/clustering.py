@@ -1,7 +1,10 @@
 import datetime
 import itertools
+import json
 import numpy
 import logging
+import operator
+import os
 
 from matplotlib import pyplot
 from mpl_toolkits.mplot3d import Axes3D
@@ -30,6 +33,27 @@ class ClusteringStream(stream.Stream):
         _, bundler = value
         return numpy.array(bundler.normalize())
 
+    def describe(self, value):
+        """Translate the result of statistics collection to the tuple
+        of the host, the numpy array and the description of the host."""
+        host, bundler = value
+        return host, self.array(value), bundler.describe()
+
+    def render_hosts(self, filename, hosts):
+        """Render the hosts with their statistics and descriptions into
+        the file prefixed by the "hosts" word, one JSON object per line
+        in the order of the points."""
+        hosts_filename = os.path.join(
+            os.path.dirname(filename), "hosts-%(filename)s" % {
+                "filename": os.path.basename(filename)})
+
+        with open(hosts_filename, "w") as textfile:
+            for host, point, description in hosts:
+                json.dump({"host": host,
+                           "point": point.tolist(),
+                           "description": description}, textfile)
+                textfile.write("\n")
+
     def render_textfile(self, filename, points):
         """Render the specified list of points into the empty file."""
         with open(filename, "w") as textfile:
@@ -44,8 +68,9 @@ class ClusteringStream(stream.Stream):
 
         centers: An array of the cluster centers.
         points:  An array of the host statistics."""
-        centers_filename = "centers-%(filename)s" % {
-            "filename": filename}
+        centers_filename = os.path.join(
+            os.path.dirname(filename), "centers-%(filename)s" % {
+                "filename": os.path.basename(filename)})
 
         self.render_textfile(filename, points)
         self.render_textfile(centers_filename, centers)
@@ -86,12 +111,14 @@ class ClusteringStream(stream.Stream):
 
         rdd: RDD result of the statistics aggregation."""
         # Convert the aggregated statistics to the points
-        # of the n-dimensional pointers.
-        stats_rdd = rdd.map(self.array)
+        # of the n-dimensional pointers along with the hosts.
+        hosts_rdd = rdd.map(self.describe).cache()
+        stats_rdd = hosts_rdd.map(operator.itemgetter(1))
 
         # Produce the clusters from the aggregated statistics.
         clusters = KMeans.train(stats_rdd, params.clusters)
-        points = stats_rdd.collect()
+        hosts = hosts_rdd.collect()
+        points = [point for _, point, _ in hosts]
 
         # Render the collected statistics into the specified
         # file name. If the file is not specified the data will
@@ -103,6 +130,11 @@ class ClusteringStream(stream.Stream):
             params.destination_path_name,
             clusters.centers, points)
 
+        # The hosts are written next to the points with the
+        # descriptions of the statistics, like the most
+        # queried domain names.
+        self.render_hosts(params.destination_path_name, hosts)
+
         # Render a plot with a accumulated statistics and
         # cluster centers.
         if params.render_plot:
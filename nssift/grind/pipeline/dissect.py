@@ -1,7 +1,13 @@
 import logging
 
 from nssift.grind.dissect.dnsdump import DnsDump
-from nssift.grind.fileutil.bzloader import BzLoader
+from nssift.grind.dissect.failures import Failures
+from nssift.grind.dissect.failures import FailuresParam
+from nssift.grind.dissect.record import Interner
+from nssift.grind.dissect.wire import DnsWire
+from nssift.grind.fileutil.index import Index
+from nssift.grind.fileutil.loader import Loader
+from nssift.grind.fileutil.planner import Planner
 from nssift.grind.pipeline import stream
 
 
@@ -16,49 +22,156 @@ class DissectionStream(stream.Stream):
     # the DNS dump files into the chunks.
     splitstring = "---"
 
-    def uncompress(self, filename):
-        """Generator of the compressed DNS request/response
-        chunks.
+    # Define an upper bound of the single chunk size in bytes, so
+    # the broken archives will not exhaust the memory of workers.
+    chunk_maxsize = 1024 * 1024
+
+    # Define a minimum compressed size of the archive split in bytes,
+    # the larger multi-stream archives are processed by several tasks.
+    split_size = 128 * 1024 * 1024
+
+    # Define a count of the chunks failed to be dissected, that are
+    # sampled into the quarantine file.
+    quarantine_size = 100
+
+    # Define an accumulator of the dissection failures.
+    failures = None
+
+    def __init__(self, chunk_maxsize=None, split_size=None, projection=None):
+        """Initialize a new instance of the dissection stream.
+
+        chunk_maxsize: An upper bound of the chunk size in bytes.
+        split_size:    A minimum size of the archive split in bytes.
+        projection:    A projection of the dissected fields, by default
+                       all fields are dissected."""
+        super(DissectionStream, self).__init__()
+        if chunk_maxsize is not None:
+            self.chunk_maxsize = chunk_maxsize
+        if split_size is not None:
+            self.split_size = split_size
+
+        # The dissectors do not keep the state between the chunks,
+        # so the same instances are used for all of them.
+        self.dnsdump = DnsDump(projection)
+        self.dnswire = DnsWire(projection)
+
+    def partition(self, filename):
+        """List of the splits of the compressed DNS dump. The offsets
+        of the compressed streams are taken from the sidecar index of
+        the archive, when it exists.
 
         filename: A compressed DNS dump."""
-        return BzLoader(filename).load(self.splitstring)
+        index = Index.load(filename)
+        offsets = index.offsets if index else None
+        return Loader.isplits(filename, self.split_size, offsets)
+
+    def loader(self, split):
+        """Loader of the archive split.
+
+        split: A split of the compressed DNS dump."""
+        return Loader(split.filename, self.chunk_maxsize,
+                      split.start, split.end)
+
+    def uncompress(self, split):
+        """Pair of the dissector of the archive split and the generator
+        of the compressed DNS request/response chunks. The chunks of
+        the network captures are the captured DNS messages.
+
+        The archive is uncompressed lazily, so only a bounded
+        amount of the data is kept in memory.
 
-    def dissect(self, text):
-        """Dissect the chunks of the DNS dumps, so we could
-        calculate the actual statistics.
+        split: A split of the compressed DNS dump."""
+        loader = self.loader(split)
+        if loader.iscapture():
+            return self.dnswire, loader.icapture()
+        return self.dnsdump, loader.iload(self.splitstring)
 
-        text: A DNS dump chunk."""
-        return DnsDump().dissect(text)
+    def idissect(self, splits):
+        """Generator of the dissections of the partition splits. The
+        chunks failed to be dissected are omitted.
+
+        The dissectors are deserialized once for the partition, so the
+        interned strings and the compiled expressions are shared by all
+        splits of the partition.
+
+        splits: An iterable of the splits of the compressed DNS dumps."""
+        failures = Failures(self.quarantine_size)
+        self.dnsdump.failures = self.dnswire.failures = failures
+
+        # The repeated names and record data are interned only within
+        # the partition, so the memory is released with the partition.
+        interner = Interner()
+        self.dnsdump.interner = self.dnswire.interner = interner
+
+        for split in splits:
+            dissector, chunks = self.uncompress(split)
+            yield from dissector.dissect_many(chunks)
+
+        # The failures are sent to the driver once for the partition.
+        if self.failures is not None:
+            self.failures.add(failures)
 
     def launch(self, sc, rdd, params):
-        """First stage of the processing bzip2 archives with
+        """First stage of the processing compressed archives with
         DNS dump is to uncompress the data and perform the
         text dividing into the chunks."""
+        # The failed chunks are sampled only when they are written.
+        if not params.quarantine:
+            self.quarantine_size = 0
+
+        self.failures = sc.accumulator(
+            Failures(self.quarantine_size),
+            FailuresParam(self.quarantine_size))
+
+        planner = Planner(include=params.include,
+                          exclude=params.exclude,
+                          since=params.since,
+                          until=params.until)
+
         # Parallelize the archives processing.
-        filenames_rdd = sc.parallelize(
-            BzLoader.isearch(params.source_path_name))
+        filenames = list(planner.isearch(params.source_path_name))
+        filenames_rdd = sc.parallelize(filenames)
 
         LOG.info("Searching for the DNS dumps archives in the "
                  "folder: '%(source_path_name)s'." %
                  {"source_path_name": params.source_path_name})
 
-        # For each the bzip archive, load the content and split it
-        # into the chunks that could be dissected later.
-        filechunks_rdd = filenames_rdd.flatMap(self.uncompress)
-        LOG.info("Uncompressing the DNS dumps files content.")
-
-        # Try to parse every piece of the DNS dump and put
-        # the collected information into the easy-to-use
-        # dictionary.
-        dissections_rdd = filechunks_rdd.map(self.dissect)
+        # Divide the large archives into the splits, the splits are
+        # small enough to be collected on the driver.
+        splits = filenames_rdd.flatMap(self.partition).collect()
+        LOG.info("Splitting the DNS dumps archives.")
+
+        # Distribute the splits into the partitions of nearly the same
+        # size, so a single partition does not get all large archives.
+        partitions = params.partitions or sc.defaultParallelism
+        bins = planner.pack(splits, partitions)
+
+        splits_rdd = sc.parallelize(bins, max(len(bins), 1))
+        splits_rdd = splits_rdd.flatMap(lambda splits: splits)
+        LOG.info("Planned %(count)d splits into %(bins)d partitions." %
+                 {"count": len(splits), "bins": len(bins)})
+
+        # For each the archive, load the content, split it into
+        # the chunks and parse every piece of the DNS dump into the
+        # compact record. The whole partition is processed by the
+        # same dissectors, and the chunks failed to be dissected on
+        # the corrupted data are omitted right away.
+        dissections_rdd = splits_rdd.mapPartitions(self.idissect)
         LOG.info("Dissecting the DNS requests and responses.")
 
-        # The dissection could fail on the corrupted data, in this
-        # case it will be resulted in the None values, so we have
-        # to filter them out.
-        dissections_rdd = dissections_rdd.filter(self.nonefilter)
-        LOG.info("Filtering unsuccessful dissections.")
-
         # Return the result data set parsed and filtered. Now data
         # should be ready for statistics collection.
         return dissections_rdd
+
+    def finish(self, sc, params):
+        """Report the dissection failures and write the quarantined
+        chunks into the file."""
+        failures = self.failures.value
+        failures.report(LOG)
+
+        if params.quarantine:
+            failures.dump(params.quarantine)
+            LOG.info("Quarantined %(count)d failed chunks into the file: "
+                     "'%(filename)s'" % {
+                         "count": len(failures.quarantine.items()),
+                         "filename": params.quarantine})
@@ -1,5 +1,13 @@
+import collections
+import json
 import logging
+import operator
+import os
+import socket
 
+from nssift.grind.dissect.failures import Failures
+from nssift.grind.dissect.failures import FailuresParam
+from nssift.grind.dissect.projection import Projection
 from nssift.grind.pipeline import stream
 
 
@@ -8,17 +16,92 @@ LOG = logging.getLogger(__name__)
 
 class StatisticsStream(stream.Stream):
     """Define a stream to process the statistics collection.
-    Calculate the statistics for each IP address.
+    Calculate the statistics for each IP address, and optionally for
+    each subnet and each registered domain in the same pass.
     """
 
-    def __init__(self, factory):
+    def __init__(self, factory, window=None, transaction_maxsize=None,
+                 dimensions=None):
         """Initialize a new instance of the statistics
         collection stream.
 
-        factory: A bundler factory instance."""
+        factory:             A bundler factory instance.
+        window:              A duration of the time buckets of the
+                             transactions in seconds.
+        transaction_maxsize: A maximum count of the packets in
+                             the transaction.
+        dimensions:          A list of the names of the dimensions to
+                             aggregate the transactions by, like "host",
+                             "subnet" or "domain". The statistics of the
+                             first dimension are passed to the next
+                             stream, by default the hosts only."""
         super(StatisticsStream, self).__init__()
         self.factory = factory
 
+        if window is not None:
+            self.window = window
+        if transaction_maxsize is not None:
+            self.transaction_maxsize = transaction_maxsize
+        if dimensions:
+            unknown = set(dimensions) - set(self.spanners)
+            if unknown:
+                raise ValueError("Unknown dimensions: %s" %
+                                 ", ".join(sorted(unknown)))
+            self.dimensions = list(dimensions)
+
+    # Define a nested key of the host address of the transaction.
+    host_keys = ["meta", "query_ip"]
+
+    # Define a nested key of the domain name of the transaction.
+    domain_keys = ["meta", "qname"]
+
+    # Define the dimensions to aggregate the transactions by and the
+    # names of the methods spanning the transactions into them.
+    spanners = collections.OrderedDict((("host", "span_host"),
+                                        ("subnet", "span_subnet"),
+                                        ("domain", "span_domain")))
+
+    dimensions = ["host"]
+
+    # Define the prefix lengths of the IPv4 and IPv6 subnets.
+    subnet_prefixes = {socket.AF_INET: 24, socket.AF_INET6: 48}
+
+    # Define the second-level labels, under which the domains are
+    # registered in the country-code top-level domains, like co.uk.
+    second_levels = frozenset(("ac", "co", "com", "edu", "gov", "ltd",
+                               "me", "mil", "net", "nic", "or", "org",
+                               "plc", "sch"))
+
+    # Define the nested keys of the packet fields identifying the
+    # transaction besides the DNS identifier, which is only 16 bits.
+    transaction_keys = [["meta", "query_ip"],
+                        ["meta", "query_port"],
+                        ["meta", "response_ip"],
+                        ["meta", "timestamp"]]
+
+    # Define a duration of the time buckets of the transactions, so
+    # the reused identifiers of the client are not grouped together.
+    window = 60
+
+    # Define a maximum count of the packets in the transaction, the
+    # packets over the limit are dropped.
+    transaction_maxsize = 16
+
+    # Define a maximum count of the unpaired transactions buffered in
+    # the partition, before they are left to the global grouping.
+    pairing_size = 65536
+
+    # Define an accumulator of the gauge updates failures.
+    failures = None
+
+    def projection(self):
+        """Projection of the dissected fields used to collect the
+        statistics."""
+        keys = self.factory.keys() + [self.host_keys] + self.transaction_keys
+        if "domain" in self.dimensions:
+            keys.append(self.domain_keys)
+        return Projection(keys)
+
     def _getattr(self, keys, value):
         """Value of the deeply nested key."""
         for key in keys:
@@ -32,37 +115,268 @@ class StatisticsStream(stream.Stream):
         keys: A list of nested keys."""
         return lambda value: (self._getattr(keys, value), value)
 
+    def span_transaction(self, value):
+        """Span the packet into the tuple of the transaction key and
+        the packet. The key is composed of the DNS identifier, the
+        addresses and the port of the client and the time bucket.
+
+        value: A request or response DNS packet."""
+        meta = value["transaction"][0]["meta"]
+
+        # The responses of the text dumps carry no addresses, so they
+        # are keyed by the identifier only and matched to the requests
+        # of the same identifier.
+        if meta.get("query_ip") is None:
+            return self.identifier_key(value["id"]), value
+
+        # The packets without time stamps are grouped regardless
+        # of the time.
+        try:
+            bucket = int(float(meta["timestamp"]) // self.window)
+        except (KeyError, TypeError, ValueError):
+            bucket = None
+
+        key = (value["id"],
+               meta.get("query_ip"),
+               meta.get("query_port"),
+               meta.get("response_ip"),
+               bucket)
+        return key, value
+
     def join_transaction(self, a, b):
         """Group the packets payloads of the same transaction.
 
         a, b: A request or response DNS packet."""
-        # Simply extend the list of packets.
-        a["transaction"].extend(b["transaction"])
+        transaction = a["transaction"]
+        room = self.transaction_maxsize - len(transaction)
+
+        # The packets over the limit of the transaction are dropped,
+        # so the colliding keys could not produce huge transactions.
+        dropped = len(b["transaction"]) - max(room, 0)
+        if dropped > 0 and self.failures is not None:
+            failures = Failures()
+            failures.fail(Failures.OVERSIZE, count=dropped)
+            self.failures.add(failures)
+
+        transaction.extend(b["transaction"][:max(room, 0)])
         return a
 
+    def isleftover(self, flagpair):
+        """True if the transaction is left unpaired in the partition."""
+        return not flagpair[0]
+
+    def identifier_key(self, msgid):
+        """Transaction key of the packet without the addresses."""
+        return (msgid, None, None, None, None)
+
+    def isrequest(self, value):
+        """True if the transaction has the request and False otherwise."""
+        return any(payload["type"] == "REQUEST"
+                   for payload in value["transaction"])
+
+    def matching_keys(self, key, request):
+        """List of the keys the packet is matched by. The requests are
+        matched by the responses of the same key, and by the responses
+        of the same identifier without the addresses."""
+        identifier = self.identifier_key(key[0])
+        if request and key != identifier:
+            return [key, identifier]
+        return [key]
+
+    def pair(self, keypairs, bounded=True):
+        """Pair the requests and the responses. Return a generator of
+        the tuples of the flag, whether the transaction is paired, and
+        the pair of the transaction key and the transaction.
+
+        Each request is paired with a single response, so the packets of
+        the distinct transactions sharing the key are never merged.
+
+        keypairs: An iterable of pairs of the transaction key and
+                  the packet.
+        bounded:  Leave the unpaired packets, when the buffer is full
+                  or the time bucket of the packet is passed."""
+        pending = collections.OrderedDict()
+
+        # The sequence numbers of the pending requests and responses
+        # by the keys they are matched by, in the order of arrival.
+        requests, responses = {}, {}
+
+        def find(index, keys):
+            for matching_key in keys:
+                numbers = index.get(matching_key)
+                while numbers:
+                    number = numbers.popleft()
+                    if number in pending:
+                        return number
+                index.pop(matching_key, None)
+            return None
+
+        def forget(key, value):
+            request = self.isrequest(value)
+            index = requests if request else responses
+            for matching_key in self.matching_keys(key, request):
+                numbers = index.get(matching_key)
+                while numbers and numbers[0] not in pending:
+                    numbers.popleft()
+                if not numbers:
+                    index.pop(matching_key, None)
+
+        for number, (key, value) in enumerate(keypairs):
+            request = self.isrequest(value)
+            keys = self.matching_keys(key, request)
+
+            found = find(responses if request else requests, keys)
+            if found is not None:
+                other_key, other = pending.pop(found)
+                if request:
+                    value = self.join_transaction(value, other)
+                else:
+                    key, value = other_key, self.join_transaction(other, value)
+                yield True, (key, value)
+            else:
+                pending[number] = (key, value)
+                index = requests if request else responses
+                for matching_key in keys:
+                    index.setdefault(matching_key, collections.deque()).append(
+                        number)
+
+            if not bounded:
+                continue
+
+            # The time bucket is the last element of the key, the data
+            # of the archive is expected to be nearly ordered by time.
+            bucket = key[-1]
+            while pending:
+                oldest, (oldest_key, oldest_value) = next(
+                    iter(pending.items()))
+                expired = (bucket is not None and
+                           oldest_key[-1] is not None and
+                           oldest_key[-1] < bucket - 1)
+                if not expired and len(pending) <= self.pairing_size:
+                    break
+
+                del pending[oldest]
+                forget(oldest_key, oldest_value)
+                yield False, (oldest_key, oldest_value)
+
+        for keypair in pending.values():
+            yield False, keypair
+
+    def pair_partition(self, keypairs):
+        """Pair the requests and the responses within the partition.
+
+        The unpaired packets are buffered until the buffer is full or
+        the time bucket of the packet is passed, then they are left for
+        the global pairing.
+
+        keypairs: An iterable of pairs of the transaction key and
+                  the packet."""
+        return self.pair(keypairs)
+
+    def span_identifier(self, keypair):
+        """Span the packet into the tuple of the DNS identifier and the
+        pair of the transaction key and the packet."""
+        return keypair[0][0], keypair
+
+    def pair_identifier(self, idpair):
+        """List of the transactions of the packets of the same DNS
+        identifier, the unpaired packets are kept as is."""
+        _, keypairs = idpair
+        return [keypair for _, keypair in self.pair(keypairs, False)]
+
     def span_host(self, keypair):
         """Span the transaction into the tuple of source IP
-        address and the bundle of counters."""
+        address and the transaction."""
         _, value = keypair
         # At first, we are going to find the IP address
         # to use it as a key.
         transaction = value.get("transaction", [])
 
         for payload in transaction:
-            query_ip = self._getattr(["meta", "query_ip"], payload)
+            query_ip = self._getattr(self.host_keys, payload)
 
             # Looks like this payload does not have the IP address
             # so lets look into the another one.
             if not query_ip:
                 continue
 
-            # Define a new bundler using the factory. Update the
-            # bundler counters with the transaction data.
-            bundler = self.factory.build()
-            bundler.updateall(transaction)
+            # Return a pair of query IP address and the transaction.
+            return query_ip, transaction
+
+    def subnet(self, address):
+        """The subnet of the IP address in the CIDR notation, None
+        if the address is invalid.
+
+        The address is masked as an integer, like 10.0.0.1 is rolled up
+        into 10.0.0.0/24."""
+        family = socket.AF_INET6 if ":" in address else socket.AF_INET
+        try:
+            packed = socket.inet_pton(family, address)
+        except (OSError, TypeError, ValueError):
+            return None
+
+        bits = len(packed) * 8
+        prefix = self.subnet_prefixes[family]
+        network = int.from_bytes(packed, "big") >> (bits - prefix) << (
+            bits - prefix)
+
+        return "%s/%d" % (socket.inet_ntop(
+            family, network.to_bytes(len(packed), "big")), prefix)
+
+    def span_subnet(self, keypair):
+        """Span the transaction into the tuple of the subnet of the
+        source IP address and the transaction."""
+        host = self.span_host(keypair)
+        if host is None:
+            return None
+
+        query_ip, transaction = host
+        subnet = self.subnet(str(query_ip))
+        return (subnet, transaction) if subnet else None
+
+    def registered_domain(self, qname):
+        """The registered domain of the domain name, the label under
+        the public suffix, like example.co.uk for www.example.co.uk.
+
+        The public suffix is approximated by the top-level domain and
+        the common second-level labels of the country-code domains."""
+        labels = qname.lower().rstrip(".").split(".")
+        if not labels[-1]:
+            return None
+
+        size = 2
+        if (len(labels) > 2 and len(labels[-1]) == 2 and
+                labels[-2] in self.second_levels):
+            size = 3
+
+        return ".".join(labels[-size:]) + "."
+
+    def span_domain(self, keypair):
+        """Span the transaction into the tuple of the registered domain
+        of the requested name and the transaction."""
+        _, value = keypair
+        transaction = value.get("transaction", [])
+
+        for payload in transaction:
+            try:
+                qname = self._getattr(self.domain_keys, payload)
+            except AttributeError:
+                continue
+
+            if qname and isinstance(qname, str):
+                domain = self.registered_domain(qname)
+                return (domain, transaction) if domain else None
+
+    def create_host(self, transaction):
+        """Create the bundle of counters of the host with the data of
+        the first transaction of the host in the partition."""
+        return self.update_host(self.factory.build(), transaction)
 
-            # Return a pair of query IP address and the counters.
-            return query_ip, bundler
+    def update_host(self, bundler, transaction):
+        """Update the bundle of counters of the host with the data of
+        the transaction. The bundler is updated in place."""
+        bundler.updateall(transaction)
+        return bundler
 
     def join_host(self, a, b):
         """Aggregate the statistics for each host.
@@ -71,38 +385,132 @@ class StatisticsStream(stream.Stream):
         # Return the join of the statistics.
         return a.join(b)
 
+    def account_host(self, bundler):
+        """Account the updates of the bundler failed due to the missing
+        keys. Return the bundler."""
+        missing = bundler.missing()
+        if missing and self.failures is not None:
+            failures = Failures()
+            for keypath, count in missing.items():
+                failures.fail(Failures.KEYPATH + ":" + keypath, count=count)
+            self.failures.add(failures)
+        return bundler
+
     def launch(self, sc, rdd, params):
         """Second stage of the DNS dumps processing is to perform
         the actual data collection.
 
         rdd: RDD result of the files dissection."""
-        # Span each element of the RDD into the pair of request
-        # or response identifier and the its respective content.
-        exchanges_rdd = rdd.map(self.span(["id"]))
-        LOG.info("Spanning the dissections into id-based groups.")
+        self.failures = sc.accumulator(Failures(), FailuresParam())
+
+        # Span each element of the RDD into the pair of the transaction
+        # key and the its respective content.
+        exchanges_rdd = rdd.map(self.span_transaction)
+        LOG.info("Spanning the dissections into transaction groups.")
+
+        if params.global_pairing:
+            # Pair the request/responses of the same identifier across
+            # the cluster.
+            transactions_rdd = exchanges_rdd.map(
+                self.span_identifier).groupByKey().flatMap(
+                    self.pair_identifier)
+            LOG.info("Grouping the transactions by the identifier.")
+        else:
+            # Pair the requests and responses within the partitions,
+            # since they are mostly located in the same archive, and
+            # pair only the unpaired leftovers across the cluster.
+            paired_rdd = exchanges_rdd.mapPartitions(
+                self.pair_partition).cache()
+
+            leftovers_rdd = paired_rdd.filter(self.isleftover).values()
+            leftovers_rdd = leftovers_rdd.map(
+                self.span_identifier).groupByKey().flatMap(
+                    self.pair_identifier)
+
+            transactions_rdd = paired_rdd.filter(
+                operator.itemgetter(0)).values().union(leftovers_rdd)
+            LOG.info("Pairing the transactions within the partitions.")
+
+        # The transactions are aggregated by each dimension, so they
+        # are cached to be dissected and paired only once.
+        if len(self.dimensions) > 1:
+            transactions_rdd = transactions_rdd.cache()
+
+        statistics_rdds = [
+            self.aggregate(transactions_rdd, dimension, account=not index)
+            for index, dimension in enumerate(self.dimensions)]
+
+        # The statistics of the other dimensions are rendered right away,
+        # so the stream does not keep the datasets, that could not be
+        # serialized along with its methods.
+        for dimension, statistics_rdd in zip(self.dimensions[1:],
+                                             statistics_rdds[1:]):
+            self.render_dimension(params.destination_path_name,
+                                  dimension, statistics_rdd)
 
-        # Group the request/responses into the single transaction.
-        transactions_rdd = exchanges_rdd.reduceByKey(self.join_transaction)
-        LOG.info("Grouping the transactions by the identifier.")
+        # Return the result statistics of the first dimension for
+        # further processing.
+        return statistics_rdds[0]
 
-        # At this step we will generate the pairs with an IP address
-        # as a key and a Bundler instance as a value.
+    def aggregate(self, transactions_rdd, dimension, account=True):
+        """Aggregate the statistics of the transactions by the keys of
+        the dimension.
+
+        transactions_rdd: RDD of the transactions.
+        dimension:        A name of the dimension.
+        account:          Account the missing keys of the statistics."""
+        # At this step we will generate the pairs with a key of the
+        # dimension, like an IP address, and a transaction as a value.
         #
-        # It is required, since later we will join the bundler results
-        # by the IP address.
-        hosts_rdd = transactions_rdd.map(self.span_host)
-        LOG.info("Spanning the transactions into IP-based groups.")
-
-        # The above mapping could return None if the IP address
-        # for some reason was not defined in the transaction
-        # metadata. Therefore we should filter the results.
-        hosts_rdd = hosts_rdd.filter(self.nonefilter)
-        LOG.info("Filtering the invalid transactions.")
-
-        # Now we are going to aggregate the statistics for each
-        # IP address participated in the DNS activity.
-        statistics_rdd = hosts_rdd.reduceByKey(self.join_host)
-        LOG.info("Gathering statistics for each IP address.")
-
-        # Return the result statistics for further processing.
+        # It is required, since later we will aggregate the transactions
+        # by the key.
+        keys_rdd = transactions_rdd.map(
+            getattr(self, self.spanners[dimension]))
+        LOG.info("Spanning the transactions into %s-based groups.",
+                 dimension)
+
+        # The above mapping could return None if the key for some
+        # reason was not defined in the transaction metadata.
+        # Therefore we should filter the results.
+        keys_rdd = keys_rdd.filter(self.nonefilter)
+
+        # Now we are going to aggregate the statistics for each key
+        # participated in the DNS activity. A single bundler is updated
+        # for each key in the partition, so only the merged statistics
+        # are shuffled.
+        statistics_rdd = keys_rdd.combineByKey(
+            self.create_host, self.update_host, self.join_host)
+
+        # The missing keys of the transactions are accounted only once,
+        # when the transactions are aggregated by several dimensions.
+        if account:
+            statistics_rdd = statistics_rdd.mapValues(self.account_host)
+
+        LOG.info("Gathering statistics for each %s.", dimension)
         return statistics_rdd
+
+    @staticmethod
+    def describe(keypair):
+        """Translate the statistics of the key to the dictionary of the
+        key, the normalized statistics and their description."""
+        key, bundler = keypair
+        return {"key": key,
+                "point": [float(value) for value in bundler.normalize()],
+                "description": bundler.describe()}
+
+    def render_dimension(self, filename, dimension, rdd):
+        """Render the statistics of the dimension into the file prefixed
+        by the name of the dimension, one JSON object per line."""
+        dimension_filename = os.path.join(
+            os.path.dirname(filename), "%(dimension)s-%(filename)s" % {
+                "dimension": dimension,
+                "filename": os.path.basename(filename)})
+
+        with open(dimension_filename, "w") as textfile:
+            for description in rdd.map(self.describe).toLocalIterator():
+                json.dump(description, textfile)
+                textfile.write("\n")
+
+    def finish(self, sc, params):
+        """Report the gauge updates failures."""
+        self.failures.value.report(LOG)
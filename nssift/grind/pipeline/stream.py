@@ -12,6 +12,15 @@ class Stream(metaclass=abc.ABCMeta):
         """True if the value is not equal to None and False otherwise."""
         return value is not None
 
+    def finish(self, sc, params):
+        """Report the results of the stream processing, when all
+        streams are processed.
+
+        This method could be overridden in the derived classes.
+
+        sc:     A spark context instance.
+        params: A dictionary with a shared set parameters."""
+
     @abc.abstractmethod
     def launch(self, sc, rdd, params):
         """Launch the stream processing of the optionally specified RDD.
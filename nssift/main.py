@@ -1,11 +1,13 @@
 import nssift
 import nssift.shell
 import nssift.shell.commands.grind
+import nssift.shell.commands.index
 
 
 def main():
     app = nssift.shell.App(prog="nssift", modules=[
         nssift.shell.commands.grind.Grind,
+        nssift.shell.commands.index.Index,
     ])
 
     app.setup()
@@ -4,6 +4,7 @@ import nssift.shell
 
 from nssift.grind.cluster import Cluster
 from nssift.grind.cluster import streams
+from nssift.grind.fileutil.planner import parsetime
 
 
 
@@ -35,11 +36,73 @@ class Grind(nssift.shell.Command):
         (["-r", "--render-plot"],
          dict(action="store_true",
               help="Render an image of clustered data.")),
+
+        (["-i", "--include"],
+         dict(metavar="PATTERN",
+              action="append",
+              help="A pattern of archive file names to process.")),
+
+        (["-e", "--exclude"],
+         dict(metavar="PATTERN",
+              action="append",
+              help="A pattern of archive file names to skip.")),
+
+        (["--since"],
+         dict(metavar="YYYYMMDD[_HHMM]",
+              type=parsetime,
+              help="Skip archives with older time stamp in the name.")),
+
+        (["--until"],
+         dict(metavar="YYYYMMDD[_HHMM]",
+              type=parsetime,
+              help="Skip archives starting from this time stamp.")),
+
+        (["-q", "--quarantine"],
+         dict(metavar="FILENAME",
+              help="A file to write a sample of the failed chunks.")),
+
+        (["-p", "--partitions"],
+         dict(metavar="PARTITIONS",
+              type=int,
+              help="Count of partitions to distribute archives.")),
+
+        (["-w", "--window"],
+         dict(metavar="SECONDS",
+              type=int,
+              help="Collect statistics in the time windows of this width.")),
+
+        (["--windows"],
+         dict(metavar="COUNT",
+              type=int,
+              default=24,
+              help="Count of the latest time windows to keep.")),
+
+        (["-g", "--gauges"],
+         dict(metavar="FILENAME",
+              help="A JSON or YAML file with the specification of "
+                   "the gauges to collect.")),
+
+        (["-a", "--aggregate"],
+         dict(metavar="DIMENSION",
+              action="append",
+              choices=["host", "subnet", "domain"],
+              help="Aggregate statistics by the host, the subnet or the "
+                   "registered domain, the first one is clustered.")),
+
+        (["--global-pairing"],
+         dict(action="store_true",
+              help="Pair requests and responses across the cluster "
+                   "instead of within the partitions.")),
     ]
 
     def handle(self, context):
         """Launch Spark job to parse DNS traffic."""
         sc = pyspark.SparkContext(appName="nssift")
-        cluster = Cluster(streams=streams())
+        windows = None
+        if context.args.window:
+            windows = (context.args.window, context.args.windows)
+
+        cluster = Cluster(streams=streams(
+            windows, context.args.gauges, context.args.aggregate))
         cluster.launch(sc, context.args)
         sc.stop()
@@ -0,0 +1,66 @@
+import logging
+
+import nssift.shell
+
+from nssift.grind.fileutil import index
+from nssift.grind.fileutil.loader import Loader
+from nssift.grind.fileutil.planner import Planner
+from nssift.grind.pipeline.dissect import DissectionStream
+
+
+LOG = logging.getLogger(__name__)
+
+
+class Index(nssift.shell.Command):
+    """Index is a command to build the sidecar indexes of the DNS traffic
+    archives, so the later runs could plan and filter the archives without
+    decompressing them."""
+
+    name = "index"
+    aliases = ["i"]
+    help = "build sidecar indexes of DNS traffic archives"
+
+    arguments = [
+        (["-s", "--source-path"],
+         dict(metavar="SOURCE",
+              help="A path to directory with DNS traffic archives",
+              required=True)),
+
+        (["-i", "--include"],
+         dict(metavar="PATTERN",
+              action="append",
+              help="A pattern of archive file names to index.")),
+
+        (["-e", "--exclude"],
+         dict(metavar="PATTERN",
+              action="append",
+              help="A pattern of archive file names to skip.")),
+
+        (["-f", "--force"],
+         dict(action="store_true",
+              help="Rebuild the indexes, that are up to date.")),
+    ]
+
+    def handle(self, context):
+        """Build the indexes of the DNS traffic archives."""
+        args = context.args
+        planner = Planner(include=args.include, exclude=args.exclude)
+
+        for filename in planner.isearch(args.source_path):
+            # The captures are not divided by the separator lines.
+            if Loader(filename).iscapture():
+                LOG.info("Skipping the network capture: '%(filename)s'" %
+                         {"filename": filename})
+                continue
+
+            if not args.force and index.Index.load(filename):
+                LOG.info("Skipping the indexed archive: '%(filename)s'" %
+                         {"filename": filename})
+                continue
+
+            archive = index.Index.build(filename, DissectionStream.splitstring)
+            archive.dump()
+
+            LOG.info("Indexed %(records)d records of the archive: "
+                     "'%(filename)s'" % {"records": archive.records,
+                                         "filename": filename})
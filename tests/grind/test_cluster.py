@@ -0,0 +1,17 @@
+import unittest
+
+from nssift.grind import cluster
+
+
+class TestCluster(unittest.TestCase):
+    """Validate the predefined statistics of the cluster."""
+
+    def test_factory_missing(self):
+        bundler = cluster.factory().build()
+        bundler.updateall([
+            {"type": "REQUEST", "meta": {"qname": "example.com.",
+                                         "qtype": "A (1)", "query": 40}},
+            {"type": "RESPONSE", "meta": {"response": 120}}])
+
+        # The fields absent in the healthy responses are not failures.
+        self.assertEqual(bundler.missing(), {})
@@ -1,6 +1,10 @@
 import unittest
 
+from nssift.grind.dissect.dig import Dig
 from nssift.grind.dissect.dnsdump import DnsDump
+from nssift.grind.dissect.projection import Projection
+from nssift.grind.dissect.proto import Proto
+from nssift.grind.dissect.record import ResourceRecord
 
 
 class TestDnsDump(unittest.TestCase):
@@ -199,3 +203,142 @@ class TestDnsDump(unittest.TestCase):
         self.assertEqual(
             result, {"id": "61168",
                      "transaction": [payload]})
+
+    def _dissect_partial(self, text):
+        splitindex = text.find(";;")
+        meta, packet = self.dnsdump.partial(Proto, Dig)(
+            text[:splitindex], text[splitindex:])
+        if not (meta and packet):
+            return None
+
+        meta = self.dnsdump.fetch_octets(meta, "query")
+        meta = self.dnsdump.fetch_octets(meta, "response")
+        return self.dnsdump.populate(meta, packet)
+
+    def test_dissect_equivalence(self):
+        texts = [
+            "query: [43 octets]\n"
+            ";; ->>HEADER<<- opcode: QUERY, rcode: NOERROR, id: 1\n"
+            ";; flags:; QUERY: 1, ANSWER: 0\n"
+            ";; QUESTION SECTION:\n;a. IN A\n"
+            ";; ANSWER SECTION:\n;; AUTHORITY SECTION:",
+
+            # The metadata line with the delimiter in the middle.
+            "response: [53 bytes] ;; ->>HEADER<<- id: 2\n"
+            ";; flags: qr aa; ANSWER: 1, AUTHORITY: 1\n"
+            ";; QUESTION SECTION: ;b. IN A\n"
+            ";; ANSWER SECTION:\nb. 60 IN A 1.2.3.4\n"
+            ";; ANSWER SECTION: b. 60 IN A 4.3.2.1\n"
+            ";; ADDITIONAL SECTION:",
+
+            # The broken header and the broken flags.
+            "query: [1 octets]\n;; ->>HEADER<<-\n;; flags:; A: 1\n;;:\n;;:",
+            "query: [1 octets]\n;; ->>HEADER<<- id: 3\n;; flags:;\n;;:\n;;:",
+            "query: [1 octets]\n;; ->>HEADER<<- id: 3\n;; flags:; A: 1\n;;:",
+        ]
+
+        for text in texts:
+            self.assertEqual(self.dnsdump.dissect(text),
+                             self._dissect_partial(text))
+
+    def test_dissect_reuse(self):
+        text = ("query: [43 octets]\n"
+                ";; ->>HEADER<<- opcode: QUERY, rcode: NOERROR, id: 1\n"
+                ";; flags:; QUERY: 1, ANSWER: 0\n"
+                ";; QUESTION SECTION:\n;; ANSWER SECTION:\n"
+                ";; AUTHORITY SECTION:")
+
+        # The result must not depend on the previously dissected chunks.
+        first = self.dnsdump.dissect(text)
+        self.assertIsNone(self.dnsdump.dissect(text.replace("query", "q")))
+        self.assertEqual(self.dnsdump.dissect(text), first)
+
+    def test_dissect_section_without_name(self):
+        result = self.dnsdump.dissect(
+            "query: [43 octets]\n"
+            ";; ->>HEADER<<- opcode: QUERY, rcode: NOERROR, id: 1\n"
+            ";; flags:; QUERY: 1, ANSWER: 0\n"
+            ";; QUESTION SECTION:\n;; Truncated, retrying in TCP mode.\n"
+            ";; ANSWER SECTION:\n;; AUTHORITY SECTION:")
+
+        # The sections without the colon are skipped.
+        packet = result["transaction"][0]["packet"]
+        self.assertNotIn("truncated,_retrying_in_tcp_mode.", packet)
+        self.assertEqual(packet["answer_section"], "")
+
+    def test_dissect_projection(self):
+        text = ("query_ip: 37.9.72.211\nqname: a.\nquery: [43 octets]\n"
+                ";; ->>HEADER<<- opcode: QUERY, rcode: NOERROR, id: 1\n"
+                ";; flags: rd; QUERY: 1, ANSWER: 0\n"
+                ";; QUESTION SECTION:\n;a. IN A\n"
+                ";; ANSWER SECTION:\na. 60 IN A 1.2.3.4\n"
+                ";; AUTHORITY SECTION:")
+
+        projection = Projection([["meta", "qname"],
+                                 ["packet", "answer_section"]])
+        result = DnsDump(projection).dissect(text)
+        payload = result["transaction"][0]
+
+        # The fields used to identify the packet are always kept.
+        self.assertEqual(payload["type"], "REQUEST")
+        self.assertEqual(payload["meta"], {"qname": "a.", "query": 43})
+        self.assertEqual(payload["packet"], {
+            "answer_section": "a. 60 IN A 1.2.3.4",
+            "header": {"opcode": "QUERY", "rcode": "NOERROR", "id": "1"}})
+
+        projection = Projection([["packet", "flags", "QUERY"]])
+        result = DnsDump(projection).dissect(text)
+        packet = result["transaction"][0]["packet"]
+        self.assertEqual(packet["flags"], {"QUERY": "1"})
+
+        # The projection does not change the validation of the packet.
+        text = text.replace("QUERY: 1, ANSWER: 0", "")
+        self.assertIsNone(DnsDump(projection).dissect(text))
+
+    def test_dissect_many(self):
+        text = ("query: [43 octets]\n"
+                ";; ->>HEADER<<- opcode: QUERY, rcode: NOERROR, id: %d\n"
+                ";; flags:; QUERY: 1, ANSWER: 0\n"
+                ";; QUESTION SECTION:\n;; ANSWER SECTION:\n"
+                ";; AUTHORITY SECTION:")
+
+        chunks = [text % 1, "broken", text % 2, ""]
+        results = list(self.dnsdump.dissect_many(iter(chunks)))
+
+        # The chunks failed to be dissected are omitted.
+        self.assertEqual([r["id"] for r in results], ["1", "2"])
+        self.assertEqual(results, [self.dnsdump.dissect(chunks[0]),
+                                   self.dnsdump.dissect(chunks[2])])
+
+    def test_dissect_records(self):
+        text = ("response: [90 octets]\n"
+                ";; ->>HEADER<<- opcode: QUERY, rcode: NOERROR, id: %d\n"
+                ";; flags: qr rd ra; QUERY: 1, ANSWER: 2\n"
+                ";; QUESTION SECTION:\n;a. IN A\n"
+                ";; ANSWER SECTION:\n"
+                "a. 60 IN CNAME b.\n"
+                "; a comment line\n"
+                "b. 300 IN TXT \"v=spf1 -all\"\n"
+                "b. broken IN A 1.2.3.4\n"
+                ";; AUTHORITY SECTION:")
+
+        # The records are not parsed, unless projected explicitly.
+        packet = self.dnsdump.dissect(text % 1)["transaction"][0]["packet"]
+        self.assertNotIn("answer_records", packet)
+
+        dnsdump = DnsDump(Projection([["packet", "answer_records"],
+                                      ["packet", "authority_records"]]))
+        first, second = (dnsdump.dissect(text % i)["transaction"][0]["packet"]
+                         for i in range(2))
+
+        self.assertNotIn("answer_section", first)
+        self.assertEqual(first["authority_records"], [])
+        self.assertEqual(first["answer_records"], [
+            ResourceRecord("a.", 60, "IN", "CNAME", "b."),
+            ResourceRecord("b.", 300, "IN", "TXT", '"v=spf1 -all"')])
+
+        # The names and the record data are interned.
+        self.assertIs(first["answer_records"][0]["rdata"],
+                      second["answer_records"][1]["name"])
+        self.assertIs(first["answer_records"][1]["rdata"],
+                      second["answer_records"][1]["rdata"])
@@ -0,0 +1,113 @@
+import json
+import os
+import pickle
+import tempfile
+import unittest
+
+from nssift.grind.dissect.dnsdump import DnsDump
+from nssift.grind.dissect.failures import Failures
+from nssift.grind.dissect.failures import FailuresParam
+from nssift.grind.dissect.failures import Reservoir
+from nssift.grind.dissect.wire import DnsWire
+from nssift.grind.fileutil.pcap import Message
+
+
+class TestReservoir(unittest.TestCase):
+    """Validate the uniform sampling of the items."""
+
+    def test_add(self):
+        reservoir = Reservoir(10)
+        for item in range(1000):
+            reservoir.add(item)
+
+        self.assertEqual(reservoir.seen, 1000)
+        self.assertEqual(len(set(reservoir.items())), 10)
+
+        # The empty reservoir only counts the items.
+        reservoir = Reservoir()
+        reservoir.add(1)
+        self.assertEqual((reservoir.seen, reservoir.items()), (1, []))
+
+    def test_merge(self):
+        # The sample of the merged reservoirs is taken from both of them
+        # proportionally to the count of the seen items.
+        hits = 0
+        for _ in range(200):
+            first, second = Reservoir(10), Reservoir(10)
+            for item in range(900):
+                first.add(item)
+            for item in range(900, 1000):
+                second.add(item)
+
+            items = first.merge(second).items()
+            self.assertEqual(len(items), 10)
+            hits += sum(1 for item in items if item >= 900)
+
+        self.assertEqual(first.seen, 1000)
+        self.assertTrue(100 <= hits <= 300)
+
+
+class TestFailures(unittest.TestCase):
+    """Validate the accounting of the dissection failures."""
+
+    def test_merge(self):
+        param = FailuresParam(5)
+        first, second = param.zero(None), param.zero(None)
+
+        first.fail(Failures.HEADER, "a")
+        second.fail(Failures.HEADER)
+        second.fail(Failures.KEYPATH, count=3)
+
+        # The tallies are sent between the workers and the driver.
+        second = pickle.loads(pickle.dumps(second))
+        failures = param.addInPlace(first, second)
+
+        self.assertEqual(failures.counts, {Failures.HEADER: 2,
+                                           Failures.KEYPATH: 3})
+        self.assertEqual(failures.quarantine.items(), [(Failures.HEADER, "a")])
+
+    def test_dissect(self):
+        failures = Failures(10)
+        dnsdump = DnsDump(failures=failures)
+
+        header = ";; ->>HEADER<<- opcode: QUERY, id: 1\n"
+        flags = ";; flags:; QUERY: 1\n"
+        sections = ";; Q:\n;; A:\n;; B:\n"
+
+        chunks = {Failures.DELIMITER: "query: 1",
+                  Failures.SECTIONS: "query: 1\n" + header + flags,
+                  Failures.HEADER: "query: 1\n;; ->>HEADER<<-\n" + flags +
+                                   sections,
+                  Failures.FLAGS: "query: 1\n" + header + ";; flags:;\n" +
+                                  sections,
+                  Failures.META: "\n" + header + flags + sections,
+                  Failures.TYPE: "qname: a.\n" + header + flags + sections,
+                  Failures.ID: "query: 1\n" + header.replace("id", "no") +
+                               flags + sections}
+
+        for reason, chunk in chunks.items():
+            self.assertIsNone(dnsdump.dissect(chunk))
+            self.assertEqual(failures.counts[reason], 1, reason)
+
+        self.assertEqual(sorted(failures.quarantine.items()),
+                         sorted(chunks.items()))
+
+    def test_dump(self):
+        failures = Failures(10)
+        message = Message(1.0, "UDP", "10.0.0.1", 1, "10.0.0.53", 53, b"\1")
+
+        DnsWire(failures=failures).dissect(message)
+        DnsDump(failures=failures).dissect("broken")
+
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "quarantine.json")
+            failures.dump(filename)
+
+            with open(filename) as textfile:
+                lines = sorted(map(json.loads, textfile),
+                               key=lambda line: line["reason"])
+
+        self.assertEqual(lines[0], {"reason": Failures.DELIMITER,
+                                    "chunk": "broken"})
+        self.assertEqual(lines[1]["reason"], Failures.MESSAGE)
+        self.assertEqual(lines[1]["chunk"]["data"], "AQ==")
@@ -0,0 +1,32 @@
+import unittest
+
+from nssift.grind.dissect.projection import Projection
+
+
+class TestProjection(unittest.TestCase):
+    """Validate the projection of the dissected fields."""
+
+    def test_names(self):
+        projection = Projection([["meta", "qname"],
+                                 ["meta", "qtype"],
+                                 ["packet", "flags", "QUERY"]])
+
+        self.assertEqual(projection.names(["meta"]), {"qname", "qtype"})
+        self.assertEqual(projection.names(["packet"]), {"flags"})
+        self.assertEqual(projection.names(["packet", "flags"]), {"QUERY"})
+        self.assertEqual(projection.names(["id"]), set())
+
+        # The nested fields of the projected field are projected.
+        self.assertIsNone(projection.names(["meta", "qname"]))
+        self.assertIsNone(projection.names(["meta", "qname", "length"]))
+
+    def test_names_all(self):
+        self.assertIsNone(Projection().names(["meta"]))
+        self.assertIsNone(Projection([[]]).names(["meta"]))
+
+    def test_add_nested(self):
+        projection = Projection([["packet"], ["packet", "flags", "QUERY"]])
+        self.assertIsNone(projection.names(["packet", "flags"]))
+
+        projection = Projection([["packet", "flags", "QUERY"], ["packet"]])
+        self.assertIsNone(projection.names(["packet", "flags"]))
@@ -0,0 +1,70 @@
+import pickle
+import unittest
+
+from nssift.grind.dissect.dnsdump import DnsDump
+from nssift.grind.dissect.record import Interner
+from nssift.grind.dissect.record import Payload
+from nssift.grind.dissect.record import Record
+
+
+class TestRecord(unittest.TestCase):
+    """Validate the compact records of the dissected packets."""
+
+    def setUp(self):
+        super().setUp()
+        self.payload = Payload("REQUEST", {"qname": "a."}, {"header": {}})
+        self.record = Record("1", [self.payload])
+
+    def test_mapping(self):
+        self.assertEqual(self.record["id"], "1")
+        self.assertEqual(self.payload.get("meta"), {"qname": "a."})
+        self.assertIsNone(self.payload.get("query"))
+        self.assertEqual(list(self.payload), ["type", "meta", "packet"])
+
+        with self.assertRaises(KeyError):
+            self.payload["query"]
+
+        # The records are equal to the dictionaries of the same fields.
+        self.assertEqual(self.record, {"id": "1", "transaction": [
+            {"type": "REQUEST", "meta": {"qname": "a."},
+             "packet": {"header": {}}}]})
+
+    def test_pickle(self):
+        record = pickle.loads(pickle.dumps(self.record))
+        self.assertIsInstance(record, Record)
+        self.assertIsInstance(record["transaction"][0], Payload)
+        self.assertEqual(record, self.record)
+
+        # The names of the fields are not pickled.
+        self.assertLess(len(pickle.dumps(self.record)),
+                        len(pickle.dumps(dict(self.record))))
+
+    def test_interned(self):
+        text = ("qtype: A (1)\nquery: [43 octets]\n"
+                ";; ->>HEADER<<- opcode: QUERY, rcode: NOERROR, id: %d\n"
+                ";; flags: rd; QUERY: 1, ANSWER: 0\n"
+                ";; QUESTION SECTION:\n;; ANSWER SECTION:\n"
+                ";; AUTHORITY SECTION:")
+
+        dnsdump = DnsDump()
+        first, second = (dnsdump.dissect(text % i)["transaction"][0]
+                         for i in range(2))
+
+        self.assertIs(first["meta"]["qtype"], second["meta"]["qtype"])
+        self.assertIs(first["packet"]["header"]["rcode"],
+                      second["packet"]["header"]["rcode"])
+
+        keys = lambda payload: list(payload["meta"])
+        self.assertTrue(all(map(
+            lambda ab: ab[0] is ab[1], zip(keys(first), keys(second)))))
+
+    def test_interner(self):
+        interner = Interner(maxsize=2)
+        first = interner("".join(["ya", ".ru."]))
+        self.assertIs(interner("".join(["ya", ".ru."])), first)
+
+        # The interned strings are released, when the limit is reached.
+        interner("a.")
+        interner("b.")
+        self.assertEqual(len(interner.strings), 1)
+        self.assertIsNot(interner("".join(["ya", ".ru."])), first)
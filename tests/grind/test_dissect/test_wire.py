@@ -0,0 +1,195 @@
+import struct
+import unittest
+
+from nssift.grind.dissect.dnsdump import DnsDump
+from nssift.grind.dissect.projection import Projection
+from nssift.grind.dissect.record import ResourceRecord
+from nssift.grind.dissect.wire import DnsWire
+from nssift.grind.fileutil.pcap import Message
+
+
+def encode_name(name):
+    labels = [label.encode() for label in name.strip(".").split(".") if label]
+    return b"".join(bytes([len(l)]) + l for l in labels) + b"\0"
+
+
+def encode_message(msgid, bits, qname, qtype, sections=((), (), ())):
+    counts = [1] + [len(records) for records in sections]
+    data = struct.pack("!HHHHHH", msgid, bits, *counts)
+    data += encode_name(qname) + struct.pack("!HH", qtype, 1)
+
+    for records in sections:
+        for name, rrtype, ttl, rdata in records:
+            data += name + struct.pack("!HHIH", rrtype, 1, ttl, len(rdata))
+            data += rdata
+    return data
+
+
+class TestDnsWire(unittest.TestCase):
+    """Validate the dissection of the DNS messages in the wire format."""
+
+    def setUp(self):
+        super().setUp()
+        self.dnswire = DnsWire()
+        self.maxDiff = None
+
+    def _message(self, data, src="10.0.0.1", dst="10.0.0.53"):
+        return Message(1453792000.5, "UDP", src, 40000, dst, 53, data)
+
+    def test_dissect_request(self):
+        data = encode_message(19254, 0x0100, "221.160.5.15.in-addr.arpa.", 12)
+        result = self.dnswire.dissect(self._message(data))
+
+        meta = {"timestamp": 1453792000.5,
+                "proto": "UDP",
+                "query_ip": "10.0.0.1",
+                "query_port": 40000,
+                "response_ip": "10.0.0.53",
+                "id": "19254",
+                "qname": "221.160.5.15.in-addr.arpa.",
+                "qtype": "PTR (12)",
+                "query": len(data)}
+
+        packet = {"header": {"opcode": "QUERY",
+                             "rcode": "NOERROR",
+                             "id": "19254"},
+                  "flags": {"flags": "rd",
+                            "QUERY": "1",
+                            "ANSWER": "0",
+                            "AUTHORITY": "0",
+                            "ADDITIONAL": "0"},
+                  "question_section": ";221.160.5.15.in-addr.arpa. IN PTR",
+                  "answer_section": "",
+                  "authority_section": "",
+                  "additional_section": ""}
+
+        self.assertEqual(result, {"id": "19254", "transaction": [
+            {"type": "REQUEST", "meta": meta, "packet": packet}]})
+
+    def test_dissect_response(self):
+        pointer = b"\xc0\x0c"
+        data = encode_message(61168, 0x8583, "rosfirm.ru.", 1, (
+            [(pointer, 1, 86400, bytes([212, 23, 90, 34]))],
+            [(pointer, 2, 3600, encode_name("ns1.rosfirm.ru.")),
+             (pointer, 6, 3600, pointer + b"\x05admin" + pointer +
+              struct.pack("!IIIII", 1, 2, 3, 4, 5))],
+            [(b"\0", 41, 0, b""),
+             (pointer, 28, 60, bytes(15) + b"\1"),
+             (pointer, 16, 60, b"\x05a b c\x01d"),
+             (pointer, 99, 60, b"\xff")]))
+
+        result = self.dnswire.dissect(self._message(
+            data, src="10.0.0.53", dst="10.0.0.1"))
+        payload = result["transaction"][0]
+
+        self.assertEqual(payload["type"], "RESPONSE")
+        self.assertEqual(payload["meta"]["query_ip"], "10.0.0.1")
+        # The client port is the destination port of the response.
+        self.assertEqual(payload["meta"]["query_port"], 53)
+        self.assertEqual(payload["meta"]["response"], len(data))
+
+        packet = payload["packet"]
+        self.assertEqual(packet["header"]["rcode"], "NXDOMAIN")
+        self.assertEqual(packet["flags"]["flags"], "qr aa rd ra")
+        self.assertEqual(packet["answer_section"],
+                         "rosfirm.ru. 86400 IN A 212.23.90.34")
+        self.assertEqual(packet["authority_section"], "\n".join([
+            "rosfirm.ru. 3600 IN NS ns1.rosfirm.ru.",
+            "rosfirm.ru. 3600 IN SOA rosfirm.ru. admin.rosfirm.ru. "
+            "1 2 3 4 5"]))
+
+        # The EDNS pseudo record is not rendered.
+        self.assertEqual(packet["additional_section"], "\n".join([
+            "rosfirm.ru. 60 IN AAAA ::1",
+            'rosfirm.ru. 60 IN TXT "a b c" "d"',
+            'rosfirm.ru. 60 IN SPF ""']))
+
+    def test_dissect_like_dnsdump(self):
+        data = encode_message(4291, 0x0100, "ya.gds.tmall.com.", 1)
+        wire = self.dnswire.dissect(self._message(data))
+
+        text = self._render(wire)
+        dump = DnsDump().dissect(text)
+
+        # The shape of the records is the same as of the DNS dump.
+        self.assertEqual(wire["id"], dump["id"])
+        for key in ("type", "packet"):
+            self.assertEqual(wire["transaction"][0][key],
+                             dump["transaction"][0][key])
+        for key in ("qname", "qtype", "query", "query_ip"):
+            self.assertEqual(wire["transaction"][0]["meta"][key],
+                             dump["transaction"][0]["meta"][key])
+
+    def _render(self, record):
+        payload = record["transaction"][0]
+        meta, packet = payload["meta"], payload["packet"]
+        header, flags = packet["header"], packet["flags"]
+
+        lines = ["query_ip: %s" % meta["query_ip"],
+                 "qname: %s" % meta["qname"],
+                 "qtype: %s" % meta["qtype"],
+                 "query: [%d octets]" % meta["query"],
+                 ";; ->>HEADER<<- opcode: %(opcode)s, rcode: %(rcode)s, "
+                 "id: %(id)s" % header,
+                 ";; flags: %(flags)s; QUERY: %(QUERY)s, ANSWER: %(ANSWER)s, "
+                 "AUTHORITY: %(AUTHORITY)s, ADDITIONAL: %(ADDITIONAL)s" %
+                 flags,
+                 ";; QUESTION SECTION:", packet["question_section"],
+                 ";; ANSWER SECTION:", ";; AUTHORITY SECTION:",
+                 ";; ADDITIONAL SECTION:"]
+        return "\n".join(lines)
+
+    def test_dissect_projection(self):
+        data = encode_message(1, 0x8180, "a.", 1, (
+            [(b"\xc0\x0c", 1, 60, bytes(4))], [], []))
+        projection = Projection([["meta", "qname"], ["packet", "flags"]])
+
+        result = DnsWire(projection).dissect(self._message(data))
+        payload = result["transaction"][0]
+
+        self.assertEqual(payload["meta"], {"qname": "a.",
+                                           "response": len(data)})
+        self.assertEqual(set(payload["packet"]), {"header", "flags"})
+
+    def test_dissect_records(self):
+        pointer = b"\xc0\x0c"
+        data = encode_message(1, 0x8180, "a.", 1, (
+            [(pointer, 1, 60, bytes(4)), (pointer, 1, 30, bytes(4))],
+            [], [(b"\0", 41, 0, b"")]))
+
+        dnswire = DnsWire(Projection([["packet", "answer_records"],
+                                      ["packet", "additional_records"]]))
+        packet = dnswire.dissect(self._message(data))["transaction"][0][
+            "packet"]
+
+        self.assertNotIn("answer_section", packet)
+        self.assertNotIn("authority_records", packet)
+        self.assertEqual(packet["additional_records"], [])
+        self.assertEqual(packet["answer_records"], [
+            ResourceRecord("a.", 60, "IN", "A", "0.0.0.0"),
+            ResourceRecord("a.", 30, "IN", "A", "0.0.0.0")])
+
+        first, second = packet["answer_records"]
+        self.assertIs(first["name"], second["name"])
+        self.assertIs(first["rdata"], second["rdata"])
+
+    def test_dissect_errors(self):
+        data = encode_message(1, 0x0100, "a.", 1)
+
+        # Truncated messages and compression loops are dropped.
+        for broken in (data[:10], data[:-3],
+                       data[:12] + b"\xc0\x0c" + data[-4:]):
+            self.assertIsNone(self.dnswire.dissect(self._message(broken)))
+
+        # The resource records are validated when they are projected.
+        data = encode_message(1, 0x8180, "a.", 1, (
+            [(b"\xc0\x0c", 1, 60, bytes(4))], [], []))
+        self.assertIsNone(self.dnswire.dissect(self._message(data[:-1])))
+
+        projection = Projection([["meta", "qname"]])
+        self.assertIsNotNone(DnsWire(projection).dissect(
+            self._message(data[:-1])))
+
+    def test_escape(self):
+        self.assertEqual(self.dnswire.escape(b"ya-ru_1"), "ya-ru_1")
+        self.assertEqual(self.dnswire.escape(b"a.b\x00;"), "a\\.b\\000\\;")
@@ -1,9 +1,12 @@
 import bz2
 import glob
+import tempfile
+import types
 import unittest
 import unittest.mock
 
 from nssift.grind.fileutil.bzloader import BzLoader
+from nssift.grind.fileutil.loader import Split
 
 
 class TestBzLoader(unittest.TestCase):
@@ -15,27 +18,14 @@ class TestBzLoader(unittest.TestCase):
         # Validate the correct search string is crafted.
         iglob_mock.assert_called_once_with("/mnt/dns/test/*.bz2")
 
-    @unittest.mock.patch.object(BzLoader, "isplit")
-    def test_load(self, isplit_mock):
-        textfile_mock = unittest.mock.MagicMock()
+    def test_load(self):
+        with tempfile.NamedTemporaryFile(suffix=".bz2") as archive:
+            archive.write(bz2.compress(b"first\nsecond\n---\nthird\n"))
+            archive.flush()
 
-        instance_mock = unittest.mock.MagicMock()
-        instance_mock.__enter__ = unittest.mock.MagicMock(
-            return_value=textfile_mock)
-
-        # Mock the BZ2File constructor to validate passed arguments.
-        bz2file_mock = unittest.mock.MagicMock(return_value=instance_mock)
-
-        with unittest.mock.patch.object(bz2, "BZ2File", bz2file_mock):
-            loader = BzLoader("DNS3-20160126_0705-P0001231.pres.bz2")
-            loader.load("---")
-
-            # Ensure the correct filename was passed.
-            bz2file_mock.assert_called_once_with(
-                "DNS3-20160126_0705-P0001231.pres.bz2")
-
-            # Validate the splitting symbol value.
-            isplit_mock.assert_called_once_with(textfile_mock, "---")
+            # Ensure the whole archive is split into the chunks.
+            chunks = BzLoader(archive.name).load("---")
+            self.assertEqual(chunks, ["first\nsecond", "third"])
 
     def test_split(self):
         loader = BzLoader(None)
@@ -59,3 +49,71 @@ class TestBzLoader(unittest.TestCase):
 
         # Validate the splitting into the multiple chunks.
         self.assertEqual(splits, ["first\nsecond", "third\nfourth", "fifth"])
+
+    def test_split_maxsize(self):
+        loader = BzLoader(None, maxsize=12)
+
+        # Validate that the chunks exceeding the bound are dropped
+        # until the next separator.
+        array = ["first", "second", "third", "---", "fourth", "---", "f"]
+        splits = list(loader.isplit(array, "---"))
+
+        self.assertEqual(splits, ["fourth", "f"])
+
+    def test_iload(self):
+        with tempfile.NamedTemporaryFile(suffix=".bz2") as archive:
+            archive.write(bz2.compress(b"first\nsecond\n---\nthird\n"))
+            archive.flush()
+
+            # Ensure the chunks are produced by the generator.
+            chunks = BzLoader(archive.name).iload("---")
+            self.assertIsInstance(chunks, types.GeneratorType)
+            self.assertEqual(list(chunks), ["first\nsecond", "third"])
+
+    def _archive(self, *streams):
+        archive = tempfile.NamedTemporaryFile(suffix=".bz2")
+        self.addCleanup(archive.close)
+
+        # Write the multi-stream archive like a parallel bzip2 does.
+        archive.write(b"".join(map(bz2.compress, streams)))
+        archive.flush()
+        return archive.name
+
+    def test_index(self):
+        filename = self._archive(b"first\n---\n", b"second\n", b"third\n")
+        first = len(bz2.compress(b"first\n---\n"))
+        second = len(bz2.compress(b"second\n"))
+
+        # Ensure the offsets of all streams are found.
+        self.assertEqual(BzLoader.index(filename),
+                         [0, first, first + second])
+
+    def test_isplits(self):
+        filename = self._archive(b"first\n---\n", b"second\n", b"third\n")
+        size = len(bz2.compress(b"first\n---\n"))
+
+        # The small archives are not split at all.
+        splits = BzLoader.isplits(filename, 1024)
+        self.assertEqual(splits, [Split(filename, 0, None)])
+
+        # Each stream of the archive should become a separate split.
+        splits = BzLoader.isplits(filename, 1)
+        self.assertEqual(len(splits), 3)
+        self.assertEqual(splits[0], Split(filename, 0, size))
+        self.assertIsNone(splits[-1].end)
+
+    def test_iload_splits(self):
+        streams = [b"first\nsec", b"ond\n---\nthird\n", b"---\n",
+                   b"fourth\n---", b"\nfifth\n---\n", b"sixth"]
+
+        filename = self._archive(*streams)
+        chunks = []
+
+        # Load each split separately and ensure, that the chunks
+        # crossing the boundaries are neither lost nor duplicated.
+        for split in BzLoader.isplits(filename, 1):
+            loader = BzLoader(split.filename, None, split.start, split.end)
+            chunks.extend(loader.iload("---"))
+
+        self.assertEqual(chunks, ["first\nsecond", "third", "fourth",
+                                  "fifth", "sixth"])
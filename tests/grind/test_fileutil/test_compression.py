@@ -0,0 +1,59 @@
+import bz2
+import gzip
+import lzma
+import tempfile
+import unittest
+
+from nssift.grind.fileutil import compression
+
+
+class TestCompression(unittest.TestCase):
+    """Validate the compression codecs detection."""
+
+    def _file(self, data):
+        textfile = tempfile.NamedTemporaryFile()
+        self.addCleanup(textfile.close)
+
+        textfile.write(data)
+        textfile.flush()
+        return textfile.name
+
+    def test_detect(self):
+        payload = b"query_ip: 37.9.72.211\n"
+
+        # Ensure the codec is picked by the magic bytes, but not
+        # by the file extension.
+        cases = [(bz2.compress(payload), compression.Bz2Codec),
+                 (gzip.compress(payload), compression.GzipCodec),
+                 (lzma.compress(payload), compression.XzCodec),
+                 (payload, compression.PlainCodec)]
+
+        for data, klass in cases:
+            codec = compression.detect(self._file(data))
+            self.assertIsInstance(codec, klass)
+
+            # Validate the content is decompressed by both the file
+            # object and the incremental decompressor.
+            with codec.open(self._file(data)) as textfile:
+                self.assertEqual(textfile.read(), payload)
+
+            decompressor = codec.decompressor()
+            self.assertEqual(decompressor.decompress(data), payload)
+
+    def test_extensions(self):
+        extensions = compression.extensions()
+
+        for ext in ["*.bz2", "*.gz", "*.xz", "*.zst", "*.lz4", "*.pres"]:
+            self.assertIn(ext, extensions)
+
+    def test_index(self):
+        codec = compression.Bz2Codec()
+        data = bz2.compress(b"first\n") + bz2.compress(b"second\n")
+
+        # The header of the second stream crosses the block boundary.
+        offsets = codec.index(self._file(data), 37)
+        self.assertEqual(offsets, [0, len(bz2.compress(b"first\n"))])
+
+        # Other codecs does not support the splitting.
+        codec = compression.GzipCodec()
+        self.assertIsNone(codec.index(self._file(data), 1024))
@@ -0,0 +1,83 @@
+import bz2
+import datetime
+import os
+import tempfile
+import unittest
+
+from nssift.grind.fileutil.index import Index
+from nssift.grind.fileutil.loader import Loader
+from nssift.grind.fileutil.planner import Planner
+
+
+class TestIndex(unittest.TestCase):
+    """Validate the sidecar indexes of the archives."""
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def _archive(self, streams, name="DNS3-20160126_0705-P1.pres.bz2"):
+        filename = os.path.join(self.directory.name, name)
+        with open(filename, "wb") as archive:
+            for data in streams:
+                archive.write(bz2.compress(data))
+        return filename
+
+    def test_build(self):
+        filename = self._archive([
+            b"timestamp: 1453792000\nid: 1\n---\ntimestamp: 1453792100\n",
+            b"id: 2\n  ---  \nid: 3\n---\n",
+            b"timestamp: 1453791900.5\nid: 4\n"])
+
+        index = Index.build(filename, "---")
+        first = os.path.getsize(self._archive([
+            b"timestamp: 1453792000\nid: 1\n---\ntimestamp: 1453792100\n"],
+            name="first.bz2"))
+
+        self.assertEqual(index.records, 4)
+        self.assertEqual(index.offsets[:2], [0, first])
+        self.assertEqual([records for _, records in index.streams], [1, 2, 1])
+        self.assertEqual(index.timerange, (
+            datetime.datetime(2016, 1, 26, 7, 5, 0, 500000),
+            datetime.datetime(2016, 1, 26, 7, 8, 20)))
+
+    def test_build_empty(self):
+        filename = self._archive([b"id: 1\n---\n"])
+        index = Index.build(filename, "---")
+
+        self.assertEqual(index.records, 1)
+        self.assertIsNone(index.timerange)
+
+    def test_dump_load(self):
+        filename = self._archive([b"timestamp: 1453792000\n---\n", b"id: 2\n"])
+        self.assertIsNone(Index.load(filename))
+
+        index = Index.build(filename, "---")
+        index.dump()
+
+        loaded = Index.load(filename)
+        self.assertEqual(loaded.streams, index.streams)
+        self.assertEqual(loaded.timerange, index.timerange)
+        self.assertEqual(loaded.records, 2)
+
+        # The index of the modified archive is outdated.
+        with open(filename, "ab") as archive:
+            archive.write(bz2.compress(b"id: 3\n"))
+        self.assertIsNone(Index.load(filename))
+
+    def test_isplits(self):
+        filename = self._archive([b"id: %d\n---\n" % i for i in range(4)])
+        index = Index.build(filename, "---")
+
+        splits = Loader.isplits(filename, 1, index.offsets)
+        self.assertEqual([s.start for s in splits], index.offsets)
+
+    def test_planner(self):
+        filename = self._archive([b"timestamp: 1453888800\n---\n"])
+        Index.build(filename, "---").dump()
+
+        # The time stamp of the records takes precedence over the name.
+        since = datetime.datetime(2016, 1, 27)
+        self.assertTrue(Planner(since=since).match(filename))
+        self.assertFalse(Planner(until=since).match(filename))
@@ -0,0 +1,63 @@
+import bz2
+import glob
+import gzip
+import lzma
+import os
+import tempfile
+import unittest
+import unittest.mock
+
+from nssift.grind.fileutil.loader import Loader
+
+
+class TestLoader(unittest.TestCase):
+    """Validate the codec-agnostic archives loading."""
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def _file(self, name, data):
+        filename = os.path.join(self.directory.name, name)
+        with open(filename, "wb") as textfile:
+            textfile.write(data)
+        return filename
+
+    @unittest.mock.patch.object(glob, "iglob", return_value=[])
+    def test_isearch(self, iglob_mock):
+        list(Loader.isearch("/mnt/dns/test"))
+
+        # Validate the archives of all codecs are searched.
+        iglob_mock.assert_any_call("/mnt/dns/test/*.bz2")
+        iglob_mock.assert_any_call("/mnt/dns/test/*.gz")
+        iglob_mock.assert_any_call("/mnt/dns/test/*.xz")
+
+    def test_iload(self):
+        payload = b"first\nsecond\n---\nthird\n"
+
+        # Ensure the same chunks are produced regardless of
+        # the compression codec.
+        for name, compress in [("dump.bz2", bz2.compress),
+                               ("dump.gz", gzip.compress),
+                               ("dump.xz", lzma.compress),
+                               ("dump.pres", bytes)]:
+            filename = self._file(name, compress(payload))
+            chunks = list(Loader(filename).iload("---"))
+            self.assertEqual(chunks, ["first\nsecond", "third"])
+
+    def test_iload_splits(self):
+        # The loader should not rely on the extension of the file.
+        filename = self._file("dump.pres", b"".join(
+            map(bz2.compress, [b"first\n---\nsec", b"ond\n---\n"])))
+
+        chunks = []
+        for split in Loader.isplits(filename, 1):
+            loader = Loader(split.filename, None, split.start, split.end)
+            chunks.extend(loader.iload("---"))
+
+        self.assertEqual(chunks, ["first", "second"])
+
+        # The gzip archives are never split.
+        filename = self._file("dump.gz", gzip.compress(b"first\n"))
+        self.assertEqual(len(Loader.isplits(filename, 1)), 1)
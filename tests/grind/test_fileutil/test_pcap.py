@@ -0,0 +1,176 @@
+import gzip
+import io
+import os
+import struct
+import tempfile
+import unittest
+
+from nssift.grind.fileutil.loader import Loader
+from nssift.grind.fileutil.pcap import Message
+from nssift.grind.fileutil.pcap import PcapReader
+from nssift.grind.pipeline.dissect import DissectionStream
+
+
+def ipv4(protocol, segment, src=b"\n\0\0\1", dst=b"\n\0\0\x35", frag=0):
+    header = struct.pack("!BBHHHBBH4s4s", 0x45, 0, 20 + len(segment), 0,
+                         frag, 64, protocol, 0, src, dst)
+    return header + segment
+
+
+def ipv6(protocol, segment):
+    header = struct.pack("!IHBB16s16s", 6 << 28, len(segment), protocol, 64,
+                         bytes(15) + b"\1", bytes(15) + b"\x35")
+    return header + segment
+
+
+def udp(data, sport=40000, dport=53):
+    return struct.pack("!HHHH", sport, dport, 8 + len(data), 0) + data
+
+
+def tcp(payload, sport=40000, dport=53):
+    return struct.pack("!HHIIBBHHH", sport, dport, 0, 0, 5 << 4, 0x18,
+                       0, 0, 0) + payload
+
+
+def ethernet(packet, ethertype=0x0800, vlan=False):
+    frame = bytes(12)
+    if vlan:
+        frame += struct.pack("!HH", 0x8100, 1)
+    return frame + struct.pack("!H", ethertype) + packet
+
+
+def pcap(frames, linktype=1, order="<", nano=False):
+    magic = 0xa1b23c4d if nano else 0xa1b2c3d4
+    data = struct.pack(order + "IHHiIII", magic, 2, 4, 0, 0, 65535, linktype)
+    for timestamp, frame in frames:
+        fraction = 10 ** 9 if nano else 10 ** 6
+        data += struct.pack(order + "IIII", int(timestamp),
+                            round(timestamp % 1 * fraction),
+                            len(frame), len(frame))
+        data += frame
+    return data
+
+
+def pcapng_block(blocktype, body):
+    body += bytes(-len(body) % 4)
+    length = len(body) + 12
+    return struct.pack("<II", blocktype, length) + body + \
+        struct.pack("<I", length)
+
+
+def pcapng(frames, linktype=1):
+    data = pcapng_block(0x0a0d0d0a, struct.pack("<IHHq", 0x1a2b3c4d,
+                                                1, 0, -1))
+
+    # The time stamps are in milliseconds.
+    option = struct.pack("<HHB3x", 9, 1, 3) + struct.pack("<HH", 0, 0)
+    data += pcapng_block(1, struct.pack("<HHI", linktype, 0, 0) + option)
+    data += pcapng_block(5, b"statistics")
+
+    for timestamp, frame in frames:
+        ticks = round(timestamp * 1000)
+        data += pcapng_block(6, struct.pack(
+            "<IIIII", 0, ticks >> 32, ticks & 0xffffffff,
+            len(frame), len(frame)) + frame)
+
+    data += pcapng_block(3, struct.pack("<I", len(frames[0][1])) +
+                         frames[0][1])
+    return data
+
+
+class TestPcapReader(unittest.TestCase):
+    """Validate the reading of the network captures."""
+
+    query = b"\x00\x01\x01\x00\x00\x01\x00\x00\x00\x00\x00\x00" \
+            b"\x01a\x00\x00\x01\x00\x01"
+
+    def _messages(self, data):
+        return list(PcapReader(io.BytesIO(data)).imessages())
+
+    def test_iscapture(self):
+        self.assertTrue(PcapReader.iscapture(pcap([])))
+        self.assertTrue(PcapReader.iscapture(pcap([], order=">")))
+        self.assertTrue(PcapReader.iscapture(pcapng([(0, b"")])))
+        self.assertFalse(PcapReader.iscapture(b"query_ip: 1.2.3.4"))
+
+    def test_imessages_pcap(self):
+        frames = [(1.25, ethernet(ipv4(17, udp(self.query)))),
+                  (2.5, ethernet(ipv4(17, udp(self.query)), vlan=True)),
+                  (3.0, ethernet(ipv6(17, udp(self.query, 53, 5353)),
+                                 ethertype=0x86dd))]
+
+        for order, nano in (("<", False), (">", False), ("<", True)):
+            messages = self._messages(pcap(frames, order=order, nano=nano))
+
+            self.assertEqual(messages, [
+                Message(1.25, "UDP", "10.0.0.1", 40000, "10.0.0.53", 53,
+                        self.query),
+                Message(2.5, "UDP", "10.0.0.1", 40000, "10.0.0.53", 53,
+                        self.query),
+                Message(3.0, "UDP", "::1", 53, "::35", 5353, self.query)])
+
+    def test_imessages_skipped(self):
+        frames = [(0, ethernet(ipv4(17, udp(self.query, 40000, 80)))),
+                  (0, ethernet(ipv4(17, udp(self.query), frag=0x2000))),
+                  (0, ethernet(ipv4(1, udp(self.query)))),
+                  (0, ethernet(b"arp", ethertype=0x0806)),
+                  (0, ethernet(b"\x45"))]
+
+        self.assertEqual(self._messages(pcap(frames)), [])
+
+        # The truncated capture is read up to the last complete packet.
+        data = pcap([(0, ethernet(ipv4(17, udp(self.query))))] * 2)
+        self.assertEqual(len(self._messages(data[:-1])), 1)
+
+    def test_imessages_tcp(self):
+        prefixed = struct.pack("!H", len(self.query)) + self.query
+
+        # The incomplete message of the segment is not decoded.
+        segment = tcp(prefixed * 2 + prefixed[:5])
+        messages = self._messages(pcap([(0, ipv4(6, segment))],
+                                       linktype=101))
+
+        self.assertEqual([m.data for m in messages], [self.query] * 2)
+        self.assertEqual({m.transport for m in messages}, {"TCP"})
+
+    def test_imessages_pcapng(self):
+        frames = [(1.5, ethernet(ipv4(17, udp(self.query))))]
+        messages = self._messages(pcapng(frames))
+
+        self.assertEqual([m.timestamp for m in messages], [1.5, None])
+        self.assertEqual([m.data for m in messages], [self.query] * 2)
+
+
+class TestLoaderCapture(unittest.TestCase):
+    """Validate the loading of the compressed network captures."""
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def test_uncompress(self):
+        frame = ethernet(ipv4(17, udp(TestPcapReader.query)))
+        filename = os.path.join(self.directory.name, "dns.pcap.gz")
+        with open(filename, "wb") as archive:
+            archive.write(gzip.compress(pcap([(1.0, frame)] * 3)))
+
+        self.assertTrue(Loader(filename).iscapture())
+        self.assertEqual(len(list(Loader(filename).icapture())), 3)
+
+        # The captures are never split.
+        self.assertEqual(len(Loader.isplits(filename, 1)), 1)
+
+        stream = DissectionStream()
+        split, = stream.partition(filename)
+        dissector, chunks = stream.uncompress(split)
+        self.assertIs(dissector, stream.dnswire)
+
+        records = list(dissector.dissect_many(chunks))
+
+        self.assertEqual(len(records), 3)
+        self.assertEqual(records[0]["id"], "1")
+        self.assertEqual(records[0]["transaction"][0]["meta"]["qname"], "a.")
+
+        # The partition of the splits is dissected at once.
+        self.assertEqual(list(stream.idissect([split, split])), records * 2)
@@ -0,0 +1,80 @@
+import datetime
+import os
+import tempfile
+import unittest
+
+from nssift.grind.fileutil.loader import Split
+from nssift.grind.fileutil.planner import Planner
+from nssift.grind.fileutil.planner import parsetime
+
+
+class TestPlanner(unittest.TestCase):
+    """Validate the archives discovery and partitioning."""
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def _file(self, name, size=0):
+        filename = os.path.join(self.directory.name, name)
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+
+        with open(filename, "wb") as textfile:
+            textfile.write(b"\0" * size)
+        return filename
+
+    def test_parsetime(self):
+        self.assertEqual(parsetime("20160126_0705"),
+                         datetime.datetime(2016, 1, 26, 7, 5))
+        self.assertEqual(parsetime("20160126"),
+                         datetime.datetime(2016, 1, 26))
+
+        with self.assertRaises(ValueError):
+            parsetime("2016-01-26")
+
+    def test_isearch(self):
+        first = self._file("2016/01/26/DNS3-20160126_0705-P1.pres.bz2")
+        second = self._file("2016/01/27/DNS3-20160127_0000-P1.pres.gz")
+        self._file("2016/01/27/DNS3-20160127_0000-P1.pres.gz.tmp")
+        self._file("README.md")
+
+        # Ensure the archives are searched recursively.
+        planner = Planner()
+        filenames = list(planner.isearch(self.directory.name))
+        self.assertEqual(filenames, [first, second])
+
+        # Validate the include and exclude patterns.
+        planner = Planner(include=["*.bz2", "*.gz"], exclude=["*0127*"])
+        filenames = list(planner.isearch(self.directory.name))
+        self.assertEqual(filenames, [first])
+
+    def test_isearch_time_range(self):
+        self._file("DNS3-20160126_0705-P1.pres.bz2")
+        second = self._file("DNS3-20160126_0800-P1.pres.bz2")
+        self._file("DNS3-20160126_0900-P1.pres.bz2")
+        unknown = self._file("capture.pres.bz2")
+
+        # The archives without time stamp are not filtered.
+        planner = Planner(since=parsetime("20160126_0710"),
+                          until=parsetime("20160126_0900"))
+        filenames = list(planner.isearch(self.directory.name))
+        self.assertEqual(filenames, [second, unknown])
+
+    def test_pack(self):
+        sizes = [50, 10, 10, 30, 20, 10, 30]
+        splits = [Split(self._file("%d.bz2" % i, size), 0, None)
+                  for i, size in enumerate(sizes)]
+
+        # Ensure the partitions get the same amount of the data.
+        planner = Planner()
+        bins = planner.pack(splits, 3)
+        loads = [sum(map(planner.weight, b)) for b in bins]
+        self.assertEqual(sorted(loads), [50, 50, 60])
+
+        # Validate the weight of the ranged splits.
+        split = Split(splits[0].filename, 10, 40)
+        self.assertEqual(planner.weight(split), 30)
+
+        # Empty partitions are not returned.
+        self.assertEqual(len(planner.pack(splits[:2], 8)), 2)
@@ -0,0 +1,60 @@
+import threading
+import unittest
+
+from nssift.grind.fileutil.prefetch import Prefetcher
+
+
+class TestPrefetcher(unittest.TestCase):
+    """Validate the background reading of the iterables."""
+
+    def test_iterate(self):
+        # Ensure the order of the items is preserved.
+        for depth in (0, 1, 4):
+            with Prefetcher(range(100), depth) as items:
+                self.assertEqual(list(items), list(range(100)))
+
+    def test_bounded(self):
+        produced = []
+
+        def _produce_impl():
+            for item in range(100):
+                produced.append(item)
+                yield item
+
+        with Prefetcher(_produce_impl(), 2) as items:
+            iterator = iter(items)
+            self.assertEqual(next(iterator), 0)
+
+            # Validate that the producer does not run far ahead of the
+            # consumer: the queue holds two items, one more item is
+            # waiting to be put into the queue.
+            self.assertLessEqual(len(produced), 4)
+
+        # The background thread is stopped on the exit.
+        self.assertFalse(items.thread.is_alive())
+
+    def test_error(self):
+        def _produce_impl():
+            yield 1
+            raise ValueError("corrupted data")
+
+        # Ensure the exception is raised in the consumer thread.
+        with Prefetcher(_produce_impl(), 4) as items:
+            iterator = iter(items)
+            self.assertEqual(next(iterator), 1)
+
+            with self.assertRaises(ValueError):
+                next(iterator)
+
+    def test_background(self):
+        threads = []
+
+        def _produce_impl():
+            threads.append(threading.current_thread())
+            yield 1
+
+        with Prefetcher(_produce_impl(), 1) as items:
+            list(items)
+
+        # Validate the items are produced in another thread.
+        self.assertNotEqual(threads, [threading.current_thread()])
@@ -0,0 +1,79 @@
+import itertools
+import tracemalloc
+import unittest
+
+from nssift.grind.fileutil.loader import Loader
+from nssift.grind.fileutil.splitter import Splitter
+
+
+class TestSplitter(unittest.TestCase):
+    """Validate the splitting of the bytes into the chunks."""
+
+    def test_find(self):
+        splitter = Splitter("---")
+
+        # Ensure the separator line boundaries are returned.
+        self.assertEqual(splitter.find(b"first\n---\nsecond", 0), (6, 10))
+        self.assertEqual(splitter.find(b"first\n  ---\t\n", 0), (6, 13))
+
+        # The separator should occupy the whole line.
+        self.assertIsNone(splitter.find(b"first---\nsecond\n", 0))
+        self.assertIsNone(splitter.find(b"first\n--- x\n", 0))
+
+        # The line without the newline could be continued.
+        self.assertIsNone(splitter.find(b"first\n---", 0))
+
+    def test_isplit(self):
+        splitter = Splitter("---")
+
+        # Validate the separator crossing the blocks boundary.
+        blocks = [b"first\nsecond\n-", b"--\nthird\n", b"fourth"]
+        chunks = list(splitter.isplit(blocks))
+        self.assertEqual(chunks, ["first\nsecond", "third\nfourth"])
+
+        # Ensure that each line is stripped and empty lines are omitted.
+        blocks = [b"first\n\n  second \r\n---\n\nthird\n---"]
+        chunks = list(splitter.isplit(blocks))
+        self.assertEqual(chunks, ["first\nsecond", "third"])
+
+    def test_isplit_equivalence(self):
+        text = ("first\n \n---\n---\nsecond---\n --- \nthird\n"
+                "\tfourth\n---\n\n")
+
+        # The chunks should be the same as produced by the line-based
+        # splitting of the loader.
+        expected = list(Loader(None).isplit(text.splitlines(), "---"))
+
+        for size in range(1, len(text)):
+            data = text.encode()
+            blocks = [data[i:i + size] for i in range(0, len(data), size)]
+
+            chunks = list(Splitter("---").isplit(blocks))
+            self.assertEqual(chunks, expected)
+
+    def test_isplit_maxsize(self):
+        splitter = Splitter("---", maxsize=12)
+
+        # Validate the oversized chunks are dropped even if they
+        # are spread across many blocks.
+        blocks = [b"first\n", b"second\n", b"third\n", b"---\nfourth\n",
+                  b"---\nf"]
+        chunks = list(splitter.isplit(blocks))
+        self.assertEqual(chunks, ["fourth", "f"])
+
+    def test_isplit_overflow(self):
+        splitter = Splitter("---", maxsize=1000)
+
+        # The corrupted data without newlines is not accumulated.
+        blocks = itertools.chain(itertools.repeat(b"x" * 1000, 1000),
+                                 [b"\n--", b"-\nfirst\n---\nsecond"])
+
+        tracemalloc.start()
+        try:
+            chunks = list(splitter.isplit(blocks))
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        self.assertEqual(chunks, ["first", "second"])
+        self.assertLess(peak, 100000)
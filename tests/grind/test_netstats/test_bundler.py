@@ -1,7 +1,11 @@
+import pickle
 import unittest
 import unittest.mock
 
+from nssift.grind.netstats.bundler import ArrayBundler
 from nssift.grind.netstats.bundler import Bundler
+from nssift.grind.netstats.bundler import WindowBundler
+from nssift.grind.netstats.factory import BundlerFactory
 from nssift.grind.netstats import gauge
 
 
@@ -26,3 +30,169 @@ class TestBundler(unittest.TestCase):
 
         for gauge in gauges:
             gauge.normalize.assert_called_once_with()
+
+    def test_missing(self):
+        gauges = [gauge.NumberGauge(["meta", "query"]),
+                  gauge.SetGauge(["meta", "qtype"]),
+                  gauge.NumberGauge(["meta", "query"])]
+
+        bundler = Bundler(gauges)
+        bundler.updateall([{"meta": {"qtype": "A"}}, {"meta": {}}])
+
+        # The failed updates are counted by the nested keys.
+        self.assertEqual(bundler.missing(), {"meta.query": 4,
+                                             "meta.qtype": 1})
+        self.assertEqual(bundler.missing(), {})
+
+
+class TestArrayBundler(unittest.TestCase):
+    """Validate the statistics collector with the numeric state."""
+
+    def setUp(self):
+        super().setUp()
+        gauges = [(gauge.NumberGauge, ["meta", "query"]),
+                  (gauge.SetGauge, ["meta", "qtype"]),
+                  (gauge.IncrementGauge, []),
+                  (gauge.RatioGauge, ["meta", "rcode"],
+                   {"values": ["NXDOMAIN"]})]
+
+        self.factory = BundlerFactory(gauges, bundler=ArrayBundler)
+        self.params = [
+            {"meta": {"query": 40, "qtype": "A", "rcode": "NOERROR"}},
+            {"meta": {"query": 60, "qtype": "MX", "rcode": "NXDOMAIN"}},
+            {"meta": {"qtype": "A", "rcode": "NXDOMAIN"}},
+            {"meta": {"query": 20, "qtype": "TXT", "rcode": "NOERROR"}}]
+
+    def _bundlers(self, params):
+        bundler = self.factory.build()
+        array_bundler = BundlerFactory(self.factory.gauges).build()
+
+        bundler.updateall(params)
+        array_bundler.updateall(params)
+        return bundler, array_bundler
+
+    def test_normalize(self):
+        bundler, reference = self._bundlers(self.params)
+        self.assertIsInstance(bundler, ArrayBundler)
+        self.assertEqual(bundler.normalize(), reference.normalize())
+        self.assertEqual(bundler.normalize(), [40.0, 3.0, 4.0, 0.5])
+
+        empty = self.factory.build()
+        self.assertEqual(empty.normalize(), [0.0, 0.0, 0.0, 0.0])
+
+    def test_join(self):
+        first, first_reference = self._bundlers(self.params[:3])
+        second, second_reference = self._bundlers(self.params[3:])
+
+        joined = first.join(second)
+        reference = first_reference.join(second_reference)
+
+        self.assertEqual(joined.normalize(), reference.normalize())
+        self.assertEqual(joined.missing(), {"meta.query": 1})
+        self.assertEqual(joined.missing(), {})
+
+    def test_pickle(self):
+        bundler, reference = self._bundlers(self.params)
+        restored = pickle.loads(pickle.dumps(bundler))
+
+        self.assertIsInstance(restored, ArrayBundler)
+        self.assertEqual(restored.normalize(), reference.normalize())
+        self.assertEqual(restored.missing(), {"meta.query": 1})
+
+        # The arrayed counters are serialized as a single buffer and
+        # the factory is shared by the bundlers serialized together.
+        bundlers = [self._bundlers(self.params) for _ in range(10)]
+        self.assertLess(len(pickle.dumps([b for b, _ in bundlers])),
+                        len(pickle.dumps([r for _, r in bundlers])))
+
+    def test_normalize_sequences(self):
+        gauges = [(gauge.NumberGauge, ["meta", "query"]),
+                  (gauge.QuantileGauge, ["meta", "query"],
+                   {"quantiles": [0.0, 1.0]}),
+                  (gauge.IncrementGauge, [])]
+
+        for bundler in (None, ArrayBundler):
+            bundler = BundlerFactory(gauges, bundler).build()
+            bundler.updateall(self.params)
+
+            # The quantiles are flattened into the normalized values.
+            self.assertEqual(bundler.normalize(),
+                             [40.0, 20.0, 60.0, 4.0])
+
+    def test_describe(self):
+        gauges = [(gauge.NumberGauge, ["meta", "query"]),
+                  (gauge.HeavyHitterGauge, ["meta", "qtype"], {"size": 1})]
+
+        bundler = BundlerFactory(gauges, ArrayBundler).build()
+        bundler.updateall(self.params)
+
+        self.assertEqual(bundler.describe(), {"meta.qtype": [("A", 2)]})
+
+
+class TestWindowBundler(unittest.TestCase):
+    """Validate the statistics collector with the time windows."""
+
+    def setUp(self):
+        super().setUp()
+        gauges = [(gauge.NumberGauge, ["meta", "query"])]
+        self.factory = BundlerFactory(gauges, ArrayBundler, windows=(10, 3))
+
+    def _params(self, timestamp, query):
+        return {"meta": {"timestamp": timestamp, "query": query}}
+
+    def _bundler(self, *params):
+        bundler = self.factory.build()
+        for timestamp, query in params:
+            bundler.updateall([self._params(timestamp, query)])
+        return bundler
+
+    def test_windows(self):
+        bundler = self._bundler((1, 10), (5, 20), ("25.5", 60), (None, 90))
+        self.assertIsInstance(bundler, WindowBundler)
+        self.assertIn(["meta", "timestamp"], self.factory.keys())
+
+        # The rate is averaged over the range of the kept windows,
+        # including the windows without updates: 2, 0 and 1.
+        deviation = (2 / 3) ** 0.5
+        normalized = bundler.normalize()
+        self.assertEqual(normalized[:2], [45.0, 0.1])
+        self.assertAlmostEqual(normalized[2],
+                               (deviation - 1) / (deviation + 1))
+        self.assertEqual(bundler.describe(), {"windows": [
+            {"start": 0, "count": 2, "point": [15.0]},
+            {"start": 20, "count": 1, "point": [60.0]}]})
+
+    def test_ring(self):
+        bundler = self._bundler((1, 10), (31, 20), (2, 30), (41, 40))
+
+        # The window replaced by the latest one is not updated anymore.
+        windows = bundler.describe()["windows"]
+        self.assertEqual([w["start"] for w in windows], [30, 40])
+        self.assertEqual(bundler.normalize()[0], 25.0)
+
+    def test_evict(self):
+        bundler = self._bundler((1, 10), (5000000, 20), (2, 30))
+
+        # Only the latest windows are kept, the older ones are evicted
+        # even if their slots are not reused.
+        windows = bundler.describe()["windows"]
+        self.assertEqual([w["start"] for w in windows], [5000000])
+        self.assertEqual(bundler.normalize()[1:], [0.1, -1.0])
+
+        other = self._bundler((15, 40))
+        windows = other.join(bundler).describe()["windows"]
+        self.assertEqual([w["start"] for w in windows], [5000000])
+
+    def test_join(self):
+        params = [(1, 10), (12, 20), (35, 30), (13, 40), (2, 50), (55, 60)]
+        expected = self._bundler(*params).describe()
+
+        # The join is associative and commutative.
+        for parts in ([params[:2], params[2:4], params[4:]],
+                      [params[4:], params[:2], params[2:4]]):
+            bundlers = [self._bundler(*part) for part in parts]
+            left = bundlers[0].join(bundlers[1].join(bundlers[2]))
+            self.assertEqual(left.describe(), expected)
+
+        restored = pickle.loads(pickle.dumps(left))
+        self.assertEqual(restored.normalize(), left.normalize())
@@ -0,0 +1,49 @@
+import math
+import unittest
+
+from nssift.grind.netstats.entropy import Entropy
+from nssift.grind.netstats.entropy import histogram_entropy
+
+
+class TestEntropy(unittest.TestCase):
+    """Validate the computer of the Shannon entropy."""
+
+    def setUp(self):
+        super().setUp()
+        self.names = ["google.com.", "a.google.com.", "", "xn--d1acpjx3f.",
+                      "q1w2e3r4t5y6.tunnel.example.", "яндекс.рф."]
+
+    def _entropy(self, string):
+        frequencies = [string.count(c) / len(string) for c in set(string)]
+        return -sum(p * math.log2(p) for p in frequencies)
+
+    def test_compute(self):
+        engine = Entropy()
+        for name in self.names:
+            self.assertAlmostEqual(engine.compute(name), self._entropy(name))
+
+    def test_entropies(self):
+        engine = Entropy(batchsize=1)
+        names = self.names + self.names[:2]
+
+        # The batch is computed like the strings one by one.
+        entropies = engine.entropies(names)
+        for name, entropy in zip(names, entropies):
+            self.assertAlmostEqual(entropy, self._entropy(name))
+
+        self.assertEqual(engine.entropies(names), entropies)
+        self.assertEqual(len(engine.memo), len(self.names))
+
+    def test_memo(self):
+        engine = Entropy(maxsize=2)
+        engine.entropy("a.")
+        engine.entropy("b.")
+        engine.entropy("a.")
+        engine.entropy("c.")
+
+        # The least recently used entropy is forgotten.
+        self.assertEqual(list(engine.memo), ["a.", "c."])
+
+    def test_histogram_entropy(self):
+        self.assertEqual(histogram_entropy([0, 0]), 0.0)
+        self.assertAlmostEqual(histogram_entropy([2, 0, 2, 4]), 1.5)
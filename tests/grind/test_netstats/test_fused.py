@@ -0,0 +1,78 @@
+import pickle
+import unittest
+
+from nssift.grind.netstats import gauge
+from nssift.grind.netstats.bundler import Bundler
+from nssift.grind.netstats.factory import BundlerFactory
+from nssift.grind.netstats.fused import Fuser
+
+
+class TestFuser(unittest.TestCase):
+    """Validate the fused updates of the gauges."""
+
+    def setUp(self):
+        super().setUp()
+        self.factory = BundlerFactory([
+            (gauge.NumberGauge, ["meta", "query"]),
+            (gauge.NumberGauge, ["meta", "query"], {"type": "REQUEST"}),
+            (gauge.SetGauge, ["meta", "qtype"]),
+            (gauge.ShannonEntropyGauge, ["meta", "qname"]),
+            (gauge.IncrementGauge, [])])
+
+        self.records = [
+            {"type": "REQUEST", "meta": {"query": 10, "qtype": "A",
+                                         "qname": "example.com."}},
+            {"type": "RESPONSE", "meta": {"query": 20, "qtype": "MX"}},
+            {"type": "REQUEST", "meta": {"query": None}},
+            {"type": "REQUEST", "meta": "unknown"},
+            {"type": "RESPONSE"}]
+
+    def test_update(self):
+        fused = self.factory.build()
+        gauges = self.factory.instantiate()
+        for record in self.records:
+            for item in gauges:
+                item.update(record)
+
+        fused.updateall(self.records)
+
+        # The fused update matches the updates of the gauges one by one.
+        self.assertEqual([item.normalize() for item in fused.gauges],
+                         [item.normalize() for item in gauges])
+        self.assertEqual([item.missing for item in fused.gauges],
+                         [item.missing for item in gauges])
+
+    def test_failure(self):
+        factory = BundlerFactory([(gauge.NumberGauge, ["meta", "query"]),
+                                  (gauge.IncrementGauge, []),
+                                  (gauge.ShannonEntropyGauge, ["qname"])])
+
+        good = {"meta": {"query": 20}, "qname": "aabb"}
+        bad = {"meta": {"query": "[215 bytes]"}, "qname": "abcd"}
+
+        fused = factory.build()
+        plain = Bundler(factory.instantiate())
+        for bundler in (fused, plain):
+            bundler.updateall([good, bad, good])
+
+        # The failed gauge does not interrupt the updates of the others.
+        self.assertEqual(fused.normalize(), [20.0, 3.0, 1.0 + 1 / 3])
+        self.assertEqual(fused.normalize(), plain.normalize())
+
+    def test_shared_keys(self):
+        fuser = Fuser(self.factory.instantiate())
+
+        # The nested dictionaries are looked up once for all gauges.
+        self.assertEqual(fuser.source.count("params['meta']"), 1)
+        self.assertEqual(fuser.source.count("['query']"), 1)
+
+    def test_pickle(self):
+        bundler = self.factory.build()
+        bundler.updateall(self.records[:2])
+
+        restored = pickle.loads(pickle.dumps(bundler))
+        restored.updateall(self.records[2:])
+        bundler.updateall(self.records[2:])
+
+        self.assertEqual(restored.normalize(), bundler.normalize())
+        self.assertIsNotNone(pickle.loads(pickle.dumps(self.factory)))
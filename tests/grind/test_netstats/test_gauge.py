@@ -1,6 +1,8 @@
 import unittest
+import unittest.mock
 
 from nssift.grind.netstats import gauge
+from nssift.grind.netstats.entropy import Entropy
 
 
 class TestGauge(unittest.TestCase):
@@ -11,7 +13,7 @@ class TestGauge(unittest.TestCase):
         self.Gauge = type(
             "GaugeMock", (gauge.Gauge,),
             {"normalize": lambda self: None,
-             "update": lambda self, params: None})
+             "put": lambda self, value: None})
 
     def test_gauge_nested_getter(self):
         # Define a counter with a deeply nested key.
@@ -127,3 +129,195 @@ class TestGauge(unittest.TestCase):
 
         # Ensure correct counts returned.
         self.assertEqual(counter.normalize(), 2.0)
+
+    def test_gauge_type(self):
+        counter = gauge.NumberGauge(["meta", "response"], type="RESPONSE")
+
+        counter.update({"type": "RESPONSE", "meta": {"response": 4.0}})
+        counter.update({"type": "REQUEST", "meta": {"response": 8.0}})
+
+        # The payloads of the other type are neither counted,
+        # nor accounted as missing.
+        self.assertEqual(counter.normalize(), 4.0)
+        self.assertEqual(counter.missing, 0)
+
+    def test_length_gauge(self):
+        counter = gauge.LengthGauge(["packet", "answer_records"])
+        self.assertEqual(counter.normalize(), 0.0)
+
+        counter.update({"packet": {"answer_records": [1, 2, 3]}})
+        counter.update({"packet": {"answer_records": []}})
+        counter.update({"packet": {}})
+
+        self.assertEqual(counter.normalize(), 1.5)
+
+    def test_ratio_gauge(self):
+        counter = gauge.RatioGauge(["packet", "header", "rcode"],
+                                   values=["NXDOMAIN", "SERVFAIL"])
+        self.assertEqual(counter.normalize(), 0.0)
+
+        for rcode in ("NOERROR", "NXDOMAIN", "SERVFAIL", "NOERROR"):
+            counter.update({"packet": {"header": {"rcode": rcode}}})
+
+        self.assertEqual(counter.normalize(), 0.5)
+
+    def test_spread_gauge(self):
+        counter = gauge.SpreadGauge(["packet", "answer_records"], "ttl")
+        self.assertEqual(counter.normalize(), 0.0)
+
+        counter.update({"packet": {"answer_records": [
+            {"ttl": 2}, {"ttl": 4}, {"ttl": 4}]}})
+
+        other = gauge.SpreadGauge(["packet", "answer_records"], "ttl")
+        other.update({"packet": {"answer_records": [
+            {"ttl": 4}, {"ttl": 5}, {"ttl": 5}, {"ttl": 7}, {"ttl": 9}]}})
+
+        # The spread of the joined gauges is the spread of all values.
+        self.assertEqual(counter.join(other).normalize(), 2.0)
+
+    def test_set_gauge_join(self):
+        first = gauge.SetGauge(["qname"])
+        second = gauge.SetGauge(["qname"])
+
+        first.update({"qname": "a."})
+        second.update({"qname": "a."})
+        second.update({"qname": "b."})
+
+        # The distinct values of the both gauges are counted.
+        self.assertEqual(first.join(second).normalize(), 2)
+        self.assertEqual(first.processed, 3.0)
+
+    def test_set_gauge_domain(self):
+        counter = gauge.SetGauge(["qtype"], domain=["A (1)", "MX (15)"])
+
+        for qtype in ("A (1)", "MX (15)", "A (1)", "TYPE65280 (65280)"):
+            counter.update({"qtype": qtype})
+
+        # The known values are kept in the bitmap.
+        self.assertEqual(counter.bitmap, 0b11)
+        self.assertEqual(counter.accumulator, {"TYPE65280 (65280)"})
+        self.assertEqual(counter.normalize(), 3)
+
+        other = gauge.SetGauge(["qtype"], domain=["A (1)", "MX (15)"])
+        other.update({"qtype": "A (1)"})
+        self.assertEqual(other.join(counter).normalize(), 3)
+
+    def test_set_gauge_estimate(self):
+        first = gauge.SetGauge(["qname"], threshold=100)
+        second = gauge.SetGauge(["qname"], threshold=100)
+
+        for n in range(3000):
+            first.update({"qname": "%d.example.com." % n})
+        for n in range(2000, 2050):
+            second.update({"qname": "%d.example.com." % n})
+
+        # The values over the threshold are estimated by the sketch.
+        self.assertIsNotNone(first.sketch)
+        self.assertEqual(first.accumulator, set())
+        self.assertAlmostEqual(first.normalize() / 3000, 1.0, delta=0.06)
+
+        # The exact values are merged into the sketch and vice versa.
+        self.assertIsNone(second.sketch)
+        self.assertEqual(second.join(first).normalize(), first.normalize())
+        self.assertEqual(first.join(second).normalize(), first.normalize())
+
+    def test_shannon_entropy_gauge_updateall(self):
+        counter = gauge.ShannonEntropyGauge(["qname"])
+        reference = gauge.ShannonEntropyGauge(["qname"])
+
+        params = [{"qname": "a.google.com"}, {}, {"qname": "b.google.com"}]
+        counter.updateall(params)
+        list(map(reference.update, params))
+
+        self.assertEqual(counter.processed, reference.processed)
+        self.assertAlmostEqual(counter.accumulator, reference.accumulator)
+        self.assertEqual(counter.missing, 1)
+
+    def test_shannon_entropy_gauge_batch(self):
+        counter = gauge.ShannonEntropyGauge(["qname"])
+        counter.engine = Entropy()
+
+        # The short transactions of the host are computed as a batch.
+        names = ["%d.example.com" % number for number in range(100)]
+        with unittest.mock.patch.object(
+                counter.engine, "compute_many",
+                wraps=counter.engine.compute_many) as compute_many:
+            for offset in range(0, len(names), 4):
+                counter.updateall([{"qname": name}
+                                   for name in names[offset:offset + 4]])
+
+            compute_many.assert_not_called()
+            entropy = counter.normalize()
+            compute_many.assert_called_once()
+
+        self.assertEqual(counter.processed, 100)
+        self.assertAlmostEqual(entropy, sum(map(
+            counter.engine.compute, names)) / len(names))
+
+    def test_histogram_gauge(self):
+        features = ("entropy", "digits", "labels", "label_length")
+        counters = [gauge.HistogramGauge(["qname"], feature)
+                    for feature in features]
+        others = [gauge.HistogramGauge(["qname"], feature)
+                  for feature in features]
+
+        for counter in counters:
+            counter.update({"qname": "ab.cd."})
+            counter.update({"qname": "."})
+        for counter in others:
+            counter.buffersize = 1
+            counter.update({"qname": "12ab."})
+
+        joined = [a.join(b).normalize() for a, b in zip(counters, others)]
+
+        # The features of the aggregated names: aabbcd12.
+        self.assertAlmostEqual(joined[0], 2.5)
+        self.assertAlmostEqual(joined[1], 0.25)
+        self.assertAlmostEqual(joined[2], 1.0)
+        self.assertAlmostEqual(joined[3], 8 / 3)
+
+        with self.assertRaises(ValueError):
+            gauge.HistogramGauge(["qname"], "unknown")
+
+    def test_quantile_gauge(self):
+        counter = gauge.QuantileGauge(["query"], quantiles=[0.5, 1.0])
+        self.assertEqual(counter.normalize(), [0.0, 0.0])
+
+        for size in (40, 40, 40, 500):
+            counter.update({"query": size})
+
+        other = gauge.QuantileGauge(["query"], quantiles=[0.5, 1.0])
+        other.update({"query": 45})
+
+        self.assertEqual(counter.join(other).normalize(), [40.0, 500.0])
+        self.assertEqual(counter.processed, 5.0)
+
+    def test_quantile_gauge_measure(self):
+        lengths = gauge.QuantileGauge(["qname"], [1.0], measure="length")
+        labels = gauge.QuantileGauge(["qname"], [1.0], measure="labels")
+
+        for counter in (lengths, labels):
+            counter.update({"qname": "a.b.example.com."})
+
+        self.assertEqual(lengths.normalize(), [16.0])
+        self.assertEqual(labels.normalize(), [4.0])
+
+        with self.assertRaises(ValueError):
+            gauge.QuantileGauge(["qname"], measure="unknown")
+
+    def test_heavy_hitter_gauge(self):
+        counter = gauge.HeavyHitterGauge(["qname"], size=1)
+        self.assertEqual(counter.normalize(), 0.0)
+
+        for qname in ("a.", "b.", "a.", "c."):
+            counter.update({"qname": qname})
+
+        # The most frequent value takes the half of the values.
+        self.assertEqual(counter.normalize(), 0.5)
+        self.assertEqual(counter.describe(), [("a.", 2)])
+
+        other = gauge.HeavyHitterGauge(["qname"], size=1)
+        for qname in ("b.", "b."):
+            other.update({"qname": qname})
+
+        self.assertEqual(counter.join(other).describe(), [("b.", 3)])
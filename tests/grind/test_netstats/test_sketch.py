@@ -0,0 +1,168 @@
+import pickle
+import random
+import unittest
+
+from nssift.grind.netstats.sketch import CountMin
+from nssift.grind.netstats.sketch import HeavyHitters
+from nssift.grind.netstats.sketch import HyperLogLog
+from nssift.grind.netstats.sketch import QuantileSketch
+from nssift.grind.netstats.sketch import fingerprint
+
+
+class TestHyperLogLog(unittest.TestCase):
+    """Validate the sketch of the count of distinct values."""
+
+    def test_fingerprint(self):
+        self.assertEqual(fingerprint("ya.ru."), fingerprint(b"ya.ru."))
+        self.assertNotEqual(fingerprint("ya.ru."), fingerprint("ya.ru"))
+        self.assertLess(fingerprint(12), 1 << 64)
+
+    def test_count(self):
+        sketch = HyperLogLog.fromerror(0.02)
+        self.assertEqual(sketch.precision, 12)
+        self.assertEqual(sketch.count(), 0.0)
+
+        sketch.update("%d.example.com." % n for n in range(20000))
+        sketch.update("%d.example.com." % n for n in range(100))
+        self.assertAlmostEqual(sketch.count() / 20000, 1.0, delta=0.06)
+
+        small = HyperLogLog()
+        small.update(["a.", "b.", "c.", "a."])
+        self.assertAlmostEqual(small.count(), 3.0, delta=0.01)
+
+    def test_merge(self):
+        first, second = HyperLogLog(), HyperLogLog()
+        first.update(range(0, 6000))
+        second.update(range(4000, 10000))
+
+        union = HyperLogLog()
+        union.update(range(0, 10000))
+
+        first = pickle.loads(pickle.dumps(first))
+        self.assertEqual(first.merge(second).registers, union.registers)
+
+        with self.assertRaises(ValueError):
+            first.merge(HyperLogLog(10))
+
+
+class TestQuantileSketch(unittest.TestCase):
+    """Validate the sketch of the quantiles."""
+
+    def _rank(self, values, value):
+        return sum(1 for v in values if v <= value) / len(values)
+
+    def test_quantiles(self):
+        sketch = QuantileSketch(k=100)
+        self.assertEqual(sketch.quantiles([0.5]), [0.0])
+
+        values = list(range(10000))
+        random.shuffle(values)
+        sketch.update(values)
+
+        # The memory is bounded regardless of the count of the values.
+        self.assertEqual(sketch.count, 10000)
+        self.assertLess(sum(map(len, sketch.compactors)), 400)
+
+        fractions = [0.1, 0.5, 0.9, 0.99]
+        for fraction, value in zip(fractions, sketch.quantiles(fractions)):
+            self.assertAlmostEqual(self._rank(values, value), fraction,
+                                   delta=0.05)
+
+    def test_merge(self):
+        small, large = QuantileSketch(), QuantileSketch()
+        small.update([10] * 3000)
+        large.update([1000] * 1000)
+
+        merged = pickle.loads(pickle.dumps(small)).merge(large)
+        self.assertEqual(merged.count, 4000)
+        self.assertEqual(merged.quantiles([0.5, 0.7, 0.8, 0.99]),
+                         [10.0, 10.0, 1000.0, 1000.0])
+
+
+class TestHeavyHitters(unittest.TestCase):
+    """Validate the summary of the most frequent values."""
+
+    def _values(self, counts):
+        values = [value for value, count in counts.items()
+                  for _ in range(count)]
+        random.shuffle(values)
+        return values
+
+    def test_exact(self):
+        summary = HeavyHitters(size=2)
+        for value in self._values({"a.": 5, "b.": 3, "c.": 1}):
+            summary.add(value)
+
+        self.assertIsNone(summary.sketch)
+        self.assertEqual(summary.items(), [("a.", 5), ("b.", 3)])
+
+    def test_overflow(self):
+        counts = {"%d.example.com." % n: 1 for n in range(500)}
+        counts.update({"a.": 300, "b.": 200})
+
+        first, second = HeavyHitters(size=2), HeavyHitters(size=2)
+        first.buffersize = second.buffersize = 64
+        for index, value in enumerate(self._values(counts)):
+            (first if index % 2 else second).add(value)
+
+        self.assertIsNotNone(first.sketch)
+        merged = pickle.loads(pickle.dumps(first)).merge(second)
+        self.assertEqual([value for value, _ in merged.items()], ["a.", "b."])
+
+        a, b = (count for _, count in merged.items())
+        self.assertGreaterEqual(a, 300)
+        self.assertGreaterEqual(b, 200)
+        self.assertLess(a, 320)
+
+    def test_merge_exact(self):
+        first, second = HeavyHitters(size=1), HeavyHitters(size=1)
+        first.add("a.")
+        second.add("b.")
+        second.add("b.")
+
+        self.assertEqual(first.merge(second).items(), [("b.", 2)])
+        self.assertIsNone(first.sketch)
+
+        third = HeavyHitters(size=1)
+        third.add("c.")
+        third.add("b.")
+        self.assertEqual(first.merge(third).items(), [("b.", 3)])
+        self.assertIsNone(first.sketch)
+
+    def test_distinct(self):
+        counts = {"%d.example.com." % n: 1 for n in range(100)}
+        first, second = HeavyHitters(size=10), HeavyHitters(size=10)
+        for index, value in enumerate(self._values(counts)):
+            (first if index % 2 else second).add(value)
+
+        merged = first.merge(second)
+        self.assertEqual([count for _, count in merged.items()], [1] * 10)
+
+        # The counts of the sketch are bounded by the candidates.
+        summary = HeavyHitters(size=10)
+        summary.buffersize = 16
+        for value in self._values(counts):
+            summary.add(value)
+
+        self.assertIsNotNone(summary.sketch)
+        self.assertTrue(all(count <= 2 for _, count in summary.items()))
+
+
+class TestCountMin(unittest.TestCase):
+    """Validate the sketch of the counts of the values."""
+
+    def test_estimate(self):
+        sketch = CountMin(width=64, depth=4)
+        sketch.update({"a.": 10, "b.": 1})
+        sketch.update({"a.": 5})
+
+        other = CountMin(width=64, depth=4)
+        other.update({"c.": 7})
+
+        merged = sketch.merge(other)
+        self.assertGreaterEqual(merged.estimate("a."), 15)
+        self.assertGreaterEqual(merged.estimate("c."), 7)
+        self.assertEqual(merged.table.sum(), 23 * 4)
+
+        with self.assertRaises(ValueError):
+            sketch.merge(CountMin(width=32))
@@ -0,0 +1,51 @@
+import json
+import os
+import tempfile
+import unittest
+
+from nssift.grind.netstats import gauge
+from nssift.grind.netstats import spec
+from nssift.grind.netstats.bundler import ArrayBundler
+from nssift.grind.netstats.bundler import WindowBundler
+
+
+class TestSpec(unittest.TestCase):
+    """Validate the specifications of the gauges."""
+
+    def test_build(self):
+        definition = {
+            "bundler": "array",
+            "gauges": [{"gauge": "NumberGauge", "keys": ["meta", "query"]},
+                       {"gauge": "SetGauge", "keys": ["meta", "qtype"],
+                        "type": "REQUEST", "threshold": 16}]}
+
+        with tempfile.TemporaryDirectory() as dirname:
+            filename = os.path.join(dirname, "gauges.json")
+            with open(filename, "w") as textfile:
+                json.dump(definition, textfile)
+
+            factory = spec.build(spec.load(filename))
+
+        bundler = factory.build()
+        self.assertIsInstance(bundler, ArrayBundler)
+        self.assertEqual([type(item) for item in bundler.gauges],
+                         [gauge.NumberGauge, gauge.SetGauge])
+        self.assertEqual(bundler.gauges[1].type, "REQUEST")
+
+        bundler.updateall([{"type": "REQUEST",
+                            "meta": {"query": 4, "qtype": "A"}}])
+        self.assertEqual(bundler.normalize(), [4.0, 1.0])
+
+        # The windows of the command line override the specification.
+        definition["windows"] = [60, 4]
+        self.assertEqual(spec.build(definition).windows, (60, 4))
+        self.assertEqual(spec.build(definition, (30, 2)).windows, (30, 2))
+        self.assertIsInstance(spec.build(definition).build(), WindowBundler)
+
+    def test_unknown(self):
+        with self.assertRaises(ValueError):
+            spec.build({"gauges": [{"gauge": "Gauge"}]})
+        with self.assertRaises(ValueError):
+            spec.build({"gauges": [{"gauge": "LOG"}]})
+        with self.assertRaises(ValueError):
+            spec.build({"bundler": "sparse"})
@@ -0,0 +1,247 @@
+import collections
+import json
+import os
+import tempfile
+import unittest
+import unittest.mock
+
+from nssift.grind.dissect.dnsdump import DnsDump
+from nssift.grind.dissect.record import Payload
+from nssift.grind.dissect.record import Record
+from nssift.grind.netstats import gauge
+from nssift.grind.netstats.factory import BundlerFactory
+from nssift.grind.pipeline.statistics import StatisticsStream
+
+
+class TestStatisticsStream(unittest.TestCase):
+    """Validate the statistics collection of the transactions."""
+
+    def setUp(self):
+        super().setUp()
+        factory = BundlerFactory([(gauge.NumberGauge, ["meta", "query"])])
+        self.stream = StatisticsStream(factory, transaction_maxsize=3)
+
+    def _record(self, msgid="1", **meta):
+        meta.setdefault("query_ip", "10.0.0.1")
+        meta.setdefault("response_ip", "10.0.0.53")
+        return Record(msgid, [Payload("REQUEST", meta, {})])
+
+    def test_projection(self):
+        projection = self.stream.projection()
+        self.assertEqual(projection.names(["meta"]), {
+            "query", "query_ip", "query_port", "response_ip", "timestamp"})
+
+    def test_span_transaction(self):
+        key = lambda record: self.stream.span_transaction(record)[0]
+
+        first = key(self._record(query_port=4000, timestamp=1453792000.5))
+        self.assertEqual(first, ("1", "10.0.0.1", 4000, "10.0.0.53",
+                                 24229866))
+
+        # The packets of the same time bucket share the transaction.
+        self.assertEqual(first, key(self._record(
+            query_port=4000, timestamp="1453792019")))
+
+        # The reused identifiers are distinguished by the client port,
+        # the client address and the time.
+        self.assertNotEqual(first, key(self._record(
+            query_port=4001, timestamp=1453792000.5)))
+        self.assertNotEqual(first, key(self._record(
+            query_ip="10.0.0.2", query_port=4000, timestamp=1453792000.5)))
+        self.assertNotEqual(first, key(self._record(
+            query_port=4000, timestamp=1453792060)))
+
+        # The packets without time stamps are grouped by the identifier
+        # and the addresses only.
+        self.assertEqual(key(self._record()),
+                         key(self._record(timestamp="unknown")))
+
+    def test_pair_colliding(self):
+        records = lambda: [self._record(
+            str(number % 50), query_ip="10.0.0.%d" % (number % 20),
+            query=number) for number in range(3000)]
+
+        # The unanswered requests sharing the identifier are neither
+        # merged nor dropped in the partition.
+        self.stream.pairing_size = 100
+        pairs = list(self.stream.pair_partition(
+            map(self.stream.span_transaction, records())))
+        self.assertEqual(len(pairs), 3000)
+
+        # Nor by the pairing across the cluster.
+        groups = collections.defaultdict(list)
+        for keypair in map(self.stream.span_transaction, records()):
+            groups[keypair[0][0]].append(keypair)
+
+        transactions = [transaction for group in groups.items()
+                        for _, transaction in
+                        self.stream.pair_identifier(group)]
+        self.assertEqual(sorted(t["transaction"][0]["meta"]["query"]
+                                for t in transactions), list(range(3000)))
+
+        # The responses without addresses are paired with the requests
+        # of the same identifier.
+        response = Record("7", [Payload("RESPONSE", {"response": 1}, {})])
+        group = ("7", groups["7"] + [self.stream.span_transaction(response)])
+        transactions = self.stream.pair_identifier(group)
+        self.assertEqual(len(transactions), 60)
+        self.assertEqual(len(transactions[0][1]["transaction"]), 2)
+
+    def test_pair_dnsdump(self):
+        dnsdump = DnsDump()
+        request = dnsdump.dissect("""
+            query_ip: 37.9.72.211
+            id: 61168
+            qname: rosfirm.ru.
+            qtype: A (1)
+            query: [28 octets]
+            ;; ->>HEADER<<- opcode: QUERY, rcode: NOERROR, id: 61168
+            ;; flags:; QUERY: 1, ANSWER: 0, AUTHORITY: 0, ADDITIONAL: 0
+
+            ;; QUESTION SECTION:
+            ;rosfirm.ru. IN A
+
+            ;; ANSWER SECTION:
+
+            ;; AUTHORITY SECTION:
+
+            ;; ADDITIONAL SECTION:
+            """)
+        response = dnsdump.dissect("""
+            response: [53 octets]
+            ;; ->>HEADER<<- opcode: QUERY, rcode: NOERROR, id: 61168
+            ;; flags: qr aa; QUERY: 1, ANSWER: 1, AUTHORITY: 0, ADDITIONAL: 0
+
+            ;; QUESTION SECTION:
+            ;rosfirm.ru. IN A
+
+            ;; ANSWER SECTION:
+            rosfirm.ru. 86400 IN A 212.23.90.34
+
+            ;; AUTHORITY SECTION:
+
+            ;; ADDITIONAL SECTION:
+            """)
+
+        # The responses of the text dumps carry no addresses, so the
+        # packets are paired by the identifier.
+        pairs = list(self.stream.pair_partition(
+            map(self.stream.span_transaction, [request, response])))
+        self.assertEqual(len(pairs), 1)
+
+        flag, keypair = pairs[0]
+        self.assertTrue(flag)
+
+        host, transaction = self.stream.span_host(keypair)
+        self.assertEqual(host, "37.9.72.211")
+        self.assertEqual([p["type"] for p in transaction],
+                         ["REQUEST", "RESPONSE"])
+
+    def test_join_transaction(self):
+        records = [self._record(query=n) for n in range(5)]
+        joined = records[0]
+        for record in records[1:]:
+            joined = self.stream.join_transaction(joined, record)
+
+        # The packets over the limit of the transaction are dropped.
+        self.assertEqual([p["meta"]["query"] for p in joined["transaction"]],
+                         [0, 1, 2])
+
+    def test_pair_partition(self):
+        request = lambda msgid, timestamp: Record(msgid, [Payload(
+            "REQUEST", {"query_ip": "10.0.0.1", "timestamp": timestamp},
+            {})])
+        response = lambda msgid, timestamp: Record(msgid, [Payload(
+            "RESPONSE", {"query_ip": "10.0.0.1", "timestamp": timestamp},
+            {})])
+
+        # The transactions are joined in place, so the records are
+        # created for each pairing.
+        records = lambda: [
+            request("1", 0), request("2", 0), response("1", 1),
+            request("3", 1), request("4", 150), response("4", 151),
+            response("5", 152)]
+
+        self.stream.pairing_size = 3
+        pairs = list(self.stream.pair_partition(
+            map(self.stream.span_transaction, records())))
+
+        paired = [(key[0], len(value["transaction"]))
+                  for flag, (key, value) in pairs if flag]
+        leftovers = [key[0] for flag, (key, _) in pairs if not flag]
+
+        # The unpaired transactions of the passed time buckets are
+        # left for the global grouping.
+        self.assertEqual(paired, [("1", 2), ("4", 2)])
+        self.assertEqual(leftovers, ["2", "3", "5"])
+
+        # The buffer of the unpaired transactions is bounded.
+        self.stream.pairing_size = 1
+        pairs = list(self.stream.pair_partition(
+            map(self.stream.span_transaction, records())))
+        self.assertEqual([key[0] for flag, (key, _) in pairs if flag],
+                         ["4"])
+
+    def test_aggregate_host(self):
+        self.stream.failures = unittest.mock.Mock()
+
+        hosts = [self.stream.span_host((None, self._record(query=n)))
+                 for n in (2, 4, 6)]
+        self.assertEqual(hosts[0][0], "10.0.0.1")
+
+        # Combine the transactions like in two partitions.
+        first = self.stream.create_host(hosts[0][1])
+        first = self.stream.update_host(first, hosts[1][1])
+        first.updateall([{"meta": {}}])
+        second = self.stream.create_host(hosts[2][1])
+        second.updateall([{"meta": {}}])
+
+        bundler = self.stream.account_host(
+            self.stream.join_host(first, second))
+        self.assertEqual(bundler.normalize(), [4.0])
+
+        # The failed updates of the both partitions are accounted once.
+        failures = self.stream.failures.add.call_args[0][0]
+        self.assertEqual(failures.counts, {"keypath:meta.query": 2})
+        self.assertEqual(bundler.missing(), {})
+
+    def test_span_dimensions(self):
+        stream = StatisticsStream(self.stream.factory,
+                                  dimensions=["subnet", "domain"])
+        self.assertEqual(stream.projection().names(["meta"]), {
+            "query", "qname", "query_ip", "query_port", "response_ip",
+            "timestamp"})
+
+        keypair = lambda **meta: (None, self._record(**meta))
+
+        # The addresses are rolled up into the subnets.
+        self.assertEqual(stream.span_subnet(keypair())[0], "10.0.0.0/24")
+        self.assertEqual(stream.span_subnet(
+            keypair(query_ip="2001:db8:1:2::1"))[0], "2001:db8:1::/48")
+        self.assertIsNone(stream.span_subnet(keypair(query_ip="unknown")))
+
+        # The names are rolled up into the registered domains.
+        domain = lambda qname: stream.span_domain(keypair(qname=qname))
+        self.assertEqual(domain("www.Example.com.")[0], "example.com.")
+        self.assertEqual(domain("a.b.example.co.uk.")[0], "example.co.uk.")
+        self.assertEqual(domain("example.de.")[0], "example.de.")
+        self.assertIsNone(domain("."))
+        self.assertIsNone(stream.span_domain(keypair()))
+
+        with self.assertRaises(ValueError):
+            StatisticsStream(self.stream.factory, dimensions=["country"])
+
+    def test_render_dimension(self):
+        bundler = self.stream.create_host([self._record()])
+
+        rdd = unittest.mock.Mock()
+        rdd.map.side_effect = lambda f: unittest.mock.Mock(
+            toLocalIterator=lambda: map(f, [("10.0.0.0/24", bundler)]))
+
+        with tempfile.TemporaryDirectory() as dirname:
+            filename = os.path.join(dirname, "stats.json")
+            self.stream.render_dimension(filename, "subnet", rdd)
+
+            with open(os.path.join(dirname, "subnet-stats.json")) as textfile:
+                description = json.loads(textfile.readline())
+        self.assertEqual(description["key"], "10.0.0.0/24")